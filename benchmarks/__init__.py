@@ -0,0 +1,7 @@
+import os
+
+# group_sms_chat.app wires its production dependencies on import: keep it away from the real database and
+# give it a valid phone number so the benchmarks can reuse create_app.
+os.environ.setdefault("DB_FILE_PATH", ":memory:")
+os.environ.setdefault("TWILIO_PHONE_NUMBERS", "+15550000001")
+os.environ.setdefault("SESSION_SECRET", "benchmark")
@@ -0,0 +1,105 @@
+import math
+
+from fastapi import FastAPI
+
+from group_sms_chat.app import APIHandlers, create_app
+from group_sms_chat.application.accept_group_message_handler import AcceptGroupMessageHandler
+from group_sms_chat.application.authenticate_session_handler import AuthenticateSessionHandler
+from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.application.delete_user_handler import DeleteUserHandler
+from group_sms_chat.application.find_group_summaries_handler import FindGroupSummariesHandler
+from group_sms_chat.application.find_groups_handler import FindGroupsHandler
+from group_sms_chat.application.get_outbox_stats_handler import GetOutboxStatsHandler
+from group_sms_chat.application.get_phone_number_load_handler import GetPhoneNumberLoadHandler
+from group_sms_chat.application.get_routing_cache_stats_handler import GetRoutingCacheStatsHandler
+from group_sms_chat.application.join_group_handler import JoinGroupHandler
+from group_sms_chat.application.leave_group_handler import LeaveGroupHandler
+from group_sms_chat.application.login_handler import LoginHandler
+from group_sms_chat.application.register_user_handler import RegisterUserHandler
+from group_sms_chat.application.send_group_message_handler import SendGroupMessageHandler
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.password_hasher import PasswordHasher
+from group_sms_chat.domain.routing_cache import RoutingCache
+from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.cache.routing_cache import LRURoutingCache
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.sms_outbox import SQLiteSMSOutbox
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """
+    Return the given percentile of the samples using the nearest-rank method.
+
+    :param samples: The measured values.
+    :param percent: The percentile to compute, between 0 and 100.
+    :return: The value at the requested percentile, or 0 if there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def format_latencies(name: str, samples: list[float]) -> str:
+    """
+    Format the p50, p99 and max of a list of latencies given in seconds.
+    """
+    return (f"{name:<32} n={len(samples):<6} "
+            f"p50={percentile(samples, 50) * 1000:8.2f}ms "
+            f"p99={percentile(samples, 99) * 1000:8.2f}ms "
+            f"max={max(samples, default=0.0) * 1000:8.2f}ms")
+
+
+def create_benchmark_app(pool: SQLiteConnectionPool, sms_service: SMSService,
+                         password_hasher: PasswordHasher | None = None,
+                         routing_cache: RoutingCache | None = None) -> FastAPI:
+    """
+    Create the FastAPI application wired to the given database pool and SMS service.
+    The messages are sent directly through the SMS service, without the outbox, before the webhook responds.
+    The passwords are hashed with scrypt and its default work factor unless another hasher is given,
+    and the message routes are only cached when a routing cache is given.
+    """
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    unit_of_work = SQLiteUnitOfWork(pool=pool)
+    session_tokens = HMACSessionTokens(secret="benchmark")
+    password_hasher = password_hasher if password_hasher is not None else ScryptPasswordHasher()
+    validate_user = ValidateUserPasswordHandler(user_repository=user_repo, password_hasher=password_hasher)
+    allocator = BitmapPhoneNumberAllocator(group_repository=group_repo, sms_service=sms_service)
+    return create_app(APIHandlers(
+        validate_user=validate_user,
+        register_user=RegisterUserHandler(user_repository=user_repo, password_hasher=password_hasher),
+        login=LoginHandler(validate_user=validate_user, session_tokens=session_tokens),
+        authenticate_session=AuthenticateSessionHandler(user_repository=user_repo, session_tokens=session_tokens),
+        delete_user=DeleteUserHandler(user_repository=user_repo, group_repository=group_repo,
+                                      unit_of_work=unit_of_work, phone_number_allocator=allocator,
+                                      routing_cache=routing_cache),
+        create_new_group=CreateNewGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                               unit_of_work=unit_of_work, phone_number_allocator=allocator,
+                                               routing_cache=routing_cache),
+        find_groups=FindGroupsHandler(group_repository=group_repo),
+        find_group_summaries=FindGroupSummariesHandler(group_repository=group_repo),
+        join_group=JoinGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                    unit_of_work=unit_of_work, phone_number_allocator=allocator,
+                                    routing_cache=routing_cache),
+        leave_group=LeaveGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                      unit_of_work=unit_of_work, phone_number_allocator=allocator,
+                                      routing_cache=routing_cache),
+        accept_group_message=AcceptGroupMessageHandler(
+            send_group_message=SendGroupMessageHandler(group_repository=group_repo, user_repository=user_repo,
+                                                       sms_service=sms_service, routing_cache=routing_cache,
+                                                       phone_number_allocator=allocator),
+        ),
+        get_outbox_stats=GetOutboxStatsHandler(outbox=SQLiteSMSOutbox(pool=pool)),
+        get_routing_cache_stats=GetRoutingCacheStatsHandler(
+            routing_cache=routing_cache if routing_cache is not None else LRURoutingCache()
+        ),
+        get_phone_number_load=GetPhoneNumberLoadHandler(phone_number_allocator=allocator),
+    ))
@@ -0,0 +1,221 @@
+"""
+Load-test the whole application on one machine. The application runs in its own process with a temporary
+database seeded with groups, and sends its messages through the outbox to a local Twilio stand-in. The load
+generator posts incoming messages to /webhooks/twilio/sms at a target rate, as Twilio would, and waits for the
+stand-in to receive every message of the fan-out.
+
+It reports the latency of the webhook, the end-to-end latency until the first and the last member of the group
+get each message, and the fan-out throughput.
+
+Run it with:
+    python -m benchmarks.end_to_end --groups 4 --members 50 --rate 20 --duration 10
+    python -m benchmarks.end_to_end --error-rate 0.05 --throttle-rate 20
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from benchmarks.common import format_latencies
+from benchmarks.twilio_stand_in import TwilioStandIn
+from group_sms_chat.domain.user import HashedPassword, UserPassword
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+from group_sms_chat.infrastructure.twilio.rate_limiter import RateLimit
+
+HOST = "127.0.0.1"
+GROUP_NUMBERS = [f"+1555000{i:04d}" for i in range(10)]
+
+
+def member_phone_number(group: int, member: int) -> str:
+    return f"+1666{group:03d}{member:04d}"
+
+
+async def seed(file_path: str, groups: int, members: int) -> None:
+    """
+    Create the groups, each one with its own members, all of them using the same number for the group.
+    """
+    pool = SQLiteConnectionPool(file_path=file_path)
+    SQLiteUserRepository(pool=pool)
+    SQLiteGroupRepository(pool=pool)
+    hashed_password = str(HashedPassword.from_string(UserPassword(root="password123")))
+
+    def insert(connection: sqlite3.Connection) -> None:
+        connection.executemany(
+            "INSERT INTO users (username, phone_number, hashed_password) VALUES (?, ?, ?)",
+            [(f"user{g}-{m}", member_phone_number(g, m), hashed_password)
+             for g in range(groups) for m in range(members)]
+        )
+        connection.executemany(
+            "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
+            [(f"group{g}", f"user{g}-{m}", GROUP_NUMBERS[g % len(GROUP_NUMBERS)])
+             for g in range(groups) for m in range(members)]
+        )
+
+    await pool.write(insert)
+    pool.close()
+
+
+async def start_application(args: argparse.Namespace, file_path: str) -> asyncio.subprocess.Process:
+    env = {
+        **os.environ,
+        "DB_FILE_PATH": file_path,
+        "TWILIO_BASE_URL": f"http://{HOST}:{args.stand_in_port}",
+        "TWILIO_ACCOUNT_SID": "ACbenchmark",
+        "TWILIO_AUTH_TOKEN": "benchmark",
+        "TWILIO_PHONE_NUMBERS": ",".join(GROUP_NUMBERS[:min(args.groups, len(GROUP_NUMBERS))]),
+        "TWILIO_SEND_RATE": str(args.send_rate),
+        "TWILIO_SEND_BURST": str(args.send_burst),
+        "SMS_OUTBOX_WORKERS": str(args.outbox_workers),
+    }
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "group_sms_chat.app:app", "--host", HOST, "--port", str(args.app_port),
+        "--log-level", "warning", env=env,
+        stderr=None if args.verbose else asyncio.subprocess.DEVNULL,
+    )
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://{HOST}:{args.app_port}/health")
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+            else:
+                return process
+    process.terminate()
+    message = "The application did not start"
+    raise RuntimeError(message)
+
+
+@dataclass
+class Load:
+    started_at: float
+    # time.perf_counter() when each incoming message was posted, by body
+    sent_at: dict[str, float] = field(default_factory=dict)
+    webhook_latencies: list[float] = field(default_factory=list)
+    webhook_failures: int = 0
+
+
+async def generate_load(args: argparse.Namespace, client: httpx.AsyncClient) -> Load:
+    """
+    Post the incoming messages at the target rate, each one from the next member of the next group.
+    The requests do not wait for the previous ones, so a slow application does not lower the offered load.
+    """
+    senders = itertools.cycle([(g, m) for m in range(args.members) for g in range(args.groups)])
+    load = Load(started_at=time.perf_counter())
+
+    async def post(i: int) -> None:
+        group, member = next(senders)
+        body = f"load {i}"
+        start = load.sent_at[body] = time.perf_counter()
+        try:
+            response = await client.post("/webhooks/twilio/sms", data={
+                "From": member_phone_number(group, member),
+                "To": GROUP_NUMBERS[group % len(GROUP_NUMBERS)],
+                "Body": body,
+            })
+            response.raise_for_status()
+        except httpx.HTTPError:
+            load.webhook_failures += 1
+            return
+        load.webhook_latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    for i in range(int(args.rate * args.duration)):
+        await asyncio.sleep(max(load.started_at + i / args.rate - time.perf_counter(), 0))
+        tasks.append(asyncio.create_task(post(i)))
+    await asyncio.gather(*tasks)
+    return load
+
+
+def report(args: argparse.Namespace, stand_in: TwilioStandIn, load: Load) -> None:
+    recipients = args.members - 1
+    deliveries: dict[str, list[float]] = defaultdict(list)
+    for message in stand_in.received:
+        # The members get the message prefixed with the username of the sender
+        body = message.body.rpartition(": ")[2]
+        if body in load.sent_at:
+            deliveries[body].append(message.received_at)
+    first_delivery = [min(times) - load.sent_at[body] for body, times in deliveries.items()]
+    last_delivery = [max(times) - load.sent_at[body] for body, times in deliveries.items() if len(times) == recipients]
+    delivered = sum(len(times) for times in deliveries.values())
+    expected = (len(load.sent_at) - load.webhook_failures) * recipients
+    elapsed = max((max(times) for times in deliveries.values()), default=load.started_at) - load.started_at
+
+    print(f"{args.groups} groups of {args.members} members, {len(load.sent_at)} incoming messages "
+          f"at {args.rate}/s, stand-in latency {args.latency * 1000:.0f}ms")
+    print(format_latencies("webhook", load.webhook_latencies))
+    print(format_latencies("first member delivery", first_delivery))
+    print(format_latencies("last member delivery", last_delivery))
+    print(f"fan-out: {delivered}/{expected} messages received in {elapsed:.1f}s "
+          f"({delivered / elapsed if elapsed else 0:.1f} msg/s), "
+          f"{len(last_delivery)}/{len(load.sent_at)} incoming messages fully delivered")
+    print(f"stand-in: {stand_in.failed} failed with errors, {stand_in.throttled} throttled, "
+          f"{load.webhook_failures} webhook requests failed")
+
+
+async def run(args: argparse.Namespace) -> None:
+    throttle = RateLimit(rate=args.throttle_rate, burst=args.throttle_burst) if args.throttle_rate else None
+    stand_in = TwilioStandIn(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             throttle=throttle, seed=args.seed)
+    server = uvicorn.Server(uvicorn.Config(stand_in.app, host=HOST, port=args.stand_in_port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = str(Path(directory) / "group_sms_chat.db")
+        await seed(file_path, args.groups, args.members)
+        process = await start_application(args, file_path)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://{HOST}:{args.app_port}",
+                                         limits=httpx.Limits(max_connections=args.connections)) as client:
+                load = await generate_load(args, client)
+
+            expected = (len(load.sent_at) - load.webhook_failures) * (args.members - 1)
+            deadline = time.perf_counter() + args.drain_timeout
+            while len(stand_in.received) < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            process.terminate()
+            await process.wait()
+            server.should_exit = True
+            await server_task
+
+    report(args, stand_in, load)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--members", type=int, default=20, help="Members of each group")
+    parser.add_argument("--rate", type=float, default=10, help="Incoming messages per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds the load is generated")
+    parser.add_argument("--connections", type=int, default=50, help="Connections to the application")
+    parser.add_argument("--drain-timeout", type=float, default=60,
+                        help="Seconds to wait for the fan-out to finish after the load")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stand-in takes per message")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the messages the stand-in fails")
+    parser.add_argument("--throttle-rate", type=float, help="Messages per second the stand-in accepts per number")
+    parser.add_argument("--throttle-burst", type=int, default=1)
+    parser.add_argument("--seed", type=int, help="Seed of the stand-in errors and jitter")
+    parser.add_argument("--send-rate", type=float, default=1000, help="TWILIO_SEND_RATE of the application")
+    parser.add_argument("--send-burst", type=int, default=100, help="TWILIO_SEND_BURST of the application")
+    parser.add_argument("--outbox-workers", type=int, default=20, help="SMS_OUTBOX_WORKERS of the application")
+    parser.add_argument("--verbose", action="store_true", help="Show the errors logged by the application")
+    parser.add_argument("--app-port", type=int, default=9122)
+    parser.add_argument("--stand-in-port", type=int, default=9123)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Measure the latency of /health and the Twilio webhook while the database is busy with heavy writes.
+
+Run it with:
+    python -m benchmarks.event_loop_latency [--blocking]
+
+With --blocking the queries run directly on the event loop, as the repositories did before the connection
+pool was introduced, which makes it easy to compare both behaviours.
+"""
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import create_benchmark_app, format_latencies
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBER = "+15550000001"
+
+
+class BlockingConnectionPool(SQLiteConnectionPool):
+    """
+    Pool that runs every query on the calling thread, blocking the event loop.
+    """
+
+    async def read[T](self, query: Callable[[sqlite3.Connection], T]) -> T:
+        return self._run_read(query)
+
+    async def write[T](self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        return self._run_write(statements)
+
+
+async def seed(pool: SQLiteConnectionPool, members: int) -> None:
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    hashed_password = HashedPassword.from_string(UserPassword(root="password123"))
+
+    group = Group(name=GroupName(root="bench"))
+    for i in range(members):
+        user = User(username=Username(root=f"user{i}"), phone_number=PhoneNumber(root=f"+1666{i:07d}"),
+                    hashed_password=hashed_password)
+        await user_repo.add_user(user)
+        group.add_user(user.username, PhoneNumber(root=GROUP_NUMBER))
+    await group_repo.create_or_update_group(group)
+
+
+async def heavy_writes(pool: SQLiteConnectionPool, group_size: int) -> None:
+    group_repo = SQLiteGroupRepository(pool=pool)
+    group = Group(name=GroupName(root="churn"))
+    for i in range(group_size):
+        group.add_user(Username(root=f"churn{i}"), PhoneNumber(root=GROUP_NUMBER))
+    while True:
+        await group_repo.create_or_update_group(group)
+        # Let other tasks run even when the pool does not yield to the event loop
+        await asyncio.sleep(0)
+
+
+async def timed_request(client: httpx.AsyncClient, scheduled_at: float, samples: list[float],
+                        method: str, url: str, *, data: dict[str, str] | None = None) -> None:
+    await client.request(method, url, data=data)
+    samples.append(time.perf_counter() - scheduled_at)
+
+
+async def measure(client: httpx.AsyncClient, requests: int, interval: float) -> tuple[list[float], list[float]]:
+    """
+    Send requests at a fixed rate, measuring each latency from the moment the request should have been sent.
+    A blocked event loop therefore shows up as latency even if no request is in flight when it blocks.
+    """
+    health: list[float] = []
+    webhook: list[float] = []
+    tasks = []
+    start = time.perf_counter()
+    for i in range(requests):
+        scheduled_at = start + i * interval
+        await asyncio.sleep(max(scheduled_at - time.perf_counter(), 0))
+        tasks.append(asyncio.create_task(timed_request(client, scheduled_at, health, "GET", "/health")))
+        tasks.append(asyncio.create_task(timed_request(
+            client, scheduled_at, webhook, "POST", "/webhooks/twilio/sms",
+            data={"From": "+16660000000", "To": GROUP_NUMBER, "Body": "hello"})))
+    await asyncio.gather(*tasks)
+    return health, webhook
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        pool_class = BlockingConnectionPool if args.blocking else SQLiteConnectionPool
+        pool = pool_class(file_path=str(Path(directory) / "bench.db"), readers=args.readers)
+        app = create_benchmark_app(pool, FakeSMSService(phone_numbers=[GROUP_NUMBER]))
+        await seed(pool, args.members)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            health, webhook = await measure(client, args.requests, args.interval)
+            print(format_latencies("idle /health", health))
+            print(format_latencies("idle webhook", webhook))
+
+            writer = asyncio.create_task(heavy_writes(pool, args.write_group_size))
+            await asyncio.sleep(0.1)
+            health, webhook = await measure(client, args.requests, args.interval)
+            writer.cancel()
+            print(format_latencies("under writes /health", health))
+            print(format_latencies("under writes webhook", webhook))
+
+        pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and phase")
+    parser.add_argument("--interval", type=float, default=0.005, help="Seconds between requests")
+    parser.add_argument("--members", type=int, default=10, help="Members of the group targeted by the webhook")
+    parser.add_argument("--write-group-size", type=int, default=5000,
+                        help="Members rewritten by each heavy write")
+    parser.add_argument("--readers", type=int, default=4, help="Reader connections of the pool")
+    parser.add_argument("--blocking", action="store_true", help="Run the queries on the event loop")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure how long SendGroupMessageHandler takes to deliver a message depending on the group size and the
+fan-out concurrency, using a fake SMS service with a fixed latency per message.
+
+Run it with:
+    python -m benchmarks.fan_out
+"""
+import argparse
+import asyncio
+import time
+
+from group_sms_chat.application.send_group_message_handler import SendGroupMessageHandler
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBER = "+15550000001"
+
+
+async def create_group(pool: SQLiteConnectionPool, members: int) -> None:
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    hashed_password = HashedPassword.from_string(UserPassword(root="password123"))
+
+    group = Group(name=GroupName(root="bench"))
+    for i in range(members):
+        user = User(username=Username(root=f"user{i}"), phone_number=PhoneNumber(root=f"+1666{i:07d}"),
+                    hashed_password=hashed_password)
+        await user_repo.add_user(user)
+        group.add_user(user.username, PhoneNumber(root=GROUP_NUMBER))
+    await group_repo.create_or_update_group(group)
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{'members':>8} {'concurrency':>12} {'elapsed':>10} {'msg/s':>10}")
+    for members in args.group_sizes:
+        pool = SQLiteConnectionPool(file_path=":memory:")
+        await create_group(pool, members)
+        for concurrency in args.concurrency:
+            sms_service = FakeSMSService(phone_numbers=[GROUP_NUMBER], latency=args.latency)
+            handler = SendGroupMessageHandler(user_repository=SQLiteUserRepository(pool=pool),
+                                              group_repository=SQLiteGroupRepository(pool=pool),
+                                              sms_service=sms_service,
+                                              max_concurrency=concurrency)
+            start = time.perf_counter()
+            result = await handler.handle(PhoneNumber(root="+16660000000"), PhoneNumber(root=GROUP_NUMBER), "hi")
+            elapsed = time.perf_counter() - start
+            print(f"{members:>8} {concurrency:>12} {elapsed:>9.3f}s {result.sent / elapsed:>10.1f}")
+        pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake provider takes per SMS")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare the memory and the membership operations of a large group between the former set of pydantic members,
+reproduced here, and the current members indexed by username.
+
+Run it with:
+    python -m benchmarks.group_memory
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+
+from pydantic import BaseModel, Field
+
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+
+class LegacyGroupUser(BaseModel):
+    username: Username
+    user_group_phone_number: PhoneNumber
+
+    def __hash__(self) -> int:
+        return hash(str(self.username) + str(self.user_group_phone_number))
+
+
+class LegacyGroup(BaseModel):
+    name: GroupName
+    users: set[LegacyGroupUser] = Field(default_factory=set)
+
+    def get_user_phone_number(self, username: Username) -> PhoneNumber | None:
+        for user in self.users:
+            if user.username == username:
+                return user.user_group_phone_number
+        return None
+
+    def add_user(self, user: Username, phone_number: PhoneNumber) -> None:
+        self.users.add(LegacyGroupUser(username=user, user_group_phone_number=phone_number))
+
+    def remove_user(self, username: Username) -> None:
+        self.users = {user for user in self.users if user.username != username}
+
+
+def build(group_class: type[Group] | type[LegacyGroup], members: int) -> Group | LegacyGroup:
+    group = group_class(name=GroupName(root="large-group"))
+    for i in range(members):
+        # Every member gets its own objects, as when the group is read from the database
+        group.add_user(Username(root=f"user{i}"), PhoneNumber(root=f"+1555000{i % 10:04d}"))
+    return group
+
+
+def measure_memory(create: Callable[[], Group | LegacyGroup]) -> tuple[int, Group | LegacyGroup]:
+    gc.collect()
+    tracemalloc.start()
+    created = create()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, created
+
+
+def measure_time(repeat: int, operation: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(args: argparse.Namespace) -> None:
+    print(f"Group with {args.members} members")
+    for label, group_class in (("set of pydantic members", LegacyGroup), ("members by username", Group)):
+        size, group = measure_memory(partial(build, group_class, args.members))
+        last = Username(root=f"user{args.members - 1}")
+        lookup = measure_time(args.repeat, partial(group.get_user_phone_number, last))
+
+        def remove_and_add(group: Group | LegacyGroup = group, last: Username = last) -> None:
+            group.remove_user(last)
+            group.add_user(last, PhoneNumber(root="+15550000001"))
+
+        change = measure_time(args.repeat, remove_and_add)
+        print(f"  {label:<24} {size / args.members:6.0f} bytes/member  {size / 1e6:6.1f} MB  "
+              f"lookup {lookup * 1e6:9.2f}us  leave and join {change * 1e6:9.2f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=100)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure how long searching groups by name takes with many groups, comparing the former scan of every membership
+row with the indexed search of the groups table, with and without loading the members.
+
+Run it with:
+    python -m benchmarks.group_search
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+from benchmarks.common import format_latencies
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+
+WORDS = ["alpha", "bravo", "chess", "delta", "echo", "forest", "golf", "hiking", "jazz", "kayak", "lima", "music"]
+
+
+def group_names(count: int) -> list[str]:
+    rng = random.Random(42)
+    return [f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}" for i in range(count)]
+
+
+async def populate(pool: SQLiteConnectionPool, groups: int, members: int) -> None:
+    rows = [(name, f"user{i}", "+15550000001") for name in group_names(groups) for i in range(members)]
+
+    def insert(connection: sqlite3.Connection) -> None:
+        connection.executemany(
+            "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)", rows
+        )
+
+    await pool.write(insert)
+
+
+async def measure(repeat: int, search: Callable[[], Awaitable[object]]) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await search()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run(args: argparse.Namespace) -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    repo = SQLiteGroupRepository(pool=pool)
+    start = time.perf_counter()
+    await populate(pool, args.groups, args.members)
+    print(f"Created {args.groups} groups with {args.members} members each in {time.perf_counter() - start:.1f}s\n")
+
+    for query in args.queries:
+        name = GroupName(root=query)
+
+        def legacy_scan(connection: sqlite3.Connection, pattern: str = f"%{query}%") -> list[tuple[str, str, str]]:
+            # The query used before the groups table existed
+            return connection.execute(
+                "SELECT group_name, username, user_group_phone_number "
+                "FROM group_users WHERE LOWER(group_name) LIKE ?", (pattern,)
+            ).fetchall()
+
+        matches = len(await repo.find_group_summaries_by_name(name))
+        print(f"'{query}' matches {matches} groups")
+        print(format_latencies("  membership scan", await measure(args.repeat, partial(pool.read, legacy_scan))))
+        print(format_latencies(f"  groups, limit {args.limit}", await measure(
+            args.repeat, partial(repo.find_groups_by_name, name, limit=args.limit))))
+        print(format_latencies(f"  summaries, limit {args.limit}", await measure(
+            args.repeat, partial(repo.find_group_summaries_by_name, name, limit=args.limit))))
+    pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=100_000)
+    parser.add_argument("--members", type=int, default=5, help="Members of each group")
+    parser.add_argument("--queries", nargs="+", default=["chess-jazz", "kayak", "-99999"])
+    parser.add_argument("--limit", type=int, default=50, help="Page size of the indexed searches")
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
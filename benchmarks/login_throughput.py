@@ -0,0 +1,90 @@
+"""
+Measure the login throughput and the event loop latency while users log in concurrently,
+for several scrypt work factors.
+
+Run it with:
+    python -m benchmarks.login_throughput [--inline]
+
+With --inline the passwords are hashed directly on the event loop, which shows how long every login
+would stall the other requests without the dedicated executor.
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
+
+from benchmarks.common import format_latencies
+from group_sms_chat.application.login_handler import LoginHandler
+from group_sms_chat.application.register_user_handler import RegisterUserHandler
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.user import PhoneNumber, Username, UserPassword
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+PASSWORD = UserPassword(root="password123")
+
+
+class InlineScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Hasher that derives the keys on the calling thread, blocking the event loop.
+    """
+
+    async def _derive(self, password: UserPassword, salt: bytes, cost: int, block_size: int,
+                      parallelization: int) -> bytes:
+        n = 2 ** cost
+        return hashlib.scrypt(str(password).encode("utf-8"), salt=salt, n=n, r=block_size, p=parallelization,
+                              maxmem=256 * n * block_size, dklen=32)
+
+
+async def probe_event_loop(lags: list[float], interval: float = 0.005) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(args: argparse.Namespace) -> None:
+    hasher_class: Callable[..., ScryptPasswordHasher] = InlineScryptPasswordHasher if args.inline \
+        else ScryptPasswordHasher
+
+    for cost in args.costs:
+        hasher = hasher_class(cost=cost, max_concurrency=args.max_concurrency)
+        pool = SQLiteConnectionPool(file_path=":memory:")
+        user_repo = SQLiteUserRepository(pool=pool)
+        register = RegisterUserHandler(user_repository=user_repo, password_hasher=hasher)
+        login = LoginHandler(validate_user=ValidateUserPasswordHandler(user_repository=user_repo,
+                                                                       password_hasher=hasher),
+                             session_tokens=HMACSessionTokens(secret="benchmark"))
+        usernames = [Username(root=f"user{i}") for i in range(args.users)]
+        for i, username in enumerate(usernames):
+            await register.handle(username, PhoneNumber(root=f"+1666{i:07d}"), PASSWORD)
+
+        lags: list[float] = []
+        probe = asyncio.create_task(probe_event_loop(lags))
+        start = time.perf_counter()
+        await asyncio.gather(*(login.handle(usernames[i % args.users], PASSWORD) for i in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        probe.cancel()
+
+        print(f"cost={cost:<3} {args.logins / elapsed:8.1f} logins/s   "
+              + format_latencies("event loop lag", lags))
+        await hasher.stop()
+        pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 12, 14, 15],
+                        help="Base 2 logarithms of the scrypt cost")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=50, help="Logins started at the same time")
+    parser.add_argument("--max-concurrency", type=int, default=2, help="Passwords hashed at the same time")
+    parser.add_argument("--inline", action="store_true", help="Hash the passwords on the event loop")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
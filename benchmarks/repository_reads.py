@@ -0,0 +1,128 @@
+"""
+Measure the cost per row of reading groups and message routes from SQLite, comparing the former construction of
+a model for every value, reproduced here, with the current trusted members and JSON routes.
+
+Run it with:
+    python -m benchmarks.repository_reads
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable
+
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.message_route import MessageRecipient, MessageRoute
+from group_sms_chat.domain.user import PhoneNumber, Username
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBERS = [f"+1555000000{i}" for i in range(5)]
+
+
+def validated_group(connection: sqlite3.Connection, name: str) -> Group:
+    group = Group(name=GroupName(root=name))
+    for username, user_group_phone_number in connection.execute(
+            "SELECT username, user_group_phone_number FROM group_users WHERE group_name = ?", (name,)):
+        group.add_user(user=Username(root=username), phone_number=PhoneNumber(root=user_group_phone_number))
+    return group
+
+
+def validated_groups(connection: sqlite3.Connection, pattern: str) -> list[Group]:
+    groups: dict[str, Group] = {}
+    for group_name, username, user_group_phone_number in connection.execute(
+            "SELECT group_name, username, user_group_phone_number FROM group_users "
+            "WHERE group_name IN (SELECT name FROM groups WHERE name LIKE ?)", (pattern,)):
+        if group_name not in groups:
+            groups[group_name] = Group(name=GroupName(root=group_name))
+        groups[group_name].add_user(user=Username(root=username),
+                                    phone_number=PhoneNumber(root=user_group_phone_number))
+    return list(groups.values())
+
+
+def validated_route(connection: sqlite3.Connection, user_phone_number: str, group_phone_number: str) -> MessageRoute:
+    rows = connection.execute(
+        "SELECT route.username, route.group_name, "
+        "       member.username, recipient.phone_number, member.user_group_phone_number "
+        "FROM group_routes AS route "
+        "LEFT JOIN group_users AS member "
+        "    ON member.group_name = route.group_name AND member.username != route.username "
+        "LEFT JOIN users AS recipient ON recipient.username = member.username "
+        "WHERE route.phone_number = ? AND route.group_phone_number = ?",
+        (user_phone_number, group_phone_number)
+    ).fetchall()
+    return MessageRoute(
+        sender=Username(root=rows[0][0]),
+        group_name=GroupName(root=rows[0][1]),
+        recipients=[
+            MessageRecipient(
+                username=Username(root=username),
+                phone_number=PhoneNumber(root=phone_number) if phone_number is not None else None,
+                group_phone_number=PhoneNumber(root=user_group_phone_number),
+            )
+            for _, _, username, phone_number, user_group_phone_number in rows
+            if username is not None
+        ]
+    )
+
+
+async def populate(pool: SQLiteConnectionPool, members: int, groups: int, group_size: int) -> None:
+    def insert(connection: sqlite3.Connection) -> None:
+        connection.executemany("INSERT INTO users (username, phone_number) VALUES (?, ?)",
+                               [(f"user{i}", f"+1666{i:07d}") for i in range(max(members, group_size))])
+        connection.executemany(
+            "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
+            [("large-group", f"user{i}", GROUP_NUMBERS[i % len(GROUP_NUMBERS)]) for i in range(members)]
+            + [(f"small-group-{g}", f"user{i}", GROUP_NUMBERS[i % len(GROUP_NUMBERS)])
+               for g in range(groups) for i in range(group_size)]
+        )
+
+    await pool.write(insert)
+
+
+async def measure(repeat: int, rows: int, read: Callable[[], Awaitable[object]]) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await read()
+    return (time.perf_counter() - start) / repeat / rows * 1e6
+
+
+async def run(args: argparse.Namespace) -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    repo = SQLiteGroupRepository(pool=pool)
+    SQLiteUserRepository(pool=pool)
+    await populate(pool, args.members, args.groups, args.group_size)
+    large = GroupName(root="large-group")
+    small = GroupName(root="small-group")
+    cases: list[tuple[str, int, Callable[[], Awaitable[object]], Callable[[], Awaitable[object]]]] = [
+        ("get_group", args.members,
+         lambda: pool.read(lambda c: validated_group(c, "large-group")),
+         lambda: repo.get_group(large)),
+        ("find_groups_by_name", args.groups * args.group_size,
+         lambda: pool.read(lambda c: validated_groups(c, "small-group%")),
+         lambda: repo.find_groups_by_name(small)),
+        ("get_message_route", args.members - 1,
+         lambda: pool.read(lambda c: validated_route(c, "+16660000000", GROUP_NUMBERS[0])),
+         lambda: repo.get_message_route(PhoneNumber(root="+16660000000"), PhoneNumber(root=GROUP_NUMBERS[0]))),
+    ]
+
+    print(f"{'':<20} {'validated':>12} {'current':>12}")
+    for name, rows, former, current in cases:
+        former_cost = await measure(args.repeat, rows, former)
+        current_cost = await measure(args.repeat, rows, current)
+        print(f"{name:<20} {former_cost:9.2f} us {current_cost:9.2f} us per row")
+    pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10_000, help="Members of the large group")
+    parser.add_argument("--groups", type=int, default=200, help="Small groups found by name")
+    parser.add_argument("--group-size", type=int, default=20, help="Members of each small group")
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
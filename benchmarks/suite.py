@@ -0,0 +1,435 @@
+"""
+Run the micro-benchmarks of the application handlers, the SQLite repositories and the domain models against
+the real SQLite repositories and an in-memory fake SMS service. Every benchmark runs for each group size and
+dataset size it depends on. The results can be stored as JSON and compared with a saved baseline, failing when
+a benchmark is slower than the baseline by more than a threshold.
+
+Run it with:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import percentile
+from group_sms_chat.application.authenticate_session_handler import AuthenticateSessionHandler
+from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.application.delete_user_handler import DeleteUserHandler
+from group_sms_chat.application.find_group_summaries_handler import FindGroupSummariesHandler
+from group_sms_chat.application.find_groups_handler import FindGroupsHandler
+from group_sms_chat.application.join_group_handler import JoinGroupHandler
+from group_sms_chat.application.leave_group_handler import LeaveGroupHandler
+from group_sms_chat.application.login_handler import LoginHandler
+from group_sms_chat.application.register_user_handler import RegisterUserHandler
+from group_sms_chat.application.send_group_message_handler import SendGroupMessageHandler
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.cache.routing_cache import LRURoutingCache
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBERS = [f"+1555000{i:04d}" for i in range(10)]
+BENCH_GROUP = GroupName(root="bench-group")
+PASSWORD = UserPassword(root="password123")
+# Low enough for the login benchmarks to measure the handlers rather than scrypt, see benchmarks.login_throughput
+PASSWORD_HASH_COST = 8
+
+type Operation = Callable[[], Awaitable[object]]
+
+
+def username(i: int) -> Username:
+    return Username(root=f"user{i}")
+
+
+def user_phone_number(i: int) -> PhoneNumber:
+    return PhoneNumber(root=f"+1666{i:07d}")
+
+
+@dataclass
+class Fixture:
+    """
+    Database with dataset_size users, each of them in a small group of three, and a group of the first
+    group_size users, with the collaborators the handlers are built with.
+    """
+
+    group_size: int
+    dataset_size: int
+    pool: SQLiteConnectionPool
+    user_repo: SQLiteUserRepository
+    group_repo: SQLiteGroupRepository
+    sms_service: FakeSMSService
+    password_hasher: ScryptPasswordHasher
+    users: list[User]
+    counter: "itertools.count[int]" = field(default_factory=itertools.count)
+
+    def unit_of_work(self) -> SQLiteUnitOfWork:
+        return SQLiteUnitOfWork(pool=self.pool)
+
+    def allocator(self) -> BitmapPhoneNumberAllocator:
+        return BitmapPhoneNumberAllocator(group_repository=self.group_repo, sms_service=self.sms_service)
+
+
+async def create_fixture(group_size: int, dataset_size: int) -> Fixture:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    password_hasher = ScryptPasswordHasher(cost=PASSWORD_HASH_COST)
+    hashed_password = await password_hasher.hash(PASSWORD)
+    users = [User(username=username(i), phone_number=user_phone_number(i), hashed_password=hashed_password)
+             for i in range(max(group_size, dataset_size))]
+
+    def insert(connection: sqlite3.Connection) -> None:
+        connection.executemany("INSERT INTO users (username, phone_number, hashed_password) VALUES (?, ?, ?)",
+                               [(str(u.username), str(u.phone_number), str(u.hashed_password)) for u in users])
+        connection.executemany(
+            "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
+            [(f"group-{i // 3}", f"user{i}", GROUP_NUMBERS[1]) for i in range(dataset_size)]
+            + [(str(BENCH_GROUP), f"user{i}", GROUP_NUMBERS[0]) for i in range(group_size)]
+        )
+
+    await pool.write(insert)
+    return Fixture(group_size=group_size, dataset_size=dataset_size, pool=pool, user_repo=user_repo,
+                   group_repo=group_repo, sms_service=FakeSMSService(phone_numbers=GROUP_NUMBERS),
+                   password_hasher=password_hasher, users=users)
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # The sizes of the fixture the benchmark depends on, among "group_size" and "dataset_size"
+    parameters: tuple[str, ...]
+    setup: Callable[[Fixture], Awaitable[Operation]]
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(*parameters: str) -> Callable[[Callable[[Fixture], Awaitable[Operation]]],
+                                             Callable[[Fixture], Awaitable[Operation]]]:
+    """
+    Register a benchmark. The decorated function prepares the fixture and returns the operation to measure,
+    which must be repeatable any number of times.
+    """
+    def register(setup: Callable[[Fixture], Awaitable[Operation]]) -> Callable[[Fixture], Awaitable[Operation]]:
+        BENCHMARKS[setup.__name__] = Benchmark(name=setup.__name__, parameters=parameters, setup=setup)
+        return setup
+
+    return register
+
+
+@benchmark()
+async def hashed_password_from_string(_: Fixture) -> Operation:
+    async def operation() -> object:
+        return HashedPassword.from_string(PASSWORD)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def register_user(fixture: Fixture) -> Operation:
+    handler = RegisterUserHandler(user_repository=fixture.user_repo, password_hasher=fixture.password_hasher)
+
+    async def operation() -> object:
+        i = fixture.dataset_size + fixture.group_size + next(fixture.counter)
+        return await handler.handle(username(i), user_phone_number(i), PASSWORD)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def login(fixture: Fixture) -> Operation:
+    validate_user = ValidateUserPasswordHandler(user_repository=fixture.user_repo,
+                                                password_hasher=fixture.password_hasher)
+    handler = LoginHandler(validate_user=validate_user, session_tokens=HMACSessionTokens(secret="benchmark"))
+
+    async def operation() -> object:
+        return await handler.handle(fixture.users[-1].username, PASSWORD)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def authenticate_session(fixture: Fixture) -> Operation:
+    session_tokens = HMACSessionTokens(secret="benchmark")
+    handler = AuthenticateSessionHandler(user_repository=fixture.user_repo, session_tokens=session_tokens)
+    token = session_tokens.issue(fixture.users[-1]).token
+
+    async def operation() -> object:
+        return await handler.handle(token)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def delete_user(fixture: Fixture) -> Operation:
+    allocator = fixture.allocator()
+    handler = DeleteUserHandler(user_repository=fixture.user_repo, group_repository=fixture.group_repo,
+                                unit_of_work=fixture.unit_of_work(), phone_number_allocator=allocator)
+
+    async def operation() -> None:
+        # The user is added again through the repository, so only the deletion goes through a handler
+        i = fixture.dataset_size + fixture.group_size + next(fixture.counter)
+        user = User(username=username(i), phone_number=user_phone_number(i),
+                    hashed_password=fixture.users[0].hashed_password)
+        await fixture.user_repo.add_user(user)
+        await fixture.group_repo.add_member(BENCH_GROUP, user.username, PhoneNumber(root=GROUP_NUMBERS[0]))
+        await handler.handle(user)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def create_new_group(fixture: Fixture) -> Operation:
+    allocator = fixture.allocator()
+    handler = CreateNewGroupHandler(group_repository=fixture.group_repo, sms_service=fixture.sms_service,
+                                    unit_of_work=fixture.unit_of_work(), phone_number_allocator=allocator)
+
+    async def operation() -> None:
+        # The creator is removed again through the repository, so the operation can be repeated without running
+        # out of numbers and only the creation goes through a handler
+        i = next(fixture.counter)
+        group_name, user = GroupName(root=f"new-{i}"), fixture.users[i % fixture.dataset_size]
+        group = await handler.handle(group_name, user)
+        await fixture.group_repo.remove_member(group_name, user.username)
+        for member in group.users:
+            allocator.release(user.username, member.user_group_phone_number)
+
+    return operation
+
+
+@benchmark("group_size", "dataset_size")
+async def join_and_leave_group(fixture: Fixture) -> Operation:
+    allocator = fixture.allocator()
+    join = JoinGroupHandler(group_repository=fixture.group_repo, sms_service=fixture.sms_service,
+                            unit_of_work=fixture.unit_of_work(), phone_number_allocator=allocator)
+    leave = LeaveGroupHandler(group_repository=fixture.group_repo, sms_service=fixture.sms_service,
+                              unit_of_work=fixture.unit_of_work(), phone_number_allocator=allocator)
+    # The last user of the dataset is not in the group of group_size users, unless both sizes are equal
+    user = fixture.users[-1]
+    if fixture.group_size == len(fixture.users):
+        await leave.handle(BENCH_GROUP, user)
+
+    async def operation() -> None:
+        await join.handle(BENCH_GROUP, user)
+        await leave.handle(BENCH_GROUP, user)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def find_groups(fixture: Fixture) -> Operation:
+    handler = FindGroupsHandler(group_repository=fixture.group_repo)
+
+    async def operation() -> object:
+        return await handler.handle(GroupName(root="group-1"), limit=50)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def find_group_summaries(fixture: Fixture) -> Operation:
+    handler = FindGroupSummariesHandler(group_repository=fixture.group_repo)
+
+    async def operation() -> object:
+        return await handler.handle(GroupName(root="group-1"), limit=50)
+
+    return operation
+
+
+@benchmark("dataset_size")
+async def find_groups_by_name(fixture: Fixture) -> Operation:
+    async def operation() -> object:
+        # Without a limit, like the search did before it was paginated
+        return await fixture.group_repo.find_groups_by_name(GroupName(root="group-1"))
+
+    return operation
+
+
+@benchmark("group_size")
+async def get_group(fixture: Fixture) -> Operation:
+    async def operation() -> object:
+        return await fixture.group_repo.get_group(BENCH_GROUP)
+
+    return operation
+
+
+@benchmark("group_size")
+async def get_message_route(fixture: Fixture) -> Operation:
+    user_number, group_number = user_phone_number(0), PhoneNumber(root=GROUP_NUMBERS[0])
+
+    async def operation() -> object:
+        return await fixture.group_repo.get_message_route(user_number, group_number)
+
+    return operation
+
+
+@benchmark("group_size")
+async def send_group_message(fixture: Fixture) -> Operation:
+    handler = SendGroupMessageHandler(user_repository=fixture.user_repo, group_repository=fixture.group_repo,
+                                      sms_service=fixture.sms_service)
+    user_number, group_number = user_phone_number(0), PhoneNumber(root=GROUP_NUMBERS[0])
+
+    async def operation() -> object:
+        result = await handler.handle(user_number, group_number, "hello")
+        fixture.sms_service.sent_messages.clear()
+        return result
+
+    return operation
+
+
+@benchmark("group_size")
+async def send_group_message_cached(fixture: Fixture) -> Operation:
+    handler = SendGroupMessageHandler(user_repository=fixture.user_repo, group_repository=fixture.group_repo,
+                                      sms_service=fixture.sms_service, routing_cache=LRURoutingCache())
+    user_number, group_number = user_phone_number(0), PhoneNumber(root=GROUP_NUMBERS[0])
+
+    async def operation() -> object:
+        result = await handler.handle(user_number, group_number, "hello")
+        fixture.sms_service.sent_messages.clear()
+        return result
+
+    return operation
+
+
+async def measure(operation: Operation, repeat: int, min_sample_time: float) -> list[float]:
+    """
+    Time the operation. Fast operations are run several times in each sample, so every sample takes at least
+    min_sample_time seconds and the timer resolution does not matter.
+
+    :return: The seconds each call took, one value for each sample.
+    """
+    start = time.perf_counter()
+    await operation()
+    first = time.perf_counter() - start
+    number = min(max(math.ceil(min_sample_time / first), 1), 1000) if first > 0 else 1000
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def result_name(name: str, parameters: dict[str, int]) -> str:
+    if not parameters:
+        return name
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(parameters.items())) + "]"
+
+
+async def run_benchmarks(args: argparse.Namespace) -> list[dict[str, Any]]:
+    selected = [b for b in BENCHMARKS.values() if not args.filter or any(f in b.name for f in args.filter)]
+    results: list[dict[str, Any]] = []
+    done = set()
+    for group_size, dataset_size in itertools.product(args.group_sizes, args.dataset_sizes):
+        sizes = {"group_size": group_size, "dataset_size": dataset_size}
+        pending = []
+        for bench in selected:
+            parameters = {name: sizes[name] for name in bench.parameters}
+            name = result_name(bench.name, parameters)
+            if name not in done:
+                done.add(name)
+                pending.append((bench, name, parameters))
+        if not pending:
+            continue
+
+        fixture = await create_fixture(group_size, dataset_size)
+        for bench, name, parameters in pending:
+            samples = await measure(await bench.setup(fixture), args.repeat, args.min_sample_time)
+            median, p95 = statistics.median(samples), percentile(samples, 95)
+            results.append({
+                "name": name,
+                "benchmark": bench.name,
+                "parameters": parameters,
+                "samples": len(samples),
+                "median": median,
+                "p95": p95,
+                "min": min(samples),
+            })
+            print(f"{name:<64} median={median * 1000:10.3f}ms  p95={p95 * 1000:10.3f}ms", flush=True)
+        fixture.pool.close()
+        await fixture.password_hasher.stop()
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float) -> list[str]:
+    """
+    Compare the medians of the results with the ones of the baseline.
+
+    :return: The names of the benchmarks that are slower than the baseline by more than the threshold.
+    """
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+    print(f"\n{'benchmark':<64} {'baseline':>12} {'current':>12} {'change':>8}")
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            print(f"{result['name']:<64} {'':>12} {result['median'] * 1000:10.3f}ms {'new':>8}")
+            continue
+        change = result["median"] / before["median"] - 1
+        status = ""
+        if change > threshold:
+            regressions.append(result["name"])
+            status = "  REGRESSION"
+        print(f"{result['name']:<64} {before['median'] * 1000:10.3f}ms {result['median'] * 1000:10.3f}ms "
+              f"{change:+8.1%}{status}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--dataset-sizes", type=int, nargs="+", default=[1000, 20_000])
+    parser.add_argument("--filter", nargs="+", help="Run only the benchmarks whose name contains any of these")
+    parser.add_argument("--repeat", type=int, default=15, help="Samples of each benchmark")
+    parser.add_argument("--min-sample-time", type=float, default=0.01, help="Minimum seconds of each sample")
+    parser.add_argument("--output", type=Path, help="File where the results are stored as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown of the median over the baseline that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for bench in BENCHMARKS.values():
+            print(f"{bench.name:<32} {', '.join(bench.parameters)}")
+        return
+
+    results = asyncio.run(run_benchmarks(args))
+    if args.output is not None:
+        args.output.write_text(json.dumps({
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, indent=2))
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmarks are more than {args.threshold:.0%} slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local stand-in for the Twilio Messages API, to load-test the application without sending real SMS messages.
+Every message takes a configurable latency to be accepted, a share of them fail with a server error, and the
+messages sent from a phone number above a rate are rejected with 429 Too Many Requests, like Twilio does.
+
+Run it with:
+    python -m benchmarks.twilio_stand_in --port 9023 --latency 0.05 --error-rate 0.01 --throttle-rate 10
+
+and start the application with TWILIO_BASE_URL=http://127.0.0.1:9023.
+"""
+import argparse
+import asyncio
+import random
+import time
+import urllib.parse
+import uuid
+from dataclasses import dataclass
+from http import HTTPStatus
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from group_sms_chat.infrastructure.twilio.rate_limiter import RateLimit, TokenBucket
+
+
+@dataclass(frozen=True)
+class ReceivedMessage:
+    from_phone_number: str
+    to_phone_number: str
+    body: str
+    # time.perf_counter() when the message was accepted
+    received_at: float
+
+
+class TwilioStandIn:
+    """
+    Fake of the Twilio Messages API that keeps the accepted messages in memory.
+    """
+
+    def __init__(self, *, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle: RateLimit | None = None, seed: int | None = None) -> None:
+        """
+        Initialize the TwilioStandIn.
+
+        :param latency: Seconds each request takes to be answered.
+        :param jitter: Maximum seconds added at random to the latency of each request.
+        :param error_rate: Share of the requests, between 0 and 1, answered with 500 Internal Server Error.
+        :param throttle: Rate and burst of the messages accepted from each phone number. The messages above it
+            are answered with 429 Too Many Requests. There is no limit when it is None.
+        :param seed: Seed of the random errors and jitter, to repeat a run.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle = throttle
+        self.random = random.Random(seed)
+        self.received: list[ReceivedMessage] = []
+        self.failed = 0
+        self.throttled = 0
+        self._buckets: dict[str, TokenBucket] = {}
+        self.app = self._create_app()
+
+    def _is_throttled(self, from_phone_number: str) -> bool:
+        if self.throttle is None:
+            return False
+        now = time.monotonic()
+        bucket = self._buckets.get(from_phone_number)
+        if bucket is None:
+            bucket = self._buckets[from_phone_number] = TokenBucket(self.throttle, now)
+        bucket.refill(now)
+        if bucket.tokens < 1:
+            return True
+        bucket.tokens -= 1
+        return False
+
+    async def create_message(self, account_sid: str, form: dict[str, str]) -> JSONResponse:
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+        from_phone_number, to_phone_number, body = form.get("From", ""), form.get("To", ""), form.get("Body", "")
+        if self._is_throttled(from_phone_number):
+            self.throttled += 1
+            return twilio_error(HTTPStatus.TOO_MANY_REQUESTS, code=20429)
+        if self.random.random() < self.error_rate:
+            self.failed += 1
+            return twilio_error(HTTPStatus.INTERNAL_SERVER_ERROR, code=20500)
+
+        self.received.append(ReceivedMessage(from_phone_number=from_phone_number, to_phone_number=to_phone_number,
+                                             body=body, received_at=time.perf_counter()))
+        return JSONResponse(status_code=HTTPStatus.CREATED, content={
+            "sid": f"SM{uuid.uuid4().hex}",
+            "account_sid": account_sid,
+            "from": from_phone_number,
+            "to": to_phone_number,
+            "body": body,
+            "status": "queued",
+        })
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Twilio stand-in")
+
+        @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+        async def create_message(account_sid: str, request: Request) -> JSONResponse:
+            form = dict(urllib.parse.parse_qsl((await request.body()).decode("utf-8")))
+            return await self.create_message(account_sid, form)
+
+        @app.get("/stats")
+        async def stats() -> dict[str, int]:
+            return {"received": len(self.received), "failed": self.failed, "throttled": self.throttled}
+
+        return app
+
+
+def twilio_error(status: HTTPStatus, code: int) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"code": code, "message": status.phrase, "status": status})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9023)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each message takes to be accepted")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the messages that fail")
+    parser.add_argument("--throttle-rate", type=float, help="Messages per second accepted from each number")
+    parser.add_argument("--throttle-burst", type=int, default=1, help="Messages each number can send in a burst")
+    args = parser.parse_args()
+
+    throttle = RateLimit(rate=args.throttle_rate, burst=args.throttle_burst) if args.throttle_rate else None
+    stand_in = TwilioStandIn(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             throttle=throttle)
+    uvicorn.run(stand_in.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,82 @@
+import dataclasses
+import logging
 import os
+import secrets
 import urllib.parse
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
 from dataclasses import dataclass
+from functools import partial
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Any
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import ValidationError
 
+from group_sms_chat.application.accept_group_message_handler import AcceptedGroupMessage, AcceptGroupMessageHandler
+from group_sms_chat.application.authenticate_session_handler import AuthenticateSessionHandler
 from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.application.delete_user_handler import DeleteUserHandler
+from group_sms_chat.application.find_group_summaries_handler import FindGroupSummariesHandler
 from group_sms_chat.application.find_groups_handler import FindGroupsHandler
+from group_sms_chat.application.get_outbox_stats_handler import GetOutboxStatsHandler
+from group_sms_chat.application.get_phone_number_load_handler import GetPhoneNumberLoadHandler
+from group_sms_chat.application.get_routing_cache_stats_handler import GetRoutingCacheStatsHandler
+from group_sms_chat.application.group_message_coalescer import GroupMessageCoalescer
 from group_sms_chat.application.join_group_handler import JoinGroupHandler
 from group_sms_chat.application.leave_group_handler import LeaveGroupHandler
+from group_sms_chat.application.login_handler import LoginHandler
 from group_sms_chat.application.register_user_handler import RegisterUserHandler
 from group_sms_chat.application.send_group_message_handler import SendGroupMessageHandler
 from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.background_service import BackgroundService
 from group_sms_chat.domain.exceptions import (
+    GroupAlreadyExistsError,
+    InvalidSessionTokenError,
+    MessageTooLongError,
     PhoneNumberAlreadyExistsError,
     UserAlreadyExistsError,
+    UserAlreadyInGroupError,
     UserInvalidCredentialsError,
     UserNotInGroupError,
 )
 from group_sms_chat.domain.group import GroupName
-from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
-from group_sms_chat.infrastructure.fastapi.models.group import Group
+from group_sms_chat.domain.user import PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.background.task_executor import BoundedTaskExecutor
+from group_sms_chat.infrastructure.cache.idempotency_store import CachedIdempotencyStore
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.cache.routing_cache import LRURoutingCache
+from group_sms_chat.infrastructure.cache.user_repository import CachedUserRepository
+from group_sms_chat.infrastructure.fastapi.models.group import Group, GroupSummary
+from group_sms_chat.infrastructure.fastapi.models.outbox import OutboxStatus
+from group_sms_chat.infrastructure.fastapi.models.phone_number import PhoneNumberLoadStatus
+from group_sms_chat.infrastructure.fastapi.models.profiler import ProfilerStatusResponse
+from group_sms_chat.infrastructure.fastapi.models.routing_cache import RoutingCacheStatus
+from group_sms_chat.infrastructure.fastapi.models.session import LoginRequest, LoginResponse
 from group_sms_chat.infrastructure.fastapi.models.user import (
     NewUserRequest,
     NewUserResponse,
 )
+from group_sms_chat.infrastructure.metrics.handlers import InstrumentedHandler
+from group_sms_chat.infrastructure.metrics.middleware import RequestMetricsMiddleware
+from group_sms_chat.infrastructure.metrics.profiler import SamplingProfiler
+from group_sms_chat.infrastructure.metrics.registry import Counter, Gauge, MetricsRegistry
+from group_sms_chat.infrastructure.metrics.sms_service import MeteredSMSService, TracedSMSService
+from group_sms_chat.infrastructure.metrics.tracing import RequestTracingMiddleware
+from group_sms_chat.infrastructure.outbox.dispatcher import SMSOutboxDispatcher
+from group_sms_chat.infrastructure.outbox.sms_service import OutboxSMSService
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
 from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.idempotency_store import SQLiteIdempotencyStore
+from group_sms_chat.infrastructure.sqlite.sms_outbox import SQLiteSMSOutbox
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
 from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
-from group_sms_chat.infrastructure.twilio.sms_service import TwilioSMSService
+from group_sms_chat.infrastructure.twilio.http_sms_service import TWILIO_API_URL, TwilioHTTPSMSService
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter, RateLimit, parse_rate_limits
 
 
 @dataclass
@@ -40,23 +87,165 @@ class APIHandlers:
 
     validate_user: ValidateUserPasswordHandler
     register_user: RegisterUserHandler
+    login: LoginHandler
+    authenticate_session: AuthenticateSessionHandler
+    delete_user: DeleteUserHandler
     create_new_group: CreateNewGroupHandler
     find_groups: FindGroupsHandler
+    find_group_summaries: FindGroupSummariesHandler
     join_group: JoinGroupHandler
     leave_group: LeaveGroupHandler
-    send_group_message: SendGroupMessageHandler
+    accept_group_message: AcceptGroupMessageHandler
+    get_outbox_stats: GetOutboxStatsHandler
+    get_routing_cache_stats: GetRoutingCacheStatsHandler
+    get_phone_number_load: GetPhoneNumberLoadHandler
 
 
-def create_app(handlers: APIHandlers) -> FastAPI:
+def run_background_services(
+        background_services: Sequence[BackgroundService]
+) -> Callable[[FastAPI], AbstractAsyncContextManager[None]]:
+    """
+    Create a FastAPI lifespan that starts the background services with the application
+    and stops them, in reverse order, on shutdown.
+    """
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        started: list[BackgroundService] = []
+        try:
+            for service in background_services:
+                await service.start()
+                started.append(service)
+            yield
+        finally:
+            for service in reversed(started):
+                await service.stop()
+
+    return lifespan
+
+
+def register_rate_limiter_metrics(metrics: MetricsRegistry, rate_limiter: PhoneNumberRateLimiter,
+                                  phone_numbers: Sequence[str]) -> None:
+    """
+    Expose the occupancy of the send rate bucket of each phone number, and the time the messages waited for it,
+    in the metrics registry. They are read from the rate limiter when the metrics are rendered.
+    """
+    labels = ("from_phone_number",)
+    # The metric each field of the stats of a bucket is exposed in
+    metrics_by_stat: dict[str, Gauge | Counter] = {
+        "capacity": metrics.gauge("sms_rate_limit_capacity", "Messages a phone number can send in a burst", labels),
+        "available_tokens": metrics.gauge("sms_rate_limit_available_tokens",
+                                          "Messages a phone number can send right away", labels),
+        "queued": metrics.gauge("sms_rate_limit_queued", "Messages waiting to be sent from a phone number", labels),
+        "waits": metrics.counter("sms_rate_limit_waits_total",
+                                 "Messages that waited to be sent from a phone number", labels),
+        "total_wait_seconds": metrics.counter("sms_rate_limit_wait_seconds_total",
+                                              "Time the messages waited to be sent from a phone number", labels),
+        "max_wait_seconds": metrics.gauge("sms_rate_limit_max_wait_seconds",
+                                          "Longest time a message waited to be sent from a phone number", labels),
+    }
+    for phone_number in phone_numbers:
+        for stat, metric in metrics_by_stat.items():
+            metric.set_function(partial(_read_rate_limit_stat, rate_limiter, phone_number, stat), phone_number)
+
+
+def _read_rate_limit_stat(rate_limiter: PhoneNumberRateLimiter, phone_number: str, stat: str) -> float:
+    return float(getattr(rate_limiter.phone_number_stats(phone_number), stat))
+
+
+def create_fan_out_segments_counter(metrics: MetricsRegistry) -> Counter:
+    """
+    Create the counter of the SMS segments sent to the members of the groups, by encoding. The webhook counts
+    the segments of the messages sent right away in it, and the coalescer the segments of the merged messages.
+    """
+    return metrics.counter("group_message_fan_out_segments_total", "SMS segments sent to the members of the groups",
+                           labels=("encoding",))
+
+
+def create_app(handlers: APIHandlers, background_services: Sequence[BackgroundService] = (), *,
+               metrics: MetricsRegistry | None = None,
+               fan_out_segments: Counter | None = None,
+               server_timing: bool = False,
+               profiler: SamplingProfiler | None = None,
+               admin_token: str | None = None) -> FastAPI:
     """
     Create and return a FastAPI application instance.
+    The background services are started with the application and stopped, in reverse order, on shutdown.
+    When a metrics registry is given, the requests, the handlers, the size and the SMS segments of the group
+    messages fan-out and the duplicated incoming messages are measured in it, and the metrics are exposed at /metrics.
+    The segments are counted in fan_out_segments, created in the registry when it is not given, so the coalescer
+    wired outside the application can count the merged messages in the same counter.
+    With server_timing, the time each request spent in the handlers, the repositories and the SMS service
+    is returned in the Server-Timing header. When a profiler is given, it can be armed at /admin/profile.
+    The /admin endpoints require the admin token as a bearer token, and are refused to everyone without one.
     """
-    app = FastAPI()
+    app = FastAPI(lifespan=run_background_services(background_services))
+    if server_timing or profiler is not None:
+        app.add_middleware(RequestTracingMiddleware, server_timing=server_timing, profiler=profiler)
+
+    record_fan_out: Callable[[AcceptedGroupMessage], None] | None = None
+    duplicate_messages = None
+    if metrics is not None:
+        app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+        handler_duration = metrics.histogram("handler_duration_seconds", "Time taken by an application handler",
+                                             labels=("handler", "outcome"))
+        # The routes call measured copies of the handlers, so the ones given, and the handlers they call, are left as
+        # they are. The copies stand in for the handlers they wrap.
+        instrumented: dict[str, Any] = {
+            field.name: InstrumentedHandler(getattr(handlers, field.name), handler_duration, field.name)
+            for field in dataclasses.fields(handlers)
+        }
+        handlers = dataclasses.replace(handlers, **instrumented)
+        fan_out_size = metrics.histogram("group_message_fan_out_size", "Members a group message is sent to",
+                                         buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10_000))
+        message_segments = metrics.histogram("group_message_segments", "SMS segments a group message takes",
+                                             labels=("encoding",), buckets=(1, 2, 3, 4, 5, 6, 8, 10))
+        segments_sent = fan_out_segments if fan_out_segments is not None else create_fan_out_segments_counter(metrics)
 
-    async def get_user(username: Username, password: UserPassword) -> User:
+        def record_fan_out(accepted: AcceptedGroupMessage) -> None:
+            recipients = len(accepted.route.recipients)
+            segments = accepted.message.segments
+            fan_out_size.observe(recipients)
+            message_segments.observe(segments.count, segments.encoding)
+            # The segments of the coalesced messages are counted by the coalescer, once they are merged and sent
+            if not accepted.coalesced:
+                segments_sent.inc(segments.encoding, amount=segments.count * recipients)
+
+        duplicate_messages = metrics.counter("group_message_duplicates_total",
+                                             "Incoming messages ignored because Twilio delivered them again")
+
+        @app.get("/metrics", include_in_schema=False)
+        async def get_metrics() -> Response:
+            """
+            Endpoint to scrape the metrics in the Prometheus text format.
+            """
+            return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    bearer = HTTPBearer(auto_error=False)
+
+    async def get_user(credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)],
+                       username: Username | None = None,
+                       password: UserPassword | None = None) -> User:
         """
-        Dependency to get the current user.
+        Dependency to get the current user from the session token of the Authorization header,
+        or from the username and password of the request when there is no token.
         """
+        if credentials is not None:
+            try:
+                return await handlers.authenticate_session.handle(credentials.credentials)
+            except InvalidSessionTokenError:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNAUTHORIZED,
+                    detail="Invalid or expired session token.",
+                    headers={"WWW-Authenticate": "Bearer"}
+                ) from None
+
+        if username is None or password is None:
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail="Missing session token.",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
         try:
             return await handlers.validate_user.handle(username, password)
         except UserInvalidCredentialsError:
@@ -65,6 +254,20 @@ def create_app(handlers: APIHandlers) -> FastAPI:
                 detail="Invalid username or password."
             ) from None
 
+    async def require_admin(credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)]) -> None:
+        """
+        Dependency to restrict an endpoint to the holders of the admin token.
+        """
+        if admin_token is None or credentials is None or not secrets.compare_digest(
+                credentials.credentials.encode(), admin_token.encode()):
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail="Invalid or missing admin token.",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+    admin = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
     @app.get("/health")
     async def health_check() -> dict[str, str]:
         """
@@ -80,11 +283,11 @@ def create_app(handlers: APIHandlers) -> FastAPI:
         Endpoint to register a new user.
         """
         try:
-            await handlers.register_user.handle(User(
+            await handlers.register_user.handle(
                 username=user.username,
                 phone_number=user.phone_number,
-                hashed_password=HashedPassword.from_string(user.password)
-            ))
+                password=user.password
+            )
             return NewUserResponse(username=user.username, phone_number=user.phone_number)
         except UserAlreadyExistsError:
             raise HTTPException(
@@ -97,20 +300,66 @@ def create_app(handlers: APIHandlers) -> FastAPI:
                 detail=f"User with phone number {user.phone_number} already exists."
             ) from None
 
+    @app.post("/login")
+    async def login(credentials: LoginRequest) -> LoginResponse:
+        """
+        Endpoint to get a session token, to be sent in the Authorization header as a bearer token.
+        """
+        try:
+            session_token = await handlers.login.handle(credentials.username, credentials.password)
+        except UserInvalidCredentialsError:
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail="Invalid username or password."
+            ) from None
+        return LoginResponse(access_token=session_token.token, expires_at=session_token.expires_at)
+
+    @app.delete("/users/me",
+                status_code=HTTPStatus.NO_CONTENT)
+    async def delete_user(user: Annotated[User, Depends(get_user)]) -> None:
+        """
+        Endpoint for a user to delete their account. Their session tokens stop being valid.
+        """
+        await handlers.delete_user.handle(user)
+
     @app.get("/groups")
-    async def find_groups(group_name: str) -> list[Group]:
+    async def find_groups(group_name: str, response: Response,
+                          limit: Annotated[int, Query(ge=1, le=500)] = 50,
+                          cursor: str | None = None,
+                          include_members: bool = True) -> list[Group] | list[GroupSummary]:
         """
-        Endpoint to find groups.
+        Endpoint to find groups, sorted by name.
+        When a full page is returned, the X-Next-Cursor header holds the cursor of the next page.
         """
-        groups = await handlers.find_groups.handle(GroupName(root=group_name))
-        return [Group(name=group.name, users=[user.username for user in group.users]) for group in groups]
+        try:
+            after = GroupName(root=cursor) if cursor is not None else None
+        except ValidationError:
+            raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail="Invalid cursor.") from None
+        results: list[Group] | list[GroupSummary]
+        if include_members:
+            groups = await handlers.find_groups.handle(GroupName(root=group_name), limit=limit, after=after)
+            results = [Group(name=group.name, users=[user.username for user in group.users]) for group in groups]
+        else:
+            summaries = await handlers.find_group_summaries.handle(GroupName(root=group_name), limit=limit,
+                                                                   after=after)
+            results = [GroupSummary(name=summary.name, member_count=summary.member_count) for summary in summaries]
+
+        if len(results) == limit:
+            response.headers["X-Next-Cursor"] = str(results[-1].name)
+        return results
 
     @app.post("/groups")
     async def create_group(group_name: GroupName, user: Annotated[User, Depends(get_user)]) -> Group:
         """
         Endpoint to create a new group.
         """
-        new_group = await handlers.create_new_group.handle(group_name=group_name, user=user)
+        try:
+            new_group = await handlers.create_new_group.handle(group_name=group_name, user=user)
+        except GroupAlreadyExistsError:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail=f"Group {group_name} already exists."
+            ) from None
         return Group(name=new_group.name, users=[user.username for user in new_group.users])
 
     @app.post("/groups/{group_name}/users/",
@@ -119,9 +368,15 @@ def create_app(handlers: APIHandlers) -> FastAPI:
         """
         Endpoint for a user to join a group.
         """
-        await handlers.join_group.handle(
-            group_name=GroupName(root=group_name),
-            user=user)
+        try:
+            await handlers.join_group.handle(
+                group_name=GroupName(root=group_name),
+                user=user)
+        except UserAlreadyInGroupError:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail=f"User {user.username} is already a member of the group {group_name}."
+            ) from None
 
     @app.delete("/groups/{group_name}/users/",
                 status_code=HTTPStatus.NO_CONTENT)
@@ -146,38 +401,232 @@ def create_app(handlers: APIHandlers) -> FastAPI:
         body = await request.body()
         parsed_data = dict(urllib.parse.parse_qsl(body.decode("utf-8")))
 
-        await handlers.send_group_message.handle(
-            user_number=PhoneNumber(root=parsed_data.get("From", "")),
-            group_number=PhoneNumber(root=parsed_data.get("To", "")),
-            message=parsed_data.get("Body", "")
+        try:
+            accepted = await handlers.accept_group_message.handle(
+                user_number=PhoneNumber(root=parsed_data.get("From", "")),
+                group_number=PhoneNumber(root=parsed_data.get("To", "")),
+                message=parsed_data.get("Body", ""),
+                message_id=parsed_data.get("MessageSid")
+            )
+        except MessageTooLongError as e:
+            raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e)) from None
+        if accepted is None:
+            # Twilio retried a message that was already accepted
+            if duplicate_messages is not None:
+                duplicate_messages.inc()
+            return
+        if record_fan_out is not None:
+            record_fan_out(accepted)
+
+    @admin.get("/outbox")
+    async def get_outbox_status() -> OutboxStatus:
+        """
+        Endpoint to inspect the queue of SMS messages waiting to be delivered.
+        """
+        stats = await handlers.get_outbox_stats.handle()
+        return OutboxStatus(
+            pending=stats.pending,
+            in_flight=stats.in_flight,
+            failed=stats.failed,
+            oldest_pending_age_seconds=stats.oldest_pending_age_seconds,
         )
 
+    @admin.get("/routing-cache")
+    async def get_routing_cache_status() -> RoutingCacheStatus:
+        """
+        Endpoint to inspect the cache of the routes of the group messages.
+        """
+        stats = await handlers.get_routing_cache_stats.handle()
+        return RoutingCacheStatus(
+            size=stats.size,
+            max_size=stats.max_size,
+            hits=stats.hits,
+            misses=stats.misses,
+            evictions=stats.evictions,
+            invalidations=stats.invalidations,
+        )
+
+    @admin.get("/phone-numbers")
+    async def get_phone_number_load() -> list[PhoneNumberLoadStatus]:
+        """
+        Endpoint to inspect the members and the recent messages of each group number,
+        to tell when more numbers are needed.
+        """
+        loads = await handlers.get_phone_number_load.handle()
+        return [
+            PhoneNumberLoadStatus(
+                phone_number=str(load.phone_number),
+                members=load.members,
+                messages_per_minute=load.messages_per_minute,
+            )
+            for load in loads
+        ]
+
+    if profiler is not None:
+        @admin.get("/profile")
+        async def get_profiler_status() -> ProfilerStatusResponse:
+            """
+            Endpoint to inspect the sampling profiler and find the last profile it wrote.
+            """
+            return profiler_status(profiler)
+
+        @admin.post("/profile")
+        async def arm_profiler(requests: Annotated[int, Query(ge=1, le=100_000)] = 100) -> ProfilerStatusResponse:
+            """
+            Endpoint to profile the next requests. The profile is written to a file once they finish.
+            """
+            profiler.arm(requests)
+            return profiler_status(profiler)
+
+    app.include_router(admin)
     return app
 
 
+def profiler_status(profiler: SamplingProfiler) -> ProfilerStatusResponse:
+    status = profiler.status()
+    return ProfilerStatusResponse(
+        remaining_requests=status.remaining_requests,
+        in_flight_requests=status.in_flight_requests,
+        samples=status.samples,
+        last_profile=status.last_profile,
+    )
+
+
 # Initialize the API handlers
 load_dotenv()
 
-DB_FILE_PATH = "./group_sms_chat.db"
+DB_FILE_PATH = os.environ.get("DB_FILE_PATH", "./group_sms_chat.db")
+DB_READER_CONNECTIONS = int(os.environ.get("DB_READER_CONNECTIONS", "4"))
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID", "")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN", "")
 TWILIO_PHONE_NUMBERS = os.environ.get("TWILIO_PHONE_NUMBERS", "").split(",")
+TWILIO_BASE_URL = os.environ.get("TWILIO_BASE_URL", TWILIO_API_URL)
+TWILIO_MAX_CONNECTIONS = int(os.environ.get("TWILIO_MAX_CONNECTIONS", "20"))
+TWILIO_TIMEOUT = float(os.environ.get("TWILIO_TIMEOUT", "10"))
+TWILIO_SEND_RATE = float(os.environ.get("TWILIO_SEND_RATE", "1"))
+TWILIO_SEND_BURST = int(os.environ.get("TWILIO_SEND_BURST", "1"))
+TWILIO_SEND_RATE_LIMITS = parse_rate_limits(os.environ.get("TWILIO_SEND_RATE_LIMITS", ""))
+FAN_OUT_CONCURRENCY = int(os.environ.get("FAN_OUT_CONCURRENCY", "10"))
+FAN_OUT_WORKERS = int(os.environ.get("FAN_OUT_WORKERS", "10"))
+FAN_OUT_QUEUE_SIZE = int(os.environ.get("FAN_OUT_QUEUE_SIZE", "1000"))
+FAN_OUT_DRAIN_TIMEOUT = float(os.environ.get("FAN_OUT_DRAIN_TIMEOUT", "30"))
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+COALESCE_GROUPS = [group for group in os.environ.get("COALESCE_GROUPS", "").split(",") if group]
+COALESCE_WINDOW = float(os.environ.get("COALESCE_WINDOW", "2"))
+COALESCE_MAX_SEGMENTS = int(os.environ.get("COALESCE_MAX_SEGMENTS", "3"))
+SMS_NORMALIZE_GSM7 = os.environ.get("SMS_NORMALIZE_GSM7", "false").lower() == "true"
+SMS_MAX_SEGMENTS = int(os.environ.get("SMS_MAX_SEGMENTS", "10"))
+SMS_OUTBOX_WORKERS = int(os.environ.get("SMS_OUTBOX_WORKERS", "4"))
+SMS_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("SMS_OUTBOX_MAX_ATTEMPTS", "5"))
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "86400"))
+PASSWORD_HASH_COST = int(os.environ.get("PASSWORD_HASH_COST", "14"))
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get("PASSWORD_HASH_CONCURRENCY", "2"))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+ROUTING_CACHE_SIZE = int(os.environ.get("ROUTING_CACHE_SIZE", "10000"))
+PHONE_NUMBER_ALLOCATOR_SIZE = int(os.environ.get("PHONE_NUMBER_ALLOCATOR_SIZE", "10000"))
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "false").lower() == "true"
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "false").lower() == "true"
+PROFILE_REQUESTS = int(os.environ.get("PROFILE_REQUESTS", "0"))
+PROFILE_MAX_REQUESTS = int(os.environ.get("PROFILE_MAX_REQUESTS", "1000"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
 
-user_repo = SQLiteUserRepository(file_path=DB_FILE_PATH)
-group_repo = SQLiteGroupRepository(file_path=DB_FILE_PATH)
-sms_service = TwilioSMSService(account_sid=TWILIO_ACCOUNT_SID,
-                               auth_token=TWILIO_AUTH_TOKEN,
-                               phone_numbers=TWILIO_PHONE_NUMBERS)
+if not SESSION_SECRET:
+    logging.warning("SESSION_SECRET is not set, the session tokens will not be valid after a restart")
+    SESSION_SECRET = secrets.token_urlsafe(32)
+
+metrics = MetricsRegistry()
+db_pool = SQLiteConnectionPool(file_path=DB_FILE_PATH, readers=DB_READER_CONNECTIONS, metrics=metrics)
+user_repo = CachedUserRepository(SQLiteUserRepository(pool=db_pool), ttl=USER_CACHE_TTL, max_size=USER_CACHE_SIZE)
+group_repo = SQLiteGroupRepository(pool=db_pool)
+unit_of_work = SQLiteUnitOfWork(pool=db_pool)
+routing_cache = LRURoutingCache(max_size=ROUTING_CACHE_SIZE)
+idempotency_store = CachedIdempotencyStore(SQLiteIdempotencyStore(pool=db_pool, ttl=IDEMPOTENCY_TTL),
+                                           ttl=IDEMPOTENCY_TTL, max_size=IDEMPOTENCY_CACHE_SIZE)
+session_tokens = HMACSessionTokens(secret=SESSION_SECRET, ttl=SESSION_TTL)
+password_hasher = ScryptPasswordHasher(cost=PASSWORD_HASH_COST, max_concurrency=PASSWORD_HASH_CONCURRENCY)
+validate_user = ValidateUserPasswordHandler(user_repository=user_repo, password_hasher=password_hasher)
+sms_outbox = SQLiteSMSOutbox(pool=db_pool)
+sms_rate_limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=TWILIO_SEND_RATE, burst=TWILIO_SEND_BURST),
+                                          limits=TWILIO_SEND_RATE_LIMITS)
+register_rate_limiter_metrics(metrics, sms_rate_limiter, TWILIO_PHONE_NUMBERS)
+twilio_sms_service = TwilioHTTPSMSService(account_sid=TWILIO_ACCOUNT_SID,
+                                          auth_token=TWILIO_AUTH_TOKEN,
+                                          phone_numbers=TWILIO_PHONE_NUMBERS,
+                                          base_url=TWILIO_BASE_URL,
+                                          max_connections=TWILIO_MAX_CONNECTIONS,
+                                          timeout=TWILIO_TIMEOUT,
+                                          rate_limiter=sms_rate_limiter)
+sms_service = TracedSMSService(OutboxSMSService(outbox=sms_outbox, delivery_service=twilio_sms_service))
+sms_outbox_dispatcher = SMSOutboxDispatcher(outbox=sms_outbox,
+                                            sms_service=MeteredSMSService(twilio_sms_service, metrics),
+                                            workers=SMS_OUTBOX_WORKERS, max_attempts=SMS_OUTBOX_MAX_ATTEMPTS)
+phone_number_allocator = BitmapPhoneNumberAllocator(group_repository=group_repo, sms_service=sms_service,
+                                                    max_users=PHONE_NUMBER_ALLOCATOR_SIZE)
+fan_out_executor = BoundedTaskExecutor(name="fan_out", workers=FAN_OUT_WORKERS, max_queued=FAN_OUT_QUEUE_SIZE,
+                                       drain_timeout=FAN_OUT_DRAIN_TIMEOUT, metrics=metrics)
+send_group_message = SendGroupMessageHandler(group_repository=group_repo, user_repository=user_repo,
+                                             sms_service=sms_service, max_concurrency=FAN_OUT_CONCURRENCY,
+                                             routing_cache=routing_cache, phone_number_allocator=phone_number_allocator,
+                                             normalize_to_gsm7=SMS_NORMALIZE_GSM7, max_segments=SMS_MAX_SEGMENTS)
+fan_out_segments = create_fan_out_segments_counter(metrics)
+# "*" coalesces the messages of every group, no group disables the coalescing
+coalescer: GroupMessageCoalescer | None = None
+if COALESCE_GROUPS:
+    group_message_coalescer = GroupMessageCoalescer(
+        send_group_message,
+        groups=None if "*" in COALESCE_GROUPS else COALESCE_GROUPS,
+        window=COALESCE_WINDOW, max_segments=COALESCE_MAX_SEGMENTS,
+        record_segments=lambda segments: fan_out_segments.inc(segments.encoding, amount=segments.count)
+    )
+    coalesced_messages = metrics.counter("group_message_coalesced_total",
+                                         "Group messages held to be merged with the next ones")
+    coalesced_messages.set_function(lambda: group_message_coalescer.coalesced_messages)
+    saved_sends = metrics.counter("group_message_coalescing_saved_sms_total",
+                                  "SMS not sent because group messages were merged")
+    saved_sends.set_function(lambda: group_message_coalescer.saved_sends)
+    coalescer = group_message_coalescer
 
 handlers = APIHandlers(
-    validate_user=ValidateUserPasswordHandler(user_repository=user_repo),
-    register_user=RegisterUserHandler(user_repository=user_repo),
-    create_new_group=CreateNewGroupHandler(group_repository=group_repo, sms_service=sms_service),
+    validate_user=validate_user,
+    register_user=RegisterUserHandler(user_repository=user_repo, password_hasher=password_hasher),
+    login=LoginHandler(validate_user=validate_user, session_tokens=session_tokens),
+    authenticate_session=AuthenticateSessionHandler(user_repository=user_repo, session_tokens=session_tokens),
+    delete_user=DeleteUserHandler(user_repository=user_repo, group_repository=group_repo, unit_of_work=unit_of_work,
+                                  phone_number_allocator=phone_number_allocator, routing_cache=routing_cache),
+    create_new_group=CreateNewGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                           unit_of_work=unit_of_work, phone_number_allocator=phone_number_allocator,
+                                           routing_cache=routing_cache),
     find_groups=FindGroupsHandler(group_repository=group_repo),
-    join_group=JoinGroupHandler(group_repository=group_repo, sms_service=sms_service),
-    leave_group=LeaveGroupHandler(group_repository=group_repo, sms_service=sms_service),
-    send_group_message=SendGroupMessageHandler(group_repository=group_repo, user_repository=user_repo,
-                                               sms_service=sms_service),
+    find_group_summaries=FindGroupSummariesHandler(group_repository=group_repo),
+    join_group=JoinGroupHandler(group_repository=group_repo, sms_service=sms_service, unit_of_work=unit_of_work,
+                                phone_number_allocator=phone_number_allocator, routing_cache=routing_cache),
+    leave_group=LeaveGroupHandler(group_repository=group_repo, sms_service=sms_service, unit_of_work=unit_of_work,
+                                  phone_number_allocator=phone_number_allocator, routing_cache=routing_cache),
+    accept_group_message=AcceptGroupMessageHandler(send_group_message=send_group_message,
+                                                   task_executor=fan_out_executor,
+                                                   idempotency_store=idempotency_store,
+                                                   coalescer=coalescer),
+    get_outbox_stats=GetOutboxStatsHandler(outbox=sms_outbox),
+    get_routing_cache_stats=GetRoutingCacheStatsHandler(routing_cache=routing_cache),
+    get_phone_number_load=GetPhoneNumberLoadHandler(phone_number_allocator=phone_number_allocator),
 )
 
-app = create_app(handlers)
+# The profiler, and the endpoint that arms it, only exist when profiling is opted in
+profiler = None
+if PROFILE_ENABLED or PROFILE_REQUESTS > 0:
+    profiler = SamplingProfiler(output_dir=PROFILE_DIR, interval=PROFILE_INTERVAL, requests=PROFILE_REQUESTS,
+                                max_requests=PROFILE_MAX_REQUESTS)
+
+# The held and in flight fan-outs are drained into the outbox before the dispatcher is stopped,
+# and the dispatcher is stopped before the HTTP client it sends the messages with
+app = create_app(handlers,
+                 background_services=[password_hasher, twilio_sms_service, sms_outbox_dispatcher, fan_out_executor,
+                                      *([coalescer] if coalescer is not None else []),
+                                      *([profiler] if profiler is not None else [])],
+                 metrics=metrics, fan_out_segments=fan_out_segments, server_timing=SERVER_TIMING, profiler=profiler,
+                 admin_token=ADMIN_TOKEN or None)
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from functools import partial
+
+from group_sms_chat.application.group_message_coalescer import GroupMessageCoalescer
+from group_sms_chat.application.send_group_message_handler import ComposedMessage, SendGroupMessageHandler
+from group_sms_chat.domain.idempotency_store import IdempotencyStore
+from group_sms_chat.domain.message_route import MessageRoute
+from group_sms_chat.domain.task_executor import TaskExecutor
+from group_sms_chat.domain.user import PhoneNumber
+
+
+@dataclass(frozen=True)
+class AcceptedGroupMessage:
+    route: MessageRoute
+    message: ComposedMessage
+    # Held by the coalescer to be merged with the next messages of the group, instead of being sent as it is
+    coalesced: bool = False
+
+
+class AcceptGroupMessageHandler:
+    def __init__(self, send_group_message: SendGroupMessageHandler,
+                 task_executor: TaskExecutor | None = None,
+                 idempotency_store: IdempotencyStore | None = None,
+                 coalescer: GroupMessageCoalescer | None = None) -> None:
+        """
+        Initialize the AcceptGroupMessageHandler.
+
+        :param send_group_message: The handler that routes the messages and sends them to the members.
+        :param task_executor: Executor the messages are sent to the members in. Without one, the message is sent
+            before the handler returns.
+        :param idempotency_store: Store of the IDs of the messages already accepted, so a message delivered again
+            is not sent to the group twice. The ID of a message that fails to be accepted is forgotten, so the message
+            is sent when it is delivered again.
+        :param coalescer: Coalescer the messages of the groups it coalesces are held in, to be merged with
+            the next ones instead of being sent right away.
+        """
+        self.send_group_message = send_group_message
+        self.task_executor = task_executor
+        self.idempotency_store = idempotency_store
+        self.coalescer = coalescer
+
+    async def handle(self, user_number: PhoneNumber, group_number: PhoneNumber, message: str,
+                     message_id: str | None = None) -> AcceptedGroupMessage | None:
+        """
+        Handle an incoming group message: find its route and send it to the members of the group in the
+        background, so the sender of a message to a large group does not wait for every delivery.
+        :param user_number: The phone number of the sender.
+        :param group_number: The phone number of the group.
+        :param message: The message to be sent.
+        :param message_id: The ID the message was delivered with, the same when the delivery is retried.
+        :return: The route and the composed message, or None if a message with the same ID was already accepted.
+        :raises PhoneNotFoundError: If the sender or the group cannot be found.
+        :raises MessageTooLongError: If the message takes more SMS segments than allowed.
+        """
+        if message_id and self.idempotency_store is not None:
+            if not await self.idempotency_store.add(message_id):
+                return None
+            try:
+                return await self._accept(user_number, group_number, message)
+            except BaseException:
+                await self.idempotency_store.discard(message_id)
+                raise
+        return await self._accept(user_number, group_number, message)
+
+    async def _accept(self, user_number: PhoneNumber, group_number: PhoneNumber,
+                      message: str) -> AcceptedGroupMessage:
+        route = await self.send_group_message.route(user_number, group_number)
+        composed = self.send_group_message.compose(route, message)
+        if self.coalescer is not None and self.coalescer.coalesces(route.group_name):
+            self.coalescer.add(route, composed)
+            return AcceptedGroupMessage(route=route, message=composed, coalesced=True)
+        fan_out = partial(self.send_group_message.fan_out, route, composed)
+        if self.task_executor is None:
+            await fan_out()
+        else:
+            await self.task_executor.submit(fan_out)
+        return AcceptedGroupMessage(route=route, message=composed)
@@ -0,0 +1,34 @@
+from group_sms_chat.domain.exceptions import InvalidSessionTokenError
+from group_sms_chat.domain.session import SessionTokens, password_fingerprint
+from group_sms_chat.domain.user import User
+from group_sms_chat.domain.user_repository import UserRepository
+
+
+class AuthenticateSessionHandler:
+    def __init__(self, user_repository: UserRepository, session_tokens: SessionTokens) -> None:
+        """
+        Initialize the AuthenticateSessionHandler.
+
+        :param user_repository: An instance of UserRepository to interact with user data.
+        :param session_tokens: An instance of SessionTokens to verify the session tokens.
+        """
+        self.user_repository = user_repository
+        self.session_tokens = session_tokens
+
+    async def handle(self, token: str) -> User:
+        """
+        Get the user a session token was issued to.
+
+        :param token: The session token.
+        :return: The user of the session.
+        :raises InvalidSessionTokenError: If the token is not valid, the user no longer exists
+            or the password of the user changed after the token was issued.
+        """
+        session = self.session_tokens.verify(token)
+
+        user = await self.user_repository.get_user(session.username)
+        if user is None:
+            raise InvalidSessionTokenError(reason="the user no longer exists")
+        if password_fingerprint(user.hashed_password) != session.password_fingerprint:
+            raise InvalidSessionTokenError(reason="the password changed")
+        return user
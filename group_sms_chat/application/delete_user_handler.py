@@ -0,0 +1,52 @@
+from group_sms_chat.domain.group_repository import GroupRepository
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator
+from group_sms_chat.domain.routing_cache import RoutingCache
+from group_sms_chat.domain.unit_of_work import UnitOfWork
+from group_sms_chat.domain.user import User
+from group_sms_chat.domain.user_repository import UserRepository
+
+
+class DeleteUserHandler:
+    def __init__(self, user_repository: UserRepository, group_repository: GroupRepository,
+                 unit_of_work: UnitOfWork, phone_number_allocator: PhoneNumberAllocator,
+                 routing_cache: RoutingCache | None = None) -> None:
+        """
+        Initialize the DeleteUserHandler.
+
+        :param user_repository: An instance of UserRepository to interact with user data.
+        :param group_repository: An instance of GroupRepository to manage group data.
+        :param unit_of_work: An instance of UnitOfWork to leave every group atomically.
+        :param phone_number_allocator: Allocator of the group numbers, which forgets the ones of the user.
+        :param routing_cache: Cache of the message routes to invalidate for the groups the user leaves.
+        """
+        self.user_repository = user_repository
+        self.group_repository = group_repository
+        self.unit_of_work = unit_of_work
+        self.phone_number_allocator = phone_number_allocator
+        self.routing_cache = routing_cache
+
+    async def handle(self, user: User) -> None:
+        """
+        Delete a user and remove them from every group. Their session tokens stop being valid.
+
+        :param user: The user to delete.
+        :return: None
+        """
+        groups = await self.group_repository.find_user_groups(user.username)
+
+        async with self.unit_of_work.transaction():
+            for group in groups:
+                await self.group_repository.remove_member(group.name, user.username)
+
+        # Deleted after the transaction is committed, so a cached copy of the user cannot be reloaded before it
+        await self.user_repository.delete_user(user.username)
+        for group in groups:
+            phone_number = group.get_user_phone_number(user.username)
+            if phone_number is not None:
+                self.phone_number_allocator.release(user.username, phone_number)
+        self.phone_number_allocator.release_user(user.username)
+
+        if self.routing_cache is not None:
+            self.routing_cache.invalidate_user(user.username)
+            for group in groups:
+                self.routing_cache.invalidate_group(group.name)
@@ -0,0 +1,24 @@
+from group_sms_chat.domain.group import GroupName, GroupSummary
+from group_sms_chat.domain.group_repository import GroupRepository
+
+
+class FindGroupSummariesHandler:
+    def __init__(self, group_repository: GroupRepository) -> None:
+        """
+        Initialize the FindGroupSummariesHandler.
+
+        :param group_repository: An instance of GroupRepository to manage group data.
+        """
+        self.group_repository = group_repository
+
+    async def handle(self, group_name: GroupName, limit: int | None = None,
+                     after: GroupName | None = None) -> list[GroupSummary]:
+        """
+        Handle the search for groups by name, returning the number of members of each group instead of the members.
+
+        :param group_name: The name of the group to search for.
+        :param limit: The maximum number of groups to return, or None to return all of them.
+        :param after: The name of the last group of the previous page of results.
+        :return: A list of summaries of the groups that match the given name, sorted by name.
+        """
+        return await self.group_repository.find_group_summaries_by_name(group_name, limit=limit, after=after)
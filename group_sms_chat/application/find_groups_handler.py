@@ -11,11 +11,14 @@ class FindGroupsHandler:
         """
         self.group_repository = group_repository
 
-    async def handle(self, group_name: GroupName) -> list[Group]:
+    async def handle(self, group_name: GroupName, limit: int | None = None,
+                     after: GroupName | None = None) -> list[Group]:
         """
         Handle the search for groups by name.
 
         :param group_name: The name of the group to search for.
-        :return: A list of groups that match the given name.
+        :param limit: The maximum number of groups to return, or None to return all of them.
+        :param after: The name of the last group of the previous page of results.
+        :return: A list of groups that match the given name, sorted by name.
         """
-        return await self.group_repository.find_groups_by_name(group_name)
+        return await self.group_repository.find_groups_by_name(group_name, limit=limit, after=after)
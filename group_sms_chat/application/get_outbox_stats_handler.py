@@ -0,0 +1,19 @@
+from group_sms_chat.domain.sms_outbox import OutboxStats, SMSOutbox
+
+
+class GetOutboxStatsHandler:
+    def __init__(self, outbox: SMSOutbox) -> None:
+        """
+        Initialize the GetOutboxStatsHandler.
+
+        :param outbox: An instance of SMSOutbox to inspect.
+        """
+        self.outbox = outbox
+
+    async def handle(self) -> OutboxStats:
+        """
+        Handle the inspection of the SMS outbox.
+
+        :return: The number of messages in each state and the age of the oldest pending message.
+        """
+        return await self.outbox.stats()
@@ -0,0 +1,19 @@
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator, PhoneNumberLoad
+
+
+class GetPhoneNumberLoadHandler:
+    def __init__(self, phone_number_allocator: PhoneNumberAllocator) -> None:
+        """
+        Initialize the GetPhoneNumberLoadHandler.
+
+        :param phone_number_allocator: An instance of PhoneNumberAllocator to inspect.
+        """
+        self.phone_number_allocator = phone_number_allocator
+
+    async def handle(self) -> list[PhoneNumberLoad]:
+        """
+        Handle the inspection of the load of the group numbers.
+
+        :return: The number of members and the recent messages per minute of each group number.
+        """
+        return await self.phone_number_allocator.load()
@@ -0,0 +1,19 @@
+from group_sms_chat.domain.routing_cache import RoutingCache, RoutingCacheStats
+
+
+class GetRoutingCacheStatsHandler:
+    def __init__(self, routing_cache: RoutingCache) -> None:
+        """
+        Initialize the GetRoutingCacheStatsHandler.
+
+        :param routing_cache: An instance of RoutingCache to inspect.
+        """
+        self.routing_cache = routing_cache
+
+    async def handle(self) -> RoutingCacheStats:
+        """
+        Handle the inspection of the routing cache.
+
+        :return: The size of the cache and its hit, miss, eviction and invalidation counters.
+        """
+        return self.routing_cache.stats()
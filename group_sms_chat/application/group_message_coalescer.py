@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from collections.abc import Callable, Collection
+
+from group_sms_chat.application.send_group_message_handler import (
+    ComposedMessage,
+    FanOutResult,
+    SendGroupMessageHandler,
+)
+from group_sms_chat.domain.background_service import BackgroundService
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.message_route import MessageRecipient, MessageRoute
+from group_sms_chat.domain.sms_encoding import SMSSegments, count_segments
+
+
+class GroupMessageCoalescer(BackgroundService):
+    """
+    Holds the messages sent to the groups that opted in for a short window, and then sends each member a single
+    SMS with the messages they got from the group in that window, instead of one SMS per message. The messages
+    are merged as long as the SMS fits the segment budget, so a long burst is sent in as few SMS as possible.
+
+    The window starts with the first message held for a group, so no message waits longer than the window.
+    On stop, the messages still held are sent.
+    """
+
+    def __init__(self, send_group_message: SendGroupMessageHandler, *,
+                 groups: Collection[str] | None = None,
+                 window: float = 2.0,
+                 max_segments: int = 3,
+                 record_segments: Callable[[SMSSegments], None] | None = None) -> None:
+        """
+        Initialize the GroupMessageCoalescer.
+
+        :param send_group_message: The handler the merged messages are sent with.
+        :param groups: Names of the groups whose messages are coalesced, or None for every group.
+        :param window: Seconds the messages of a group are held, from the first one.
+        :param max_segments: Maximum number of SMS segments of a merged message. A message that takes more on its
+            own is sent alone.
+        :param record_segments: Called with the segments of each merged message sent to a member, so the segments
+            sent for the coalesced groups are counted as they are sent rather than as the messages are held.
+        """
+        self.send_group_message = send_group_message
+        self.groups = frozenset(groups) if groups is not None else None
+        self.window = window
+        self.max_segments = max_segments
+        self.record_segments = record_segments
+        # Messages held and SMS they would have taken if sent one by one, SMS saved by merging them
+        self.coalesced_messages = 0
+        self.saved_sends = 0
+        self._pending: dict[str, list[tuple[MessageRoute, ComposedMessage]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._flushes: set[asyncio.Task[None]] = set()
+
+    def coalesces(self, group_name: GroupName) -> bool:
+        """
+        :return: Whether the messages of the group are coalesced.
+        """
+        return self.groups is None or str(group_name) in self.groups
+
+    def add(self, route: MessageRoute, message: ComposedMessage) -> None:
+        """
+        Hold a message until the window of its group ends.
+
+        :param route: The route of the message.
+        :param message: The message, as composed for the route.
+        """
+        key = str(route.group_name)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = []
+            self._timers[key] = asyncio.get_running_loop().call_later(self.window, self._flush_later, key)
+        pending.append((route, message))
+        self.coalesced_messages += 1
+
+    async def flush(self, group_name: GroupName) -> FanOutResult:
+        """
+        Send the messages held for a group now.
+
+        :param group_name: The name of the group.
+        :return: How many merged messages were sent or failed.
+        """
+        key = str(group_name)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        messages = self._pending.pop(key, [])
+
+        # The texts each member gets, in order, by the number they get them from
+        texts: dict[tuple[str, str], tuple[MessageRecipient, list[str]]] = {}
+        for route, message in messages:
+            for recipient in route.recipients:
+                if recipient.phone_number is None:
+                    continue
+                entry = texts.setdefault((str(recipient.phone_number), str(recipient.group_phone_number)),
+                                         (recipient, []))
+                entry[1].append(message.text)
+
+        deliveries = [(recipient, text) for recipient, member_texts in texts.values()
+                      for text in self._merge(member_texts)]
+        self.saved_sends += sum(len(member_texts) for _, member_texts in texts.values()) - len(deliveries)
+        result = await self.send_group_message.deliver(deliveries)
+        if self.record_segments is not None:
+            for _, text in deliveries:
+                self.record_segments(count_segments(text))
+        return result
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for key in list(self._pending):
+            await self.flush(GroupName.model_construct(key))
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
+    def _merge(self, texts: list[str]) -> list[str]:
+        merged = [texts[0]]
+        for text in texts[1:]:
+            candidate = f"{merged[-1]}\n{text}"
+            if count_segments(candidate).count <= self.max_segments:
+                merged[-1] = candidate
+            else:
+                merged.append(text)
+        return merged
+
+    def _flush_later(self, key: str) -> None:
+        task = asyncio.create_task(self._flush_logging_errors(key))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_logging_errors(self, key: str) -> None:
+        try:
+            await self.flush(GroupName.model_construct(key))
+        except Exception:
+            logging.exception(f"Failed to send the coalesced messages of the group {key}")
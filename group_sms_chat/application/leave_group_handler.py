@@ -1,20 +1,31 @@
 from group_sms_chat.domain.exceptions import GroupNotFoundError, UserNotInGroupError
 from group_sms_chat.domain.group import GroupName
 from group_sms_chat.domain.group_repository import GroupRepository
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator
+from group_sms_chat.domain.routing_cache import RoutingCache
 from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.domain.unit_of_work import UnitOfWork
 from group_sms_chat.domain.user import User
 
 
 class LeaveGroupHandler:
-    def __init__(self, group_repository: GroupRepository, sms_service: SMSService) -> None:
+    def __init__(self, group_repository: GroupRepository, sms_service: SMSService,
+                 unit_of_work: UnitOfWork, phone_number_allocator: PhoneNumberAllocator,
+                 routing_cache: RoutingCache | None = None) -> None:
         """
         Initialize the LeaveGroupHandler.
 
         :param group_repository: An instance of GroupRepository to manage group data.
         :param sms_service: An instance of SMSService to handle SMS operations.
+        :param unit_of_work: An instance of UnitOfWork to save the changes and their notifications atomically.
+        :param phone_number_allocator: Allocator of the group numbers of the users.
+        :param routing_cache: Cache of the message routes to invalidate when the members of the group change.
         """
         self.group_service = group_repository
         self.sms_service = sms_service
+        self.unit_of_work = unit_of_work
+        self.phone_number_allocator = phone_number_allocator
+        self.routing_cache = routing_cache
 
     async def handle(self, group_name: GroupName, user: User) -> None:
         """
@@ -34,11 +45,15 @@ class LeaveGroupHandler:
         if group_phone_number is None:
             raise UserNotInGroupError(username=user.username, group_name=group_name)
 
-        group.remove_user(user.username)
-        await self.group_service.create_or_update_group(group)
+        async with self.unit_of_work.transaction():
+            await self.group_service.remove_member(group_name, user.username)
 
-        await self.sms_service.send_sms(
-            from_phone_number=group_phone_number,
-            to_phone_number=user.phone_number,
-            message=f"You have left the group '{group_name}'."
-        )
+            await self.sms_service.send_sms(
+                from_phone_number=group_phone_number,
+                to_phone_number=user.phone_number,
+                message=f"You have left the group '{group_name}'."
+            )
+        self.phone_number_allocator.release(user.username, group_phone_number)
+
+        if self.routing_cache is not None:
+            self.routing_cache.invalidate_group(group_name)
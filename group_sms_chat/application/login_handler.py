@@ -0,0 +1,27 @@
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.session import SessionToken, SessionTokens
+from group_sms_chat.domain.user import Username, UserPassword
+
+
+class LoginHandler:
+    def __init__(self, validate_user: ValidateUserPasswordHandler, session_tokens: SessionTokens) -> None:
+        """
+        Initialize the LoginHandler.
+
+        :param validate_user: An instance of ValidateUserPasswordHandler to check the credentials.
+        :param session_tokens: An instance of SessionTokens to issue the session tokens.
+        """
+        self.validate_user = validate_user
+        self.session_tokens = session_tokens
+
+    async def handle(self, username: Username, password: UserPassword) -> SessionToken:
+        """
+        Check the credentials of a user and issue a session token for the following requests.
+
+        :param username: Username of the user.
+        :param password: Password of the user.
+        :return: The session token.
+        :raises UserInvalidCredentialsError: If the username does not exist or the password is incorrect.
+        """
+        user = await self.validate_user.handle(username, password)
+        return self.session_tokens.issue(user)
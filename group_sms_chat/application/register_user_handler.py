@@ -1,17 +1,27 @@
-from group_sms_chat.domain.user import User
+from group_sms_chat.domain.password_hasher import PasswordHasher
+from group_sms_chat.domain.user import PhoneNumber, User, Username, UserPassword
 from group_sms_chat.domain.user_repository import UserRepository
 
 
 class RegisterUserHandler:
-    def __init__(self, user_repository: UserRepository) -> None:
+    def __init__(self, user_repository: UserRepository, password_hasher: PasswordHasher) -> None:
         self.user_repository = user_repository
+        self.password_hasher = password_hasher
 
-    async def handle(self, new_user: User) -> None:
+    async def handle(self, username: Username, phone_number: PhoneNumber, password: UserPassword) -> User:
         """
         Handle the registration of a new user.
-        :param new_user: The user to be registered.
-        :return: None
+        :param username: The username of the new user.
+        :param phone_number: The phone number of the new user.
+        :param password: The password of the new user. Only its hash is stored.
+        :return: The registered user.
         :raises UserAlreadyExistsError: If a user with the same username already exists.
         :raises PhoneNumberAlreadyExistsError: If a user with the same phone number already exists.
         """
+        new_user = User(
+            username=username,
+            phone_number=phone_number,
+            hashed_password=await self.password_hasher.hash(password)
+        )
         await self.user_repository.add_user(new_user)
+        return new_user
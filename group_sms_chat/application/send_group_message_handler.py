@@ -1,44 +1,154 @@
-from group_sms_chat.domain.exceptions import PhoneNotFoundError
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import partial
+
+from group_sms_chat.domain.exceptions import MessageTooLongError, PhoneNotFoundError
 from group_sms_chat.domain.group_repository import GroupRepository
-from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.domain.message_route import MessageRecipient, MessageRoute
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator
+from group_sms_chat.domain.routing_cache import RoutingCache
+from group_sms_chat.domain.sms_encoding import SMSEncoding, SMSSegments, count_segments, to_gsm7
+from group_sms_chat.domain.sms_service import SMSMessage, SMSService
 from group_sms_chat.domain.user import PhoneNumber
 from group_sms_chat.domain.user_repository import UserRepository
 
 
+@dataclass(frozen=True)
+class ComposedMessage:
+    """
+    The text a group message is sent to the members with, and the SMS segments it takes.
+    """
+
+    text: str
+    segments: SMSSegments
+
+
+@dataclass(frozen=True)
+class FanOutResult:
+    """
+    Summary of the delivery of a group message to the members of the group.
+    """
+
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
 class SendGroupMessageHandler:
     def __init__(self, user_repository: UserRepository,
                  group_repository: GroupRepository,
-                 sms_service: SMSService) -> None:
+                 sms_service: SMSService, *,
+                 max_concurrency: int = 10,
+                 routing_cache: RoutingCache | None = None,
+                 phone_number_allocator: PhoneNumberAllocator | None = None,
+                 normalize_to_gsm7: bool = False,
+                 max_segments: int | None = None) -> None:
+        """
+        Initialize the SendGroupMessageHandler.
+
+        :param user_repository: An instance of UserRepository to manage user data.
+        :param group_repository: An instance of GroupRepository to manage group data.
+        :param sms_service: An instance of SMSService to deliver the messages.
+        :param max_concurrency: Maximum number of members a single message is delivered to at the same time.
+        :param routing_cache: Cache of the message routes, so the messages of busy groups do not query the database.
+        :param phone_number_allocator: Allocator of the group numbers, told about the messages sent from each one.
+        :param normalize_to_gsm7: Whether to replace the characters that force a message to UCS-2, such as curly
+            quotes, with the GSM-7 ones they look like, when that is enough for the message to fit GSM-7.
+        :param max_segments: Maximum number of SMS segments of a message. Longer messages are rejected.
+        """
         self.user_repository = user_repository
         self.group_repository = group_repository
         self.sms_service = sms_service
+        self.max_concurrency = max_concurrency
+        self.routing_cache = routing_cache
+        self.phone_number_allocator = phone_number_allocator
+        self.normalize_to_gsm7 = normalize_to_gsm7
+        self.max_segments = max_segments
 
-    async def handle(self, user_number: PhoneNumber, group_number: PhoneNumber, message: str) -> None:
+    async def handle(self, user_number: PhoneNumber, group_number: PhoneNumber, message: str) -> FanOutResult:
         """
         Handle sending a group message.
+        A failure delivering the message to one member does not prevent the delivery to the others.
         :param user_number: The phone number of the sender.
         :param group_number: The phone number of the group.
         :param message: The message to be sent.
-        :return: None
-
+        :return: How many members the message was sent to, failed for or skipped.
+        :raises PhoneNotFoundError: If the sender or the group cannot be found.
+        :raises MessageTooLongError: If the message takes more SMS segments than allowed.
         """
-        user = await self.user_repository.get_user_by_phone_number(user_number)
-        if user is None:
-            raise PhoneNotFoundError(user_number)
+        route = await self.route(user_number, group_number)
+        return await self.fan_out(route, self.compose(route, message))
 
-        group = await self.group_repository.get_user_group_by_user_and_phone(user.username, group_number)
-        if group is None:
+    async def route(self, user_number: PhoneNumber, group_number: PhoneNumber) -> MessageRoute:
+        """
+        Find the sender, the group and the recipients of a message.
+        :param user_number: The phone number of the sender.
+        :param group_number: The phone number of the group.
+        :return: The route of the message.
+        :raises PhoneNotFoundError: If the sender or the group cannot be found.
+        """
+        load_route = partial(self.group_repository.get_message_route, user_number, group_number)
+        if self.routing_cache is not None:
+            route = await self.routing_cache.get_or_load(user_number, group_number, load_route)
+        else:
+            route = await load_route()
+        if route is None:
+            if await self.user_repository.get_user_by_phone_number(user_number) is None:
+                raise PhoneNotFoundError(user_number)
             raise PhoneNotFoundError(group_number)
+        return route
 
-        new_message = f"{user.username}: {message}"
-        for group_user in group.users:
-            if group_user.username == user.username:
-                continue
+    def compose(self, route: MessageRoute, message: str) -> ComposedMessage:
+        """
+        Build the text a message is sent to the members with, prefixed with the username of the sender.
+        :param route: The route of the message.
+        :param message: The message sent by the user.
+        :return: The text and the SMS segments it takes.
+        :raises MessageTooLongError: If the message takes more SMS segments than allowed.
+        """
+        text = f"{route.sender}: {message}"
+        segments = count_segments(text)
+        if self.normalize_to_gsm7 and segments.encoding is SMSEncoding.UCS_2:
+            normalized = to_gsm7(text)
+            if normalized is not None:
+                text, segments = normalized, count_segments(normalized)
+        if self.max_segments is not None and segments.count > self.max_segments:
+            raise MessageTooLongError(segments.count, self.max_segments)
+        return ComposedMessage(text=text, segments=segments)
 
-            sending_user = await self.user_repository.get_user(group_user.username)
-            if sending_user is None:
-                continue
+    async def fan_out(self, route: MessageRoute, message: ComposedMessage) -> FanOutResult:
+        """
+        Send a message to the recipients of its route, in a single bulk send.
+        A failure delivering the message to one member does not prevent the delivery to the others.
+        :param route: The route of the message.
+        :param message: The message to be sent, as composed for the route.
+        :return: How many members the message was sent to, failed for or skipped.
+        """
+        return await self.deliver([(recipient, message.text) for recipient in route.recipients])
+
+    async def deliver(self, deliveries: Sequence[tuple[MessageRecipient, str]]) -> FanOutResult:
+        """
+        Send a text to each recipient from the number they use for the group, in a single bulk send.
+        Recipients without a registered user are skipped.
+        :param deliveries: The recipients and the text each one is sent.
+        :return: How many texts were sent, failed or skipped.
+        """
+        sendable = [
+            (recipient, SMSMessage(from_phone_number=recipient.group_phone_number,
+                                   to_phone_number=recipient.phone_number,
+                                   message=text))
+            for recipient, text in deliveries if recipient.phone_number is not None
+        ]
+        results = await self.sms_service.send_bulk([sms for _, sms in sendable],
+                                                   max_concurrency=self.max_concurrency)
 
-            await self.sms_service.send_sms(from_phone_number=group_user.user_group_phone_number,
-                                            to_phone_number=sending_user.phone_number,
-                                            message=new_message)
+        sent = 0
+        for (recipient, _), result in zip(sendable, results, strict=True):
+            if not result.sent:
+                logging.error(f"Failed to send group message to {recipient.username}: {result.error}")
+                continue
+            sent += 1
+            if self.phone_number_allocator is not None:
+                self.phone_number_allocator.record_sent(recipient.group_phone_number)
+        return FanOutResult(sent=sent, failed=len(results) - sent, skipped=len(deliveries) - len(sendable))
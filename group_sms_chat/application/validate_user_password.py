@@ -1,4 +1,5 @@
 from group_sms_chat.domain.exceptions import UserInvalidCredentialsError
+from group_sms_chat.domain.password_hasher import PasswordHasher
 from group_sms_chat.domain.user import User, Username, UserPassword
 from group_sms_chat.domain.user_repository import UserRepository
 
@@ -8,16 +9,19 @@ class ValidateUserPasswordHandler:
     Handler for validating user credentials.
     """
 
-    def __init__(self, user_repository: UserRepository) -> None:
+    def __init__(self, user_repository: UserRepository, password_hasher: PasswordHasher) -> None:
         """
         Initialize the handler with a user repository.
         :param user_repository: An instance of UserRepository to interact with user data.
+        :param password_hasher: An instance of PasswordHasher to verify the passwords.
         """
         self.user_repository = user_repository
+        self.password_hasher = password_hasher
 
     async def handle(self, username: Username, password: UserPassword) -> User:
         """
         Validate the user's password against the stored credentials.
+        If the stored hash is a legacy one or uses another work factor, it is replaced by a new hash of the password.
         :param username: Username of the user to validate.
         :param password: Password of the user to validate.
         :return: User object if credentials are valid.
@@ -27,6 +31,10 @@ class ValidateUserPasswordHandler:
         if not user:
             raise UserInvalidCredentialsError(username)
 
-        if user.check_password(password):
-            return user
-        raise UserInvalidCredentialsError(username)
+        if not await self.password_hasher.verify(password, user.hashed_password):
+            raise UserInvalidCredentialsError(username)
+
+        if self.password_hasher.needs_rehash(user.hashed_password):
+            user = user.model_copy(update={"hashed_password": await self.password_hasher.hash(password)})
+            await self.user_repository.update_password(user.username, user.hashed_password)
+        return user
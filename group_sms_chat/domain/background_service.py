@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+
+class BackgroundService(ABC):
+    """
+    A component that runs in the background while the application is serving requests.
+    """
+
+    @abstractmethod
+    async def start(self) -> None:
+        """
+        Start the service. It is called once when the application starts.
+        """
+        ...
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """
+        Stop the service and wait for its pending work. It is called once when the application shuts down.
+        """
+        ...
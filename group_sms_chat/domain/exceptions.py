@@ -40,3 +40,28 @@ class UserNotInGroupError(Exception):
 class PhoneNotFoundError(Exception):
     def __init__(self, phone_number: PhoneNumber) -> None:
         super().__init__(f"Phone number '{phone_number}' not found.")
+
+
+class MessageTooLongError(Exception):
+    def __init__(self, segments: int, max_segments: int) -> None:
+        super().__init__(f"Message takes {segments} SMS segments, more than the maximum of {max_segments}.")
+
+
+class SMSDeliveryError(Exception):
+    def __init__(self, phone_number: PhoneNumber, reason: str) -> None:
+        super().__init__(f"SMS to '{phone_number}' could not be delivered: {reason}")
+
+
+class GroupAlreadyExistsError(Exception):
+    def __init__(self, group_name: GroupName) -> None:
+        super().__init__(f"Group '{group_name}' already exists.")
+
+
+class UserAlreadyInGroupError(Exception):
+    def __init__(self, username: Username, group_name: GroupName) -> None:
+        super().__init__(f"User '{username}' is already a member of the group '{group_name}'.")
+
+
+class InvalidSessionTokenError(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Invalid session token: {reason}")
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field, RootModel
+from collections.abc import Iterable, Iterator, Mapping, MutableSet
+from typing import Annotated, Any, Self
+
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, RootModel
 
 from group_sms_chat.domain.user import PhoneNumber, Username
 
@@ -10,17 +13,155 @@ class GroupName(RootModel[str]):
         return str(self.root)
 
 
-class GroupUser(BaseModel):
-    username: Username
-    user_group_phone_number: PhoneNumber
+class GroupUser:
+    """
+    Member of a group and the phone number they use for it.
+    It is a slotted class that keeps the already validated strings instead of a model, because large groups keep
+    thousands of them in memory.
+    """
+
+    __slots__ = ("_phone_number", "_username")
+
+    def __init__(self, username: Username, user_group_phone_number: PhoneNumber) -> None:
+        self._username = username.root
+        self._phone_number = user_group_phone_number.root
+
+    @classmethod
+    def from_trusted(cls, username: str, user_group_phone_number: str) -> "GroupUser":
+        """
+        Create a member from strings that were validated before, like the ones read from the database,
+        without building a model for each of them. It must not be used with any other input.
+
+        :param username: The username of the member.
+        :param user_group_phone_number: The phone number the member uses for the group.
+        """
+        member = cls.__new__(cls)
+        member._username = username
+        member._phone_number = user_group_phone_number
+        return member
+
+    @property
+    def username(self) -> Username:
+        return Username.model_construct(self._username)
+
+    @property
+    def user_group_phone_number(self) -> PhoneNumber:
+        return PhoneNumber.model_construct(self._phone_number)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GroupUser):
+            return NotImplemented
+        return self._username == other._username and self._phone_number == other._phone_number
 
     def __hash__(self) -> int:
-        return hash(str(self.username) + str(self.user_group_phone_number))
+        return hash((self._username, self._phone_number))
+
+    def __repr__(self) -> str:
+        return f"GroupUser(username={self._username!r}, user_group_phone_number={self._phone_number!r})"
+
+
+def _validate_member(value: Any) -> GroupUser:
+    if not isinstance(value, Mapping) or "username" not in value or "user_group_phone_number" not in value:
+        message = "A group member must have a username and a user_group_phone_number"
+        raise ValueError(message)
+    return GroupUser(username=Username(root=value["username"]),
+                     user_group_phone_number=PhoneNumber(root=value["user_group_phone_number"]))
+
+
+class GroupMembers(MutableSet[GroupUser]):
+    """
+    Set of the members of a group, indexed by username, so finding, adding and removing a member does not depend
+    on the size of the group. A group has one member per username: adding a member again replaces their phone number.
+    """
+
+    __slots__ = ("_by_username",)
+
+    def __init__(self, members: Iterable[GroupUser] = ()) -> None:
+        self._by_username = {member._username: member for member in members}
+
+    def get(self, username: Username) -> GroupUser | None:
+        """
+        :return: The member with the given username, or None if there is none.
+        """
+        return self._by_username.get(str(username))
+
+    def discard_username(self, username: Username) -> None:
+        """
+        Remove the member with the given username, if there is one.
+        """
+        self._by_username.pop(str(username), None)
+
+    def add(self, value: GroupUser) -> None:
+        self._by_username[value._username] = value
+
+    def discard(self, value: GroupUser) -> None:
+        if self._by_username.get(value._username) == value:
+            del self._by_username[value._username]
+
+    def __contains__(self, value: object) -> bool:
+        return isinstance(value, GroupUser) and self._by_username.get(value._username) == value
+
+    def __iter__(self) -> Iterator[GroupUser]:
+        return iter(self._by_username.values())
+
+    def __len__(self) -> int:
+        return len(self._by_username)
+
+    def __eq__(self, other: object) -> bool:
+        # Equal to any set of the same members, like a set
+        if isinstance(other, GroupMembers):
+            return self._by_username == other._by_username
+        return super().__eq__(other)
+
+    # Mutable, like a set
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"GroupMembers({list(self._by_username.values())!r})"
+
+    @classmethod
+    def validate(cls, value: Any) -> "GroupMembers":
+        """
+        Build the members of a group from a collection of members, or of dicts with their username and phone number.
+        """
+        try:
+            members = iter(value)
+        except TypeError as e:
+            message = "Group members must be a collection of members"
+            raise ValueError(message) from e
+        # Always a new index, so a validated group does not share its members with its input
+        return cls(member if isinstance(member, GroupUser) else _validate_member(member) for member in members)
+
+    def serialize(self) -> list[dict[str, str]]:
+        """
+        :return: The username and the phone number of each member.
+        """
+        return [{"username": member._username, "user_group_phone_number": member._phone_number} for member in self]
+
+
+class GroupSummary(BaseModel):
+    name: GroupName
+    member_count: int
 
 
 class Group(BaseModel):
     name: GroupName
-    users: set[GroupUser] = Field(default_factory=set)
+    users: Annotated[GroupMembers, PlainValidator(GroupMembers.validate),
+                     PlainSerializer(GroupMembers.serialize)] = Field(default_factory=GroupMembers)
+
+    def __init__(self, *, users: Iterable[GroupUser] = (), **data: Any) -> None:
+        """
+        Initialize the Group.
+
+        :param users: The members of the group.
+        """
+        super().__init__(users=users, **data)
+
+    def __copy__(self) -> Self:
+        # A shallow copy gets its own members, so changing them does not change the original group
+        copied = super().__copy__()
+        copied.__dict__["users"] = GroupMembers(self.users)
+        return copied
 
     def get_user_phone_number(self, username: Username) -> PhoneNumber | None:
         """
@@ -29,10 +170,8 @@ class Group(BaseModel):
         :param username: The UUID of the user.
         :return: The phone number of the user or None if the user is not in the group.
         """
-        for user in self.users:
-            if user.username == username:
-                return user.user_group_phone_number
-        return None
+        user = self.users.get(username)
+        return user.user_group_phone_number if user is not None else None
 
     def add_user(self, user: Username, phone_number: PhoneNumber) -> None:
         """
@@ -41,10 +180,7 @@ class Group(BaseModel):
         :param user: The username of the user to add to the group.
         :param phone_number: The phone number of the user to add to the group.
         """
-        self.users.add(GroupUser(
-            username=user,
-            user_group_phone_number=phone_number
-        ))
+        self.users.add(GroupUser(username=user, user_group_phone_number=phone_number))
 
     def remove_user(self, username: Username) -> None:
         """
@@ -52,4 +188,4 @@ class Group(BaseModel):
 
         :param username: The username of the user to remove from the group.
         """
-        self.users = {user for user in self.users if user.username != username}
+        self.users.discard_username(username)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
-from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.group import Group, GroupName, GroupSummary
+from group_sms_chat.domain.message_route import MessageRoute
 from group_sms_chat.domain.user import PhoneNumber, Username
 
 
@@ -14,6 +15,41 @@ class GroupRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    async def create_group(self, group_name: GroupName, username: Username, phone_number: PhoneNumber) -> None:
+        """
+        Create a group with its first member.
+
+        :param group_name: The name of the group.
+        :param username: The username of the member who creates the group.
+        :param phone_number: The phone number the user uses for the group.
+        :raises GroupAlreadyExistsError: If a group with the same name already exists.
+        """
+        ...
+
+    @abstractmethod
+    async def add_member(self, group_name: GroupName, username: Username, phone_number: PhoneNumber) -> None:
+        """
+        Add a user to a group. The group is created if it has no members yet.
+
+        :param group_name: The name of the group.
+        :param username: The username of the new member.
+        :param phone_number: The phone number the user uses for the group.
+        :raises UserAlreadyInGroupError: If the user is already a member of the group.
+        """
+        ...
+
+    @abstractmethod
+    async def remove_member(self, group_name: GroupName, username: Username) -> None:
+        """
+        Remove a user from a group. The group is deleted when its last member leaves.
+
+        :param group_name: The name of the group.
+        :param username: The username of the member to remove.
+        :raises UserNotInGroupError: If the user is not a member of the group.
+        """
+        ...
+
     @abstractmethod
     async def get_group(self, group_name: GroupName) -> Group | None:
         """
@@ -24,14 +60,37 @@ class GroupRepository(ABC):
         ...
 
     @abstractmethod
-    async def find_groups_by_name(self, name: GroupName) -> list[Group]:
+    async def find_groups_by_name(
+            self, name: GroupName,
+            limit: int | None = None,
+            after: GroupName | None = None
+    ) -> list[Group]:
         """
         Find groups by their name. The search is case-insensitive and matches any part of the name.
+        The groups are sorted by name.
         :param name: The name of the group to search for.
+        :param limit: The maximum number of groups to return, or None to return all of them.
+        :param after: Only return the groups whose name comes after this one, to get the next page of results.
         :return: A list of groups that match the name.
         """
         ...
 
+    @abstractmethod
+    async def find_group_summaries_by_name(
+            self, name: GroupName,
+            limit: int | None = None,
+            after: GroupName | None = None
+    ) -> list[GroupSummary]:
+        """
+        Find groups by their name like find_groups_by_name, but return their number of members
+        instead of loading every member.
+        :param name: The name of the group to search for.
+        :param limit: The maximum number of groups to return, or None to return all of them.
+        :param after: Only return the groups whose name comes after this one, to get the next page of results.
+        :return: A list of summaries of the groups that match the name.
+        """
+        ...
+
     @abstractmethod
     async def find_user_groups(self, username: Username) -> list[Group]:
         """
@@ -55,3 +114,26 @@ class GroupRepository(ABC):
         :return: The group if found, otherwise None.
         """
         ...
+
+    @abstractmethod
+    async def get_message_route(
+            self, user_phone_number: PhoneNumber,
+            group_phone_number: PhoneNumber
+    ) -> MessageRoute | None:
+        """
+        Resolve the sender, the group and the recipients of a message sent by a user to a group number.
+
+        :param user_phone_number: The personal phone number of the sender.
+        :param group_phone_number: The phone number the sender uses for the group.
+        :return: The route of the message, or None if the sender or the group cannot be found.
+        """
+        ...
+
+    @abstractmethod
+    async def count_members_by_phone_number(self) -> list[tuple[PhoneNumber, int]]:
+        """
+        Count the memberships that use each group number.
+
+        :return: Every group number in use, with the number of members that use it.
+        """
+        ...
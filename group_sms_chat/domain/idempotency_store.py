@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+
+class IdempotencyStore(ABC):
+    """
+    Keys of the requests already processed, such as the SIDs of the incoming Twilio messages,
+    so a request delivered again is not processed twice. Keys are forgotten after a time to live.
+    """
+
+    @abstractmethod
+    async def add(self, key: str) -> bool:
+        """
+        Record the key of a request.
+
+        :param key: The key of the request.
+        :return: True if the key is new, False if it was already recorded.
+        """
+        ...
+
+    @abstractmethod
+    async def discard(self, key: str) -> None:
+        """
+        Forget the key of a request that failed, so it is processed again when it is retried.
+
+        :param key: The key of the request.
+        """
+        ...
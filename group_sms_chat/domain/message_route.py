@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+
+class MessageRecipient(BaseModel):
+    username: Username
+    # None when the member no longer has a registered user
+    phone_number: PhoneNumber | None
+    group_phone_number: PhoneNumber
+
+
+class MessageRoute(BaseModel):
+    """
+    Everything needed to deliver a message sent by a user to one of their groups.
+    """
+
+    sender: Username
+    group_name: GroupName
+    recipients: list[MessageRecipient]
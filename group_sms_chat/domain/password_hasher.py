@@ -0,0 +1,40 @@
+from abc import ABC, abstractmethod
+
+from group_sms_chat.domain.user import HashedPassword, UserPassword
+
+
+class PasswordHasher(ABC):
+    """
+    Hashes and verifies passwords with a slow, salted key derivation function, without blocking the event loop.
+    """
+
+    @abstractmethod
+    async def hash(self, password: UserPassword) -> HashedPassword:
+        """
+        Hash a password with a new random salt and the current work factor.
+
+        :param password: The plain text password.
+        :return: The hashed password.
+        """
+        ...
+
+    @abstractmethod
+    async def verify(self, password: UserPassword, hashed_password: HashedPassword) -> bool:
+        """
+        Check a password against a hash, including the legacy unsalted ones.
+
+        :param password: The plain text password.
+        :param hashed_password: The stored hash.
+        :return: True if the password matches, False otherwise.
+        """
+        ...
+
+    @abstractmethod
+    def needs_rehash(self, hashed_password: HashedPassword) -> bool:
+        """
+        Check whether a hash should be replaced, because it is a legacy one or it uses another work factor.
+
+        :param hashed_password: The stored hash.
+        :return: True if the password should be hashed again the next time it is known.
+        """
+        ...
@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+
+from pydantic import BaseModel
+
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+
+class PhoneNumberLoad(BaseModel):
+    phone_number: PhoneNumber
+    members: int
+    messages_per_minute: float
+
+
+class PhoneNumberAllocator(ABC):
+    """
+    Hands out the group numbers of the users. A user reaches each of their groups through a different number,
+    so the number of groups a user can be in is limited by the number of group numbers.
+    The handlers release the number of a user when they leave a group, or all of them when the user is deleted,
+    and report the messages sent from each number, so the new members are spread over the least loaded numbers.
+    """
+
+    @abstractmethod
+    async def allocate(self, username: Username) -> PhoneNumber:
+        """
+        Reserve the least loaded group number the user does not use for any other group.
+        It must be confirmed once the user is added to the group, or released if they are not.
+
+        :param username: The username of the user joining a group.
+        :return: The reserved phone number.
+        :raises MaximumNumberOfGroupsReachedError: If the user already uses every group number.
+        """
+        ...
+
+    @abstractmethod
+    def confirm(self, username: Username, phone_number: PhoneNumber) -> None:
+        """
+        Tell the allocator the membership that uses a reserved group number was saved.
+
+        :param username: The username of the user.
+        :param phone_number: The reserved group number.
+        """
+        ...
+
+    @abstractmethod
+    def release(self, username: Username, phone_number: PhoneNumber) -> None:
+        """
+        Make a group number available again for the user, after they left the group that used it or were not
+        added to the group it was reserved for.
+
+        :param username: The username of the user.
+        :param phone_number: The group number to release.
+        """
+        ...
+
+    @abstractmethod
+    def release_user(self, username: Username) -> None:
+        """
+        Forget the group numbers of a user, after the user was deleted.
+        The numbers of the groups the user was in must have been released first.
+
+        :param username: The username of the deleted user.
+        """
+        ...
+
+    @abstractmethod
+    def record_sent(self, phone_number: PhoneNumber, count: int = 1) -> None:
+        """
+        Count the messages sent from a group number.
+
+        :param phone_number: The group number the messages were sent from.
+        :param count: The number of messages.
+        """
+        ...
+
+    @abstractmethod
+    async def load(self) -> list[PhoneNumberLoad]:
+        """
+        Get the load of every group number, in the order they are provided by the SMS service.
+
+        :return: The number of members and the recent messages per minute of each group number.
+        """
+        ...
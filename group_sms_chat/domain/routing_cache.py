@@ -0,0 +1,66 @@
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.message_route import MessageRoute
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+
+class RoutingCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class RoutingCache(ABC):
+    """
+    Cache of the routes of the messages sent by users to their group numbers.
+    The handlers that change the members of a group or delete a user invalidate the affected routes.
+    """
+
+    @abstractmethod
+    async def get_or_load(
+            self, user_phone_number: PhoneNumber,
+            group_phone_number: PhoneNumber,
+            load: Callable[[], Awaitable[MessageRoute | None]]
+    ) -> MessageRoute | None:
+        """
+        Get the cached route of a message, or load and cache it if it is not cached.
+        Missing routes are not cached.
+
+        :param user_phone_number: The personal phone number of the sender.
+        :param group_phone_number: The phone number the sender uses for the group.
+        :param load: Function that loads the route when it is not cached.
+        :return: The route of the message, or None if the sender or the group cannot be found.
+        """
+        ...
+
+    @abstractmethod
+    def invalidate_group(self, group_name: GroupName) -> None:
+        """
+        Remove the cached routes of the messages sent to a group, after its members changed.
+
+        :param group_name: The name of the group.
+        """
+        ...
+
+    @abstractmethod
+    def invalidate_user(self, username: Username) -> None:
+        """
+        Remove the cached routes of the messages sent by a user, after the user changed or was deleted.
+
+        :param username: The username of the sender.
+        """
+        ...
+
+    @abstractmethod
+    def stats(self) -> RoutingCacheStats:
+        """
+        Get the size and the hit, miss, eviction and invalidation counters of the cache.
+        """
+        ...
@@ -0,0 +1,60 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+from pydantic import BaseModel
+
+from group_sms_chat.domain.user import HashedPassword, User, Username
+
+
+class SessionToken(BaseModel):
+    """
+    A token issued to a user after logging in, to authenticate the following requests.
+    """
+
+    token: str
+    expires_at: float
+
+
+class Session(BaseModel):
+    """
+    The content of a valid session token.
+    """
+
+    username: Username
+    password_fingerprint: str
+    expires_at: float
+
+
+def password_fingerprint(hashed_password: HashedPassword) -> str:
+    """
+    Get a short fingerprint of a hashed password, stored in the session tokens so that they stop being valid
+    when the password changes, without revealing the hash.
+    """
+    return hashlib.sha256(str(hashed_password).encode("utf-8")).hexdigest()[:16]
+
+
+class SessionTokens(ABC):
+    """
+    Issues and verifies session tokens without any storage, so verifying a token does not need the database.
+    """
+
+    @abstractmethod
+    def issue(self, user: User) -> SessionToken:
+        """
+        Issue a new session token for a user.
+
+        :param user: The user who logged in.
+        :return: The session token.
+        """
+        ...
+
+    @abstractmethod
+    def verify(self, token: str) -> Session:
+        """
+        Check that a session token was issued by this service and has not expired.
+
+        :param token: The session token.
+        :return: The session stored in the token.
+        :raises InvalidSessionTokenError: If the token is malformed, forged or expired.
+        """
+        ...
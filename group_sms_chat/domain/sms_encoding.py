@@ -0,0 +1,125 @@
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+
+# GSM 03.38 default alphabet, and its extension table whose characters take two septets
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENSION = frozenset("\f^{}\\[~]|€")
+
+# Characters typed by phones and keyboards in place of GSM-7 ones
+LOOK_ALIKES = {
+    # Curly and low quotes, prime, grave and acute accents
+    **dict.fromkeys("\u2018\u2019\u201a\u201b\u2032`\u00b4", "'"),
+    # Curly, low and angle double quotes, double prime
+    **dict.fromkeys("\u201c\u201d\u201e\u201f\u2033\u00ab\u00bb", '"'),
+    # Hyphens, dashes and minus sign
+    **dict.fromkeys("\u2010\u2011\u2012\u2013\u2014\u2015\u2212", "-"),
+    # Tab, no-break and typographic spaces
+    **dict.fromkeys("\t\u00a0\u2002\u2003\u2009\u200a\u202f", " "),
+    # Ellipsis, bullet and lowercase c cedilla, only uppercase in GSM-7
+    "\u2026": "...",
+    "\u2022": "-",
+    "\u00e7": "\u00c7",
+}
+
+# Septets of a single segment, and of each segment of a concatenated message, whose header takes the rest
+GSM7_SINGLE_SEGMENT = 160
+GSM7_CONCATENATED_SEGMENT = 153
+# The same in UTF-16 code units
+UCS2_SINGLE_SEGMENT = 70
+UCS2_CONCATENATED_SEGMENT = 67
+# Characters after it take a surrogate pair in UTF-16
+BMP_LAST_CODE_POINT = 0xFFFF
+
+
+class SMSEncoding(StrEnum):
+    GSM_7 = "GSM-7"
+    UCS_2 = "UCS-2"
+
+
+@dataclass(frozen=True)
+class SMSSegments:
+    """
+    How a text is sent as SMS: its encoding, its length in that encoding and the number of segments it takes.
+    """
+
+    encoding: SMSEncoding
+    # Septets with GSM-7, UTF-16 code units with UCS-2
+    length: int
+    count: int
+
+
+def _count(sizes: list[int], single_segment: int, concatenated_segment: int) -> int:
+    if sum(sizes) <= single_segment:
+        return 1
+    # A character is never split across two segments
+    count, used = 1, 0
+    for size in sizes:
+        if used + size > concatenated_segment:
+            count += 1
+            used = 0
+        used += size
+    return count
+
+
+def _gsm7_sizes(text: Iterable[str]) -> list[int] | None:
+    sizes = []
+    for character in text:
+        if character in GSM7_BASIC:
+            sizes.append(1)
+        elif character in GSM7_EXTENSION:
+            sizes.append(2)
+        else:
+            return None
+    return sizes
+
+
+def count_segments(text: str) -> SMSSegments:
+    """
+    Count the segments an SMS text takes. It is sent with GSM-7 when every character is in the GSM-7 alphabet,
+    and with UCS-2 otherwise, which fits less than half as many characters in each segment.
+
+    :param text: The text of the message.
+    :return: The encoding, the length and the number of segments of the text.
+    """
+    sizes = _gsm7_sizes(text)
+    if sizes is not None:
+        return SMSSegments(SMSEncoding.GSM_7, sum(sizes),
+                           _count(sizes, GSM7_SINGLE_SEGMENT, GSM7_CONCATENATED_SEGMENT))
+    # Characters outside of the Basic Multilingual Plane, such as emojis, take two code units
+    sizes = [2 if ord(character) > BMP_LAST_CODE_POINT else 1 for character in text]
+    return SMSSegments(SMSEncoding.UCS_2, sum(sizes), _count(sizes, UCS2_SINGLE_SEGMENT, UCS2_CONCATENATED_SEGMENT))
+
+
+def _to_gsm7_character(character: str) -> str | None:
+    if character in GSM7_BASIC or character in GSM7_EXTENSION:
+        return character
+    replacement = LOOK_ALIKES.get(character)
+    if replacement is not None:
+        return replacement
+    # Accented letters and compatibility forms, such as "á" or full-width digits, without their marks
+    decomposed = "".join(c for c in unicodedata.normalize("NFKD", character) if not unicodedata.combining(c))
+    if decomposed and _gsm7_sizes(decomposed) is not None:
+        return decomposed
+    return None
+
+
+def to_gsm7(text: str) -> str | None:
+    """
+    Replace the characters of a text that are not in the GSM-7 alphabet with the ones they look like,
+    such as curly quotes with straight ones or accented letters with unaccented ones.
+
+    :param text: The text of the message.
+    :return: The text with only GSM-7 characters, or None if some character has no GSM-7 look-alike.
+    """
+    characters = []
+    for character in text:
+        replacement = _to_gsm7_character(character)
+        if replacement is None:
+            return None
+        characters.append(replacement)
+    return "".join(characters)
@@ -0,0 +1,113 @@
+from abc import ABC, abstractmethod
+from collections.abc import Collection, Sequence
+
+from pydantic import BaseModel
+
+from group_sms_chat.domain.sms_service import SMSMessage
+from group_sms_chat.domain.user import PhoneNumber
+
+
+class OutboxMessage(BaseModel):
+    """
+    An SMS message waiting in the outbox to be delivered.
+    """
+
+    id: int
+    from_phone_number: PhoneNumber
+    to_phone_number: PhoneNumber
+    message: str
+    attempts: int
+
+
+class OutboxStats(BaseModel):
+    pending: int
+    in_flight: int
+    failed: int
+    oldest_pending_age_seconds: float | None
+
+
+class SMSOutbox(ABC):
+    """
+    Durable queue of the SMS messages that have to be delivered.
+    """
+
+    @abstractmethod
+    async def enqueue(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        """
+        Add a message to the outbox. It is delivered as soon as possible.
+
+        :param from_phone_number: The phone number from which the SMS is sent.
+        :param to_phone_number: The phone number to which the SMS is sent.
+        :param message: The content of the SMS message.
+        """
+        ...
+
+    @abstractmethod
+    async def enqueue_many(self, messages: Sequence[SMSMessage]) -> None:
+        """
+        Add several messages to the outbox at once, all of them or none.
+
+        :param messages: The messages to enqueue.
+        """
+        ...
+
+    @abstractmethod
+    async def wait_for_messages(self, timeout: float) -> None:
+        """
+        Wait until a new message is enqueued or the timeout expires.
+
+        :param timeout: Maximum number of seconds to wait.
+        """
+        ...
+
+    @abstractmethod
+    async def claim(self, limit: int, exclude_senders: Collection[PhoneNumber] = ()) -> list[OutboxMessage]:
+        """
+        Mark pending messages whose next attempt is due as in flight and return them.
+        The messages are all sent from the same number: the one of the oldest due message, so the messages of a
+        number can be paced without holding back the others.
+        A claimed message is not returned again until it is retried or recovered.
+
+        :param limit: Maximum number of messages to claim.
+        :param exclude_senders: Numbers whose messages are not claimed, such as the ones already being sent.
+        :return: The claimed messages, oldest first, with their attempt counter already increased.
+        """
+        ...
+
+    @abstractmethod
+    async def mark_sent(self, message_id: int) -> None:
+        """
+        Remove a delivered message from the outbox.
+
+        :param message_id: The id of the message.
+        """
+        ...
+
+    @abstractmethod
+    async def mark_failed(self, message_id: int, error: str, retry_in: float | None) -> None:
+        """
+        Record a failed delivery attempt.
+
+        :param message_id: The id of the message.
+        :param error: Description of the failure.
+        :param retry_in: Seconds until the next attempt, or None to give up on the message.
+        """
+        ...
+
+    @abstractmethod
+    async def recover_in_flight(self) -> int:
+        """
+        Make the messages left in flight by a previous run pending again.
+
+        :return: The number of recovered messages.
+        """
+        ...
+
+    @abstractmethod
+    async def stats(self) -> OutboxStats:
+        """
+        Get the size and age of the outbox.
+
+        :return: The number of messages in each state and the age of the oldest pending message.
+        """
+        ...
@@ -1,8 +1,48 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass
 
 from group_sms_chat.domain.user import PhoneNumber
 
 
+@dataclass(frozen=True)
+class SMSMessage:
+    from_phone_number: PhoneNumber
+    to_phone_number: PhoneNumber
+    message: str
+
+
+@dataclass(frozen=True)
+class SMSSendResult:
+    """
+    Outcome of one of the messages of a bulk send.
+    """
+
+    message: SMSMessage
+    # Why the message could not be sent, None when it was sent
+    error: str | None = None
+
+    @property
+    def sent(self) -> bool:
+        return self.error is None
+
+    @staticmethod
+    def of(message: SMSMessage, outcome: BaseException | None) -> "SMSSendResult":
+        """
+        Create the result of a message from what sending it returned or raised.
+
+        :param message: The message.
+        :param outcome: The exception raised while sending the message, None if it was sent.
+        :raises BaseException: If the exception is not an Exception, such as a cancellation.
+        """
+        if outcome is None:
+            return SMSSendResult(message)
+        if not isinstance(outcome, Exception):
+            raise outcome
+        return SMSSendResult(message, error=str(outcome))
+
+
 class SMSService(ABC):
 
     @abstractmethod
@@ -29,3 +69,24 @@ class SMSService(ABC):
         :param message: The content of the SMS message.
         """
         ...
+
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        """
+        Send a batch of SMS messages, such as the fan-out of a group message.
+        A message that cannot be sent does not prevent the others from being sent.
+        By default the messages are sent with send_sms, concurrently; services that can do better override it.
+
+        :param messages: The messages to send.
+        :param max_concurrency: Maximum number of messages sent at the same time.
+        :return: The outcome of each message, in the same order as the messages.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def send(message: SMSMessage) -> None:
+            async with semaphore:
+                await self.send_sms(from_phone_number=message.from_phone_number,
+                                    to_phone_number=message.to_phone_number,
+                                    message=message.message)
+
+        outcomes = await asyncio.gather(*(send(message) for message in messages), return_exceptions=True)
+        return [SMSSendResult.of(message, outcome) for message, outcome in zip(messages, outcomes, strict=True)]
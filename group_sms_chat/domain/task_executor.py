@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+
+
+class TaskExecutor(ABC):
+    """
+    Runs work in the background, so the caller does not wait for it to finish.
+    """
+
+    @abstractmethod
+    async def submit(self, task: Callable[[], Awaitable[object]]) -> None:
+        """
+        Schedule a task to run in the background. It waits while the executor has no room for more tasks,
+        so a caller faster than the executor is slowed down instead of piling up work.
+
+        :param task: Function that returns the awaitable to run.
+        """
+        ...
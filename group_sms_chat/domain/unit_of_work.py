@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+
+
+class UnitOfWork(ABC):
+
+    @abstractmethod
+    def transaction(self) -> AbstractAsyncContextManager[None]:
+        """
+        Open a transaction. Every change made through the repositories and the outbox inside it is
+        committed together when the context exits, or discarded if it raises an exception.
+        """
+        ...
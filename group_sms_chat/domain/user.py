@@ -25,16 +25,28 @@ class UserPassword(RootModel[str]):
 
 
 class HashedPassword(RootModel[str]):
-    root: str = Field(min_length=128, max_length=128, pattern=r"^[a-zA-Z0-9./]+$")
+    """
+    A password hash, either "scrypt$<cost>$<r>$<p>$<salt>$<hash>" or, for the users registered before salted hashes
+    were introduced, the hexadecimal unsalted SHA-512 of the password.
+    """
+
+    root: str = Field(min_length=64, max_length=256, pattern=r"^[a-zA-Z0-9./$_-]+$")
 
     def __str__(self) -> str:
         return str(self.root)
 
+    @property
+    def is_legacy(self) -> bool:
+        """
+        Whether it is an unsalted SHA-512 hash, which should be replaced by a salted one.
+        """
+        return "$" not in self.root
+
     @classmethod
     def from_string(cls, password: UserPassword) -> "HashedPassword":
         """
-        Create a HashedPassword instance from a string.
-        This is useful for converting raw password strings into hashed passwords.
+        Create a legacy unsalted SHA-512 HashedPassword from a password.
+        New passwords are hashed with a PasswordHasher instead.
         """
         return cls(root=hashlib.sha512(str(password).encode("utf-8")).hexdigest())
 
@@ -47,12 +59,3 @@ class User(BaseModel):
     username: Username
     phone_number: PhoneNumber
     hashed_password: HashedPassword
-
-    def check_password(self, password: UserPassword) -> bool:
-        """
-        Check if the provided password matches the user's hashed password.
-
-        :param password: The plain text password to check.
-        :return: True if the password matches, False otherwise.
-        """
-        return self.hashed_password == HashedPassword.from_string(password)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from collections.abc import Collection
 
-from group_sms_chat.domain.user import PhoneNumber, User, Username
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username
 
 
 class UserRepository(ABC):
@@ -18,6 +19,13 @@ class UserRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    async def get_users(self, usernames: Collection[Username]) -> list[User]:
+        """
+        Retrieve several users by their usernames. Usernames that do not exist are ignored.
+        """
+        ...
+
     @abstractmethod
     async def get_user_by_phone_number(self, phone_number: PhoneNumber) -> User | None:
         """
@@ -25,6 +33,13 @@ class UserRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    async def update_password(self, username: Username, hashed_password: HashedPassword) -> None:
+        """
+        Replace the hashed password of a user.
+        """
+        ...
+
     @abstractmethod
     async def delete_user(self, username: Username) -> None:
         """
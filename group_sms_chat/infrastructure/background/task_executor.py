@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from group_sms_chat.domain.background_service import BackgroundService
+from group_sms_chat.domain.task_executor import TaskExecutor
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+
+
+class BoundedTaskExecutor(TaskExecutor, BackgroundService):
+    """
+    Pool of asyncio workers that run the submitted tasks in the background.
+
+    The queue of tasks is bounded, so when the workers fall behind the callers wait for room instead of piling up
+    work without limit. On stop, the queued and running tasks are drained before the workers are cancelled.
+    Tasks submitted while the executor is not running are run by the caller.
+    """
+
+    def __init__(self, *, name: str = "background",
+                 workers: int = 10,
+                 max_queued: int = 1000,
+                 drain_timeout: float = 30.0,
+                 metrics: MetricsRegistry | None = None) -> None:
+        """
+        Initialize the BoundedTaskExecutor.
+
+        :param name: The name of the executor in the logs and the metrics.
+        :param workers: Number of tasks run at the same time.
+        :param max_queued: Maximum number of tasks waiting for a worker.
+        :param drain_timeout: Seconds to wait on stop for the pending tasks to finish before cancelling them.
+        :param metrics: Registry where the backlog of the executor and the time tasks wait in the queue are measured.
+        """
+        self.name = name
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self._queue: asyncio.Queue[tuple[Callable[[], Awaitable[object]], float]] = asyncio.Queue(max_queued)
+        self._running = 0
+        self._tasks: list[asyncio.Task[None]] = []
+        self._queue_wait = None
+        if metrics is not None:
+            metrics.gauge("background_tasks_backlog", "Tasks queued or running in a background executor",
+                          labels=("executor",)).set_function(lambda: self.backlog, name)
+            self._queue_wait = metrics.histogram("background_task_queue_seconds",
+                                                 "Time a task waits for a worker of a background executor",
+                                                 labels=("executor",))
+
+    @property
+    def backlog(self) -> int:
+        """
+        Number of tasks waiting for a worker or running.
+        """
+        return self._queue.qsize() + self._running
+
+    async def submit(self, task: Callable[[], Awaitable[object]]) -> None:
+        if not self._tasks:
+            await task()
+            return
+        await self._queue.put((task, time.perf_counter()))
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work(), name=f"{self.name}-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except TimeoutError:
+            logging.warning(f"Cancelled {self.backlog} tasks of the {self.name} executor that did not finish "
+                            f"within {self.drain_timeout} seconds")
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _work(self) -> None:
+        while True:
+            task, queued_at = await self._queue.get()
+            self._running += 1
+            try:
+                if self._queue_wait is not None:
+                    self._queue_wait.observe(time.perf_counter() - queued_at, self.name)
+                await task()
+            except Exception:
+                logging.exception(f"Background task of the {self.name} executor failed")
+            finally:
+                self._running -= 1
+                self._queue.task_done()
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from group_sms_chat.domain.idempotency_store import IdempotencyStore
+
+
+class CachedIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency store that keeps the most recent keys in a bounded in-memory LRU cache in front of another store,
+    so the duplicates of recent requests are recognized without querying it.
+
+    A key is cached before the other store is queried, so a duplicate delivered while the original is being
+    recorded is recognized too.
+    """
+
+    def __init__(self, store: IdempotencyStore, ttl: float = 86_400.0, max_size: int = 10_000,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the CachedIdempotencyStore.
+
+        :param store: The store the keys are recorded in.
+        :param ttl: Seconds a key is kept in the cache. It should not exceed the time to live of the store.
+        :param max_size: Maximum number of cached keys. The least recently used ones are evicted first.
+        :param clock: Monotonic clock returning seconds.
+        """
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._expires_at: OrderedDict[str, float] = OrderedDict()
+
+    async def add(self, key: str) -> bool:
+        now = self.clock()
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at > now:
+            self._expires_at.move_to_end(key)
+            self.hits += 1
+            return False
+
+        self.misses += 1
+        self._expires_at[key] = now + self.ttl
+        self._expires_at.move_to_end(key)
+        if len(self._expires_at) > self.max_size:
+            self._expires_at.popitem(last=False)
+        try:
+            return await self.store.add(key)
+        except BaseException:
+            # The request may be retried, so it must not be taken for a duplicate
+            self._expires_at.pop(key, None)
+            raise
+
+    async def discard(self, key: str) -> None:
+        self._expires_at.pop(key, None)
+        await self.store.discard(key)
@@ -0,0 +1,190 @@
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from group_sms_chat.domain.exceptions import MaximumNumberOfGroupsReachedError
+from group_sms_chat.domain.group_repository import GroupRepository
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator, PhoneNumberLoad
+from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+
+class BitmapPhoneNumberAllocator(PhoneNumberAllocator):
+    """
+    In-memory allocator that keeps the group numbers used by each user as a bitmap, with one bit per number
+    in the order given by the SMS service.
+
+    A user gets the free number with the lowest load, which adds the share of the memberships that use it to
+    the share of the messages recently sent from it. The memberships of each number are counted in the repository
+    once, and then kept up to date by the allocations and the releases. The messages sent are decayed exponentially,
+    so only the recent ones matter.
+
+    The bitmap of a user is loaded from the groups of the user the first time it is needed, and the least
+    recently used ones are dropped once there are too many. The bitmap of a user with a reserved number that is not
+    confirmed or released yet is never dropped: the reservation is not in the database yet, so the number would be
+    handed out again once the bitmap is loaded back. Changes made by other processes are not seen, so every process
+    must run the handlers that change the groups through the same allocator.
+    """
+
+    def __init__(self, group_repository: GroupRepository, sms_service: SMSService, max_users: int = 10_000,
+                 sent_half_life: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the BitmapPhoneNumberAllocator.
+
+        :param group_repository: Repository the numbers used by a user are loaded from.
+        :param sms_service: SMS service that provides the group numbers.
+        :param max_users: Maximum number of users whose used numbers are kept in memory.
+        :param sent_half_life: Seconds after which a sent message counts half as much in the load of its number.
+        :param clock: Monotonic clock returning seconds.
+        """
+        self.group_repository = group_repository
+        self.sms_service = sms_service
+        self.max_users = max_users
+        self.sent_half_life = sent_half_life
+        self.clock = clock
+        self._phone_numbers: list[PhoneNumber] | None = None
+        self._slots: dict[str, int] = {}
+        self._members: list[int] = []
+        self._sent: list[float] = []
+        self._sent_at: list[float] = []
+        self._used: OrderedDict[str, int] = OrderedDict()
+        # Slots reserved by each user and not confirmed or released yet
+        self._reserved: dict[str, set[int]] = {}
+        self._releases = 0
+
+    async def allocate(self, username: Username) -> PhoneNumber:
+        phone_numbers = await self._get_phone_numbers()
+        key = str(username)
+        used = self._used.get(key)
+        if used is None:
+            used = await self._load(username)
+        self._used[key] = used
+        self._used.move_to_end(key)
+
+        free = ~used & ((1 << len(phone_numbers)) - 1)
+        if not free:
+            self._evict()
+            raise MaximumNumberOfGroupsReachedError(username=username, max_number=len(phone_numbers))
+
+        slot = self._least_loaded(free)
+        self._used[key] = used | (1 << slot)
+        self._reserved.setdefault(key, set()).add(slot)
+        self._members[slot] += 1
+        self._evict()
+        return phone_numbers[slot]
+
+    def confirm(self, username: Username, phone_number: PhoneNumber) -> None:
+        slot = self._slots.get(str(phone_number))
+        if slot is not None:
+            self._resolve(str(username), slot)
+
+    def release(self, username: Username, phone_number: PhoneNumber) -> None:
+        self._releases += 1
+        slot = self._slots.get(str(phone_number))
+        if slot is None:
+            return
+        self._members[slot] = max(self._members[slot] - 1, 0)
+        key = str(username)
+        self._resolve(key, slot)
+        used = self._used.get(key)
+        if used is not None:
+            self._used[key] = used & ~(1 << slot)
+
+    def release_user(self, username: Username) -> None:
+        self._releases += 1
+        self._used.pop(str(username), None)
+        self._reserved.pop(str(username), None)
+
+    def record_sent(self, phone_number: PhoneNumber, count: int = 1) -> None:
+        slot = self._slots.get(str(phone_number))
+        if slot is not None:
+            now = self.clock()
+            self._sent[slot] = self._decayed_sent(slot, now) + count
+            self._sent_at[slot] = now
+
+    async def load(self) -> list[PhoneNumberLoad]:
+        phone_numbers = await self._get_phone_numbers()
+        now = self.clock()
+        # The decayed count of messages is the rate multiplied by the mean lifetime of a message in it
+        mean_lifetime = self.sent_half_life / math.log(2)
+        return [
+            PhoneNumberLoad(
+                phone_number=phone_number,
+                members=self._members[slot],
+                messages_per_minute=self._decayed_sent(slot, now) / mean_lifetime * 60,
+            )
+            for slot, phone_number in enumerate(phone_numbers)
+        ]
+
+    def _resolve(self, key: str, slot: int) -> None:
+        reserved = self._reserved.get(key)
+        if reserved is not None:
+            reserved.discard(slot)
+            if not reserved:
+                del self._reserved[key]
+
+    def _evict(self) -> None:
+        # The least recently used bitmaps without reservations go first
+        while len(self._used) > self.max_users:
+            key = next((key for key in self._used if key not in self._reserved), None)
+            if key is None:
+                break
+            del self._used[key]
+
+    def _least_loaded(self, free: int) -> int:
+        now = self.clock()
+        sent = [self._decayed_sent(slot, now) for slot in range(len(self._sent))]
+        # At least one, so a few messages that are almost decayed do not outweigh the members
+        total_members = max(sum(self._members), 1)
+        total_sent = max(sum(sent), 1.0)
+
+        best_slot, best_load = -1, math.inf
+        while free:
+            slot = (free & -free).bit_length() - 1
+            free &= free - 1
+            load = self._members[slot] / total_members + sent[slot] / total_sent
+            # Ties go to the first number, in the order of the SMS service
+            if load < best_load:
+                best_slot, best_load = slot, load
+        return best_slot
+
+    def _decayed_sent(self, slot: int, now: float) -> float:
+        return self._sent[slot] * 0.5 ** ((now - self._sent_at[slot]) / self.sent_half_life)
+
+    async def _get_phone_numbers(self) -> list[PhoneNumber]:
+        if self._phone_numbers is None:
+            phone_numbers = await self.sms_service.available_phone_numbers()
+            members = await self.group_repository.count_members_by_phone_number()
+            # Another call may have initialized the allocator while loading
+            if self._phone_numbers is None:
+                self._slots = {str(phone_number): slot for slot, phone_number in enumerate(phone_numbers)}
+                self._members = [0] * len(phone_numbers)
+                for phone_number, count in members:
+                    slot = self._slots.get(str(phone_number))
+                    if slot is not None:
+                        self._members[slot] = count
+                self._sent = [0.0] * len(phone_numbers)
+                self._sent_at = [self.clock()] * len(phone_numbers)
+                self._phone_numbers = phone_numbers
+        return self._phone_numbers
+
+    async def _load(self, username: Username) -> int:
+        while True:
+            releases = self._releases
+            groups = await self.group_repository.find_user_groups(username)
+            key = str(username)
+            if key in self._used:
+                # Another allocation for the same user loaded it first, and may have reserved a number since
+                return self._used[key]
+            # A number released while loading may still be in use in the loaded groups
+            if releases == self._releases:
+                break
+
+        used = 0
+        for group in groups:
+            phone_number = group.get_user_phone_number(username)
+            slot = self._slots.get(str(phone_number)) if phone_number is not None else None
+            if slot is not None:
+                used |= 1 << slot
+        return used
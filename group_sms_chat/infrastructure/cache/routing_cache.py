@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.message_route import MessageRoute
+from group_sms_chat.domain.routing_cache import RoutingCache, RoutingCacheStats
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+type RouteKey = tuple[str, str]
+
+
+class LRURoutingCache(RoutingCache):
+    """
+    In-memory routing cache that evicts the least recently used routes once it is full.
+
+    The routes are indexed by group and by sender, so an invalidation only removes the affected ones.
+    Changes made by other processes are not seen, so every process serving the webhook must be the one
+    running the handlers that change the groups.
+    """
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        """
+        Initialize the LRURoutingCache.
+
+        :param max_size: Maximum number of cached routes.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._routes: OrderedDict[RouteKey, MessageRoute] = OrderedDict()
+        self._keys_by_group: dict[str, set[RouteKey]] = {}
+        self._keys_by_sender: dict[str, set[RouteKey]] = {}
+
+    async def get_or_load(
+            self, user_phone_number: PhoneNumber,
+            group_phone_number: PhoneNumber,
+            load: Callable[[], Awaitable[MessageRoute | None]]
+    ) -> MessageRoute | None:
+        key = (str(user_phone_number), str(group_phone_number))
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+            self.hits += 1
+            return route
+
+        self.misses += 1
+        invalidations = self.invalidations
+        route = await load()
+        # A route loaded while the cache was being invalidated may already be stale
+        if route is not None and invalidations == self.invalidations:
+            self._add(key, route)
+        return route
+
+    def invalidate_group(self, group_name: GroupName) -> None:
+        self.invalidations += 1
+        for key in self._keys_by_group.pop(str(group_name), set()):
+            self._remove(key)
+
+    def invalidate_user(self, username: Username) -> None:
+        self.invalidations += 1
+        for key in self._keys_by_sender.pop(str(username), set()):
+            self._remove(key)
+
+    def stats(self) -> RoutingCacheStats:
+        return RoutingCacheStats(
+            size=len(self._routes),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+        )
+
+    def _add(self, key: RouteKey, route: MessageRoute) -> None:
+        self._remove(key)
+        self._routes[key] = route
+        self._keys_by_group.setdefault(str(route.group_name), set()).add(key)
+        self._keys_by_sender.setdefault(str(route.sender), set()).add(key)
+        if len(self._routes) > self.max_size:
+            self._remove(next(iter(self._routes)))
+            self.evictions += 1
+
+    def _remove(self, key: RouteKey) -> None:
+        route = self._routes.pop(key, None)
+        if route is None:
+            return
+        for index, name in ((self._keys_by_group, str(route.group_name)), (self._keys_by_sender, str(route.sender))):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Collection
+
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username
+from group_sms_chat.domain.user_repository import UserRepository
+
+
+class CachedUserRepository(UserRepository):
+    """
+    User repository that keeps the users retrieved by username in a bounded in-memory cache,
+    so authenticating a request does not query the database every time.
+
+    Updating or deleting a user through this repository evicts it immediately. Changes made by other processes
+    are only seen once the cached entry expires.
+    """
+
+    def __init__(self, repository: UserRepository, ttl: float = 60.0, max_size: int = 10_000,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the CachedUserRepository.
+
+        :param repository: The repository the users are read from and written to.
+        :param ttl: Seconds a user is kept in the cache.
+        :param max_size: Maximum number of cached users. The least recently used ones are evicted first.
+        :param clock: Monotonic clock returning seconds.
+        """
+        self.repository = repository
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._users: OrderedDict[str, tuple[User, float]] = OrderedDict()
+        # Incremented on every eviction, so a lookup that raced with one does not cache a stale user
+        self._evictions = 0
+
+    async def add_user(self, user: User) -> None:
+        await self.repository.add_user(user)
+
+    async def get_user(self, username: Username) -> User | None:
+        key = str(username)
+        entry = self._users.get(key)
+        if entry is not None:
+            cached_user, expires_at = entry
+            if expires_at > self.clock():
+                self._users.move_to_end(key)
+                self.hits += 1
+                return cached_user
+            del self._users[key]
+
+        self.misses += 1
+        evictions = self._evictions
+        user = await self.repository.get_user(username)
+        if user is not None and evictions == self._evictions:
+            self._users[key] = (user, self.clock() + self.ttl)
+            if len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+        return user
+
+    async def get_users(self, usernames: Collection[Username]) -> list[User]:
+        return await self.repository.get_users(usernames)
+
+    async def get_user_by_phone_number(self, phone_number: PhoneNumber) -> User | None:
+        return await self.repository.get_user_by_phone_number(phone_number)
+
+    async def update_password(self, username: Username, hashed_password: HashedPassword) -> None:
+        await self.repository.update_password(username, hashed_password)
+        self.evict(username)
+
+    async def delete_user(self, username: Username) -> None:
+        await self.repository.delete_user(username)
+        self.evict(username)
+
+    def evict(self, username: Username) -> None:
+        """
+        Remove a user from the cache, so the next lookup reads it from the repository.
+
+        :param username: The username of the user.
+        """
+        self._evictions += 1
+        self._users.pop(str(username), None)
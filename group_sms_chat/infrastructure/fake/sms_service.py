@@ -0,0 +1,52 @@
+import asyncio
+from collections.abc import Collection
+from dataclasses import dataclass
+
+from group_sms_chat.domain.exceptions import SMSDeliveryError
+from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.domain.user import PhoneNumber
+
+
+@dataclass(frozen=True)
+class SentSMS:
+    from_phone_number: PhoneNumber
+    to_phone_number: PhoneNumber
+    message: str
+
+
+class FakeSMSService(SMSService):
+    """
+    SMS service that keeps the sent messages in memory instead of delivering them.
+    It can simulate the latency and the failures of a real provider, which makes it useful for tests and benchmarks.
+    """
+
+    def __init__(self, phone_numbers: list[str], latency: float = 0.0,
+                 failing_phone_numbers: Collection[str] = ()) -> None:
+        """
+        Initialize the FakeSMSService.
+
+        :param phone_numbers: The phone numbers that can be used to send SMS messages.
+        :param latency: Seconds each call to send_sms waits before recording the message.
+        :param failing_phone_numbers: Recipients for which send_sms raises SMSDeliveryError.
+        """
+        self._phone_numbers = [PhoneNumber(root=num) for num in phone_numbers]
+        self.latency = latency
+        self.failing_phone_numbers = set(failing_phone_numbers)
+        self.sent_messages: list[SentSMS] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def available_phone_numbers(self) -> list[PhoneNumber]:
+        return list(self._phone_numbers)
+
+    async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if str(to_phone_number) in self.failing_phone_numbers:
+                raise SMSDeliveryError(to_phone_number, reason="simulated failure")
+            self.sent_messages.append(SentSMS(from_phone_number, to_phone_number, message))
+        finally:
+            self.in_flight -= 1
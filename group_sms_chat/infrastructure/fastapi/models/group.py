@@ -7,3 +7,8 @@ from group_sms_chat.domain.user import Username
 class Group(BaseModel):
     name: GroupName
     users: list[Username]
+
+
+class GroupSummary(BaseModel):
+    name: GroupName
+    member_count: int
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class OutboxStatus(BaseModel):
+    pending: int
+    in_flight: int
+    failed: int
+    oldest_pending_age_seconds: float | None
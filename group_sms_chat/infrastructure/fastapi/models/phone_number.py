@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class PhoneNumberLoadStatus(BaseModel):
+    phone_number: str
+    members: int
+    messages_per_minute: float
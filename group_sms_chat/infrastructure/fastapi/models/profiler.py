@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class ProfilerStatusResponse(BaseModel):
+    remaining_requests: int
+    in_flight_requests: int
+    samples: int
+    last_profile: str | None
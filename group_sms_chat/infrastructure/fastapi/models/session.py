@@ -0,0 +1,16 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from group_sms_chat.domain.user import Username, UserPassword
+
+
+class LoginRequest(BaseModel):
+    username: Username
+    password: UserPassword
+
+
+class LoginResponse(BaseModel):
+    access_token: str
+    token_type: Literal["bearer"] = "bearer"
+    expires_at: float
@@ -0,0 +1,41 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+from group_sms_chat.infrastructure.metrics.registry import Histogram
+from group_sms_chat.infrastructure.metrics.tracing import record_span
+
+
+class Handler(Protocol):
+    handle: Callable[..., Awaitable[Any]]
+
+
+class InstrumentedHandler:
+    """
+    Handler that measures every call of another handler, labelled with the name of the handler and whether the call
+    returned or raised. The call is also added to the trace of the request, if any.
+    """
+
+    def __init__(self, handler: Handler, histogram: Histogram, name: str) -> None:
+        """
+        Initialize the InstrumentedHandler.
+
+        :param handler: The handler that handles the calls.
+        :param histogram: Histogram with the handler and outcome labels.
+        :param name: The name of the handler in the metric.
+        """
+        self.handler = handler
+        self.histogram = histogram
+        self.name = name
+
+    async def handle(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await self.handler.handle(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            self.histogram.observe(elapsed, self.name, outcome)
+            record_span(f"handler.{self.name}", elapsed)
@@ -0,0 +1,41 @@
+import time
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that measures the latency of the HTTP requests by method, route and status code.
+    The route is the path template, such as /groups/{group_name}/users/, so the number of label values
+    stays bounded. Requests that match no route are labelled as unmatched.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: MetricsRegistry) -> None:
+        self.app = app
+        self.duration = metrics.histogram("http_request_duration_seconds", "Time taken to answer an HTTP request",
+                                          labels=("method", "route", "status"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = route.path if isinstance(route, BaseRoute) and hasattr(route, "path") else "unmatched"
+            self.duration.observe(time.perf_counter() - start, scope["method"], path, str(status))
@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import logging
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from types import FrameType
+
+from group_sms_chat.domain.background_service import BackgroundService
+
+_profile_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class ProfilerStatus:
+    remaining_requests: int
+    in_flight_requests: int
+    samples: int
+    last_profile: str | None
+
+
+def _collapse(thread_name: str, frame: FrameType | None) -> str:
+    functions = []
+    while frame is not None:
+        code = frame.f_code
+        functions.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    functions.append(thread_name)
+    return ";".join(function.replace(";", ",") for function in reversed(functions))
+
+
+class SamplingProfiler(BackgroundService):
+    """
+    Statistical profiler that samples the stacks of every thread at a fixed interval while the requests it is
+    armed for are being handled. Once they finish, the samples are written to a file in the collapsed stack
+    format read by flame graph tools such as flamegraph.pl or speedscope.
+
+    Sampling runs in its own thread and only while a profiled request is in flight, so an idle profiler costs
+    nothing and the requests that are not profiled are not slowed down.
+    """
+
+    def __init__(self, output_dir: str, interval: float = 0.005, requests: int = 0, max_requests: int = 1000) -> None:
+        """
+        Initialize the SamplingProfiler.
+
+        :param output_dir: Directory where the profiles are written.
+        :param interval: Seconds between two samples.
+        :param requests: Number of requests to profile from the start of the application.
+        :param max_requests: Maximum number of requests the profiler can be armed for at once, so arming it again
+            and again does not keep it sampling indefinitely.
+        """
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.max_requests = max_requests
+        self._lock = threading.Lock()
+        self._remaining = min(requests, max_requests)
+        self._in_flight = 0
+        self._profiled = 0
+        self._samples: Counter[str] = Counter()
+        self._last_profile: str | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def arm(self, requests: int) -> None:
+        """
+        Profile the next requests, in addition to the ones the profiler is already armed for, up to the maximum.
+
+        :param requests: Number of requests to profile.
+        """
+        with self._lock:
+            self._remaining = min(self._remaining + requests, self.max_requests)
+
+    def status(self) -> ProfilerStatus:
+        with self._lock:
+            return ProfilerStatus(remaining_requests=self._remaining, in_flight_requests=self._in_flight,
+                                  samples=self._samples.total(), last_profile=self._last_profile)
+
+    def request_started(self) -> bool:
+        """
+        Tell the profiler a request starts.
+
+        :return: Whether the request is profiled, in which case request_finished must be called when it finishes.
+        """
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            self._in_flight += 1
+            self._profiled += 1
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+                self._thread.start()
+            return True
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            await asyncio.to_thread(thread.join)
+
+    def _sample(self) -> None:
+        own_thread = threading.get_ident()
+        while True:
+            stopped = self._stopped.wait(self.interval)
+            with self._lock:
+                if stopped or (self._in_flight == 0 and self._remaining == 0):
+                    # Taken under the lock, so a request armed from now on starts a new sampling thread
+                    samples, self._samples = self._samples, Counter()
+                    requests, self._profiled = self._profiled, 0
+                    self._thread = None
+                    break
+                if self._in_flight == 0:
+                    continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [_collapse(names.get(thread_id, str(thread_id)), frame)
+                      for thread_id, frame in sys._current_frames().items() if thread_id != own_thread]
+            with self._lock:
+                self._samples.update(stacks)
+        if samples:
+            self._write(samples, requests)
+
+    def _write(self, samples: Counter[str], requests: int) -> None:
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+        path = self.output_dir / f"profile-{timestamp}-{next(_profile_ids)}.folded"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()),
+                            encoding="utf-8")
+        except OSError:
+            logging.exception(f"Failed to write the profile of {requests} requests to {path}")
+            return
+        logging.info(f"Wrote the profile of {requests} requests, {samples.total()} samples, to {path}")
+        with self._lock:
+            self._last_profile = str(path)
@@ -0,0 +1,210 @@
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+
+# Seconds, from a cached lookup to a slow fan-out
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """
+    Metric with a value for each combination of label values.
+    The values can be updated from any thread: the database queries are measured in the threads they run on.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        """
+        :return: The lines of the metric in the Prometheus text exposition format.
+        """
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}",
+                *self._render_samples()]
+
+    @abstractmethod
+    def _render_samples(self) -> list[str]:
+        """
+        :return: The lines of the samples of the metric, without its HELP and TYPE lines.
+        """
+        ...
+
+
+class Counter(Metric):
+    """
+    Metric whose values only grow. They are incremented, or read from functions when the metrics are rendered
+    for the counts kept by another component.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def set_function(self, function: Callable[[], float], *label_values: str) -> None:
+        with self._lock:
+            self._functions[label_values] = function
+
+    def value(self, *label_values: str) -> float:
+        function = self._functions.get(label_values)
+        return function() if function is not None else self._values.get(label_values, 0.0)
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+            functions = list(self._functions.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                for key, value in [*values, *((key, function()) for key, function in functions)]]
+
+
+class Gauge(Metric):
+    """
+    Metric whose values are read from functions when the metrics are rendered, such as the size of a queue.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], *label_values: str) -> None:
+        with self._lock:
+            self._functions[label_values] = function
+
+    def value(self, *label_values: str) -> float:
+        function = self._functions.get(label_values)
+        return function() if function is not None else 0.0
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            functions = list(self._functions.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(function())}"
+                for key, function in functions]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # For each combination of label values: the observations in each bucket (the last one is +Inf) and their sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry is not None else 0
+
+    def sum(self, *label_values: str) -> float:
+        entry = self._values.get(label_values)
+        return entry[1][0] if entry is not None else 0.0
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines = []
+        bucket_labels = (*self.labels, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, (*key, _format_value(bound)))} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters, gauges and histograms, rendered in the Prometheus text exposition format.
+    Registering a metric that already exists returns the existing one, so several components can share it.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        """
+        Register a counter, or return the one already registered with the same name.
+
+        :param name: The name of the metric.
+        :param documentation: The description of the metric.
+        :param labels: The names of the labels of the metric.
+        """
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        """
+        Register a gauge, or return the one already registered with the same name.
+
+        :param name: The name of the metric.
+        :param documentation: The description of the metric.
+        :param labels: The names of the labels of the metric.
+        """
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Register a histogram, or return the one already registered with the same name.
+
+        :param name: The name of the metric.
+        :param documentation: The description of the metric.
+        :param labels: The names of the labels of the metric.
+        :param buckets: The upper bounds of the buckets. A last +Inf bucket is always added.
+        """
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """
+        :return: Every metric in the Prometheus text exposition format.
+        """
+        return "".join(line + "\n" for metric in self._metrics.values() for line in metric.render())
+
+    def _register[M: Metric](self, metric: M) -> M:
+        existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric) or existing.labels != metric.labels:
+            message = f"Metric {metric.name} is already registered with another type or labels"
+            raise ValueError(message)
+        return existing  # type: ignore[return-value]
@@ -0,0 +1,99 @@
+import time
+from collections.abc import Sequence
+from typing import override
+
+from group_sms_chat.domain.sms_service import SMSMessage, SMSSendResult, SMSService
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+from group_sms_chat.infrastructure.metrics.tracing import record_span
+
+
+class MeteredSMSService(SMSService):
+    """
+    SMS service that measures the latency and the outcome of the messages sent through another service,
+    by sender number. Bulk sends are handed to the other service as they are, so it can send them concurrently:
+    their outcomes are counted by sender number, and their duration is measured as a whole, for each sender number
+    of the batch. The outbox dispatcher claims the messages of a single sender number in each batch, so the duration
+    of its batches is the time taken to send them from that number.
+    """
+
+    def __init__(self, sms_service: SMSService, metrics: MetricsRegistry) -> None:
+        """
+        Initialize the MeteredSMSService.
+
+        :param sms_service: The service that sends the messages.
+        :param metrics: The registry of the sms_send_duration_seconds, sms_send_bulk_duration_seconds and
+            sms_messages_total metrics.
+        """
+        self.sms_service = sms_service
+        self.duration = metrics.histogram("sms_send_duration_seconds", "Time taken to send an SMS message",
+                                          labels=("from_phone_number",))
+        self.bulk_duration = metrics.histogram("sms_send_bulk_duration_seconds",
+                                               "Time taken to send a batch of SMS messages",
+                                               labels=("from_phone_number",))
+        self.messages = metrics.counter("sms_messages_total", "SMS messages sent, by outcome",
+                                        labels=("from_phone_number", "outcome"))
+
+    async def available_phone_numbers(self) -> list[PhoneNumber]:
+        return await self.sms_service.available_phone_numbers()
+
+    async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        sender = str(from_phone_number)
+        start = time.perf_counter()
+        try:
+            await self.sms_service.send_sms(from_phone_number=from_phone_number,
+                                            to_phone_number=to_phone_number,
+                                            message=message)
+        except Exception:
+            self.messages.inc(sender, "failed")
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - start, sender)
+        self.messages.inc(sender, "sent")
+
+    @override
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        start = time.perf_counter()
+        try:
+            results = await self.sms_service.send_bulk(messages, max_concurrency=max_concurrency)
+        finally:
+            duration = time.perf_counter() - start
+            for sender in dict.fromkeys(str(message.from_phone_number) for message in messages):
+                self.bulk_duration.observe(duration, sender)
+        for result in results:
+            self.messages.inc(str(result.message.from_phone_number), "sent" if result.sent else "failed")
+        return results
+
+
+class TracedSMSService(SMSService):
+    """
+    SMS service that adds the time taken by the messages sent through another service to the trace
+    of the request they are sent for.
+    """
+
+    def __init__(self, sms_service: SMSService) -> None:
+        """
+        Initialize the TracedSMSService.
+
+        :param sms_service: The service that sends the messages.
+        """
+        self.sms_service = sms_service
+
+    async def available_phone_numbers(self) -> list[PhoneNumber]:
+        return await self.sms_service.available_phone_numbers()
+
+    async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        start = time.perf_counter()
+        try:
+            await self.sms_service.send_sms(from_phone_number=from_phone_number,
+                                            to_phone_number=to_phone_number,
+                                            message=message)
+        finally:
+            record_span("sms.send_sms", time.perf_counter() - start)
+
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        start = time.perf_counter()
+        try:
+            return await self.sms_service.send_bulk(messages, max_concurrency=max_concurrency)
+        finally:
+            record_span("sms.send_bulk", time.perf_counter() - start)
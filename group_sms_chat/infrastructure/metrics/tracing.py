@@ -0,0 +1,109 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from group_sms_chat.infrastructure.metrics.profiler import SamplingProfiler
+
+
+class RequestTrace:
+    """
+    Time spent by a request in each kind of call, such as a handler, a repository method or an SMS service,
+    with the number of calls. Calls made concurrently are added up, so the total can exceed the request time.
+    """
+
+    __slots__ = ("_lock", "spans", "started_at")
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        # Name of the span: total seconds and number of calls
+        self.spans: dict[str, tuple[float, int]] = {}
+        # The database queries are recorded from the pool threads
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            total, calls = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, calls + 1)
+
+    def server_timing(self) -> str:
+        """
+        :return: The spans and the total time of the request as the value of a Server-Timing header.
+        """
+        with self._lock:
+            spans = list(self.spans.items())
+        entries = [f'{name};dur={total * 1000:.2f};desc="{calls} calls"' for name, (total, calls) in spans]
+        entries.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[RequestTrace | None] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> RequestTrace | None:
+    """
+    :return: The trace of the request being handled, or None outside of a request.
+    """
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace() -> Iterator[RequestTrace]:
+    """
+    Trace the calls made inside the context, including the ones of the tasks started from it.
+    """
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_span(name: str, seconds: float) -> None:
+    """
+    Add the time taken by a call to the trace of the request being handled, if any.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+class RequestTracingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request, optionally returning its spans in a Server-Timing header,
+    and tells the sampling profiler when the requests start and finish.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False, profiler: SamplingProfiler | None = None) -> None:
+        """
+        :param app: The ASGI application.
+        :param server_timing: Whether to add the Server-Timing header to the responses.
+        :param profiler: Profiler capturing the requests it is armed for.
+        """
+        self.app = app
+        self.server_timing = server_timing
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiled = self.profiler is not None and self.profiler.request_started()
+        try:
+            with start_trace() as trace:
+
+                async def send_with_server_timing(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+                    await send(message)
+
+                await self.app(scope, receive, send_with_server_timing if self.server_timing else send)
+        finally:
+            if profiled and self.profiler is not None:
+                self.profiler.request_finished()
@@ -0,0 +1,124 @@
+import asyncio
+import contextlib
+import logging
+
+from group_sms_chat.domain.background_service import BackgroundService
+from group_sms_chat.domain.sms_outbox import OutboxMessage, SMSOutbox
+from group_sms_chat.domain.sms_service import SMSMessage, SMSService
+from group_sms_chat.domain.user import PhoneNumber
+
+
+class SMSOutboxDispatcher(BackgroundService):
+    """
+    Pool of asyncio workers that deliver the messages of the outbox, retrying failed deliveries with an
+    exponential backoff. Each worker sends the messages it claims as one bulk send.
+
+    A worker claims the messages of a single sender number, and no other worker claims the messages of that number
+    until it is done, so a number paced by its rate limit holds a single worker and the messages sent from the other
+    numbers are not queued behind it.
+    """
+
+    def __init__(self, outbox: SMSOutbox, sms_service: SMSService, *,
+                 workers: int = 4,
+                 batch_size: int = 10,
+                 poll_interval: float = 1.0,
+                 max_attempts: int = 5,
+                 initial_backoff: float = 1.0,
+                 max_backoff: float = 300.0) -> None:
+        """
+        Initialize the SMSOutboxDispatcher.
+
+        :param outbox: The outbox to drain.
+        :param sms_service: The service that delivers the messages.
+        :param workers: Number of workers delivering messages concurrently.
+        :param batch_size: Maximum number of messages a worker claims, and sends concurrently, at once.
+        :param poll_interval: Seconds an idle worker waits before checking the outbox again.
+        :param max_attempts: Number of delivery attempts before a message is marked as failed.
+        :param initial_backoff: Seconds before the first retry. It doubles with every failed attempt.
+        :param max_backoff: Maximum number of seconds between two attempts.
+        """
+        self.outbox = outbox
+        self.sms_service = sms_service
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._tasks: list[asyncio.Task[None]] = []
+        # Numbers whose messages are being sent by a worker, and the lock the claims are made under so two workers
+        # do not claim the messages of the same number
+        self._busy_senders: set[str] = set()
+        self._claim_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        recovered = await self.outbox.recover_in_flight()
+        if recovered:
+            logging.warning(f"Recovered {recovered} SMS messages left in flight by a previous run")
+        self._tasks = [asyncio.create_task(self._work(), name=f"sms-outbox-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        # Messages claimed by a cancelled worker stay in flight and are recovered on the next start
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    async def drain(self) -> int:
+        """
+        Deliver the due messages of the outbox until there are none left.
+
+        :return: The number of processed messages.
+        """
+        processed = 0
+        while messages := await self._claim():
+            sender = str(messages[0].from_phone_number)
+            try:
+                await self._deliver(messages)
+            finally:
+                self._busy_senders.discard(sender)
+            processed += len(messages)
+        return processed
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Seconds to wait before the next attempt of a message that has failed the given number of times.
+        """
+        return min(self.initial_backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                if not await self.drain():
+                    await self.outbox.wait_for_messages(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("SMS outbox worker failed, retrying")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self) -> list[OutboxMessage]:
+        async with self._claim_lock:
+            messages = await self.outbox.claim(
+                self.batch_size, exclude_senders=[PhoneNumber(root=sender) for sender in self._busy_senders]
+            )
+            if messages:
+                self._busy_senders.add(str(messages[0].from_phone_number))
+            return messages
+
+    async def _deliver(self, messages: list[OutboxMessage]) -> None:
+        results = await self.sms_service.send_bulk(
+            [SMSMessage(from_phone_number=message.from_phone_number, to_phone_number=message.to_phone_number,
+                        message=message.message) for message in messages],
+            max_concurrency=self.batch_size
+        )
+        for message, result in zip(messages, results, strict=True):
+            if result.sent:
+                await self.outbox.mark_sent(message.id)
+                continue
+            retry_in = self.backoff(message.attempts) if message.attempts < self.max_attempts else None
+            logging.error(f"Failed to deliver SMS {message.id} to {message.to_phone_number} "
+                          f"(attempt {message.attempts}): {result.error}")
+            await self.outbox.mark_failed(message.id, error=str(result.error), retry_in=retry_in)
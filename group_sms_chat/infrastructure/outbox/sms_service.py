@@ -0,0 +1,45 @@
+import logging
+from collections.abc import Sequence
+from typing import override
+
+from group_sms_chat.domain.sms_outbox import SMSOutbox
+from group_sms_chat.domain.sms_service import SMSMessage, SMSSendResult, SMSService
+from group_sms_chat.domain.user import PhoneNumber
+
+
+class OutboxSMSService(SMSService):
+    """
+    SMS service that adds the messages to the outbox instead of sending them.
+    The messages are delivered later by SMSOutboxDispatcher through the delivery service.
+    """
+
+    def __init__(self, outbox: SMSOutbox, delivery_service: SMSService) -> None:
+        """
+        Initialize the OutboxSMSService.
+
+        :param outbox: The outbox where the messages are enqueued.
+        :param delivery_service: The service that delivers the messages, which owns the phone numbers.
+        """
+        self.outbox = outbox
+        self.delivery_service = delivery_service
+
+    async def available_phone_numbers(self) -> list[PhoneNumber]:
+        return await self.delivery_service.available_phone_numbers()
+
+    async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        await self.outbox.enqueue(from_phone_number=from_phone_number,
+                                  to_phone_number=to_phone_number,
+                                  message=message)
+
+    @override
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        """
+        Add every message to the outbox in a single transaction.
+        If the outbox cannot be written to, none of the messages is enqueued and they all fail.
+        """
+        try:
+            await self.outbox.enqueue_many(messages)
+        except Exception as e:
+            logging.exception(f"Failed to enqueue {len(messages)} SMS messages")
+            return [SMSSendResult(message, error=str(e)) for message in messages]
+        return [SMSSendResult(message) for message in messages]
@@ -0,0 +1,92 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from group_sms_chat.domain.background_service import BackgroundService
+from group_sms_chat.domain.password_hasher import PasswordHasher
+from group_sms_chat.domain.user import HashedPassword, UserPassword
+
+SCHEME = "scrypt"
+SALT_SIZE = 16
+KEY_SIZE = 32
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class ScryptPasswordHasher(PasswordHasher, BackgroundService):
+    """
+    Password hasher using scrypt, a salted and memory-hard key derivation function.
+
+    Hashing takes tens of milliseconds on purpose, so it runs in a dedicated thread pool.
+    Its size caps the number of passwords hashed at the same time, and with it the memory and CPU they use,
+    while the event loop keeps serving the other requests.
+    """
+
+    def __init__(self, cost: int = 14, block_size: int = 8, parallelization: int = 1, max_concurrency: int = 2) -> None:
+        """
+        Initialize the ScryptPasswordHasher.
+
+        :param cost: Base 2 logarithm of the scrypt CPU and memory cost. Each increment doubles the hashing time.
+        :param block_size: The scrypt block size.
+        :param parallelization: The scrypt parallelization factor.
+        :param max_concurrency: Maximum number of passwords hashed or verified at the same time.
+        """
+        self.cost = cost
+        self.block_size = block_size
+        self.parallelization = parallelization
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="password-hasher")
+
+    async def hash(self, password: UserPassword) -> HashedPassword:
+        salt = os.urandom(SALT_SIZE)
+        key = await self._derive(password, salt, self.cost, self.block_size, self.parallelization)
+        return HashedPassword(root="$".join([
+            SCHEME, str(self.cost), str(self.block_size), str(self.parallelization), _encode(salt), _encode(key)
+        ]))
+
+    async def verify(self, password: UserPassword, hashed_password: HashedPassword) -> bool:
+        if hashed_password.is_legacy:
+            return hmac.compare_digest(str(hashed_password), str(HashedPassword.from_string(password)))
+
+        try:
+            scheme, cost, block_size, parallelization, salt, key = str(hashed_password).split("$")
+            parameters = int(cost), int(block_size), int(parallelization)
+            expected_key = _decode(key)
+            decoded_salt = _decode(salt)
+        except ValueError:
+            return False
+        if scheme != SCHEME:
+            return False
+
+        derived_key = await self._derive(password, decoded_salt, *parameters)
+        return hmac.compare_digest(derived_key, expected_key)
+
+    def needs_rehash(self, hashed_password: HashedPassword) -> bool:
+        if hashed_password.is_legacy:
+            return True
+        prefix = "$".join([SCHEME, str(self.cost), str(self.block_size), str(self.parallelization)]) + "$"
+        return not str(hashed_password).startswith(prefix)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def _derive(self, password: UserPassword, salt: bytes, cost: int, block_size: int,
+                      parallelization: int) -> bytes:
+        n = 2 ** cost
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: hashlib.scrypt(
+            str(password).encode("utf-8"), salt=salt, n=n, r=block_size, p=parallelization,
+            # scrypt needs 128 * n * r bytes, the default limit of OpenSSL only allows small costs
+            maxmem=256 * n * block_size, dklen=KEY_SIZE
+        ))
@@ -0,0 +1,72 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from collections.abc import Callable
+
+from pydantic import ValidationError
+
+from group_sms_chat.domain.exceptions import InvalidSessionTokenError
+from group_sms_chat.domain.session import Session, SessionToken, SessionTokens, password_fingerprint
+from group_sms_chat.domain.user import User, Username
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class HMACSessionTokens(SessionTokens):
+    """
+    Session tokens made of a JSON payload and its HMAC-SHA256 signature, both base64url encoded and joined by a dot.
+    Every instance sharing the same secret can verify the tokens issued by the others.
+    """
+
+    def __init__(self, secret: str, ttl: float = 86400.0, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initialize the HMACSessionTokens.
+
+        :param secret: The key the tokens are signed with.
+        :param ttl: Seconds a token is valid after it is issued.
+        :param clock: Clock returning the current Unix time in seconds.
+        """
+        self._key = secret.encode("utf-8")
+        self.ttl = ttl
+        self.clock = clock
+
+    def issue(self, user: User) -> SessionToken:
+        expires_at = self.clock() + self.ttl
+        payload = _encode(json.dumps({
+            "sub": str(user.username),
+            "pwd": password_fingerprint(user.hashed_password),
+            "exp": expires_at,
+        }, separators=(",", ":")).encode("utf-8"))
+        return SessionToken(token=f"{payload}.{self._sign(payload)}", expires_at=expires_at)
+
+    def verify(self, token: str) -> Session:
+        # Base64url tokens are ASCII, and the signatures can only be compared in constant time as ASCII strings
+        if not token.isascii():
+            raise InvalidSessionTokenError(reason="malformed token")
+        payload, _, signature = token.partition(".")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidSessionTokenError(reason="bad signature")
+
+        try:
+            claims = json.loads(_decode(payload))
+            session = Session(username=Username(root=claims["sub"]),
+                              password_fingerprint=claims["pwd"],
+                              expires_at=claims["exp"])
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError) as e:
+            raise InvalidSessionTokenError(reason="malformed payload") from e
+
+        if session.expires_at <= self.clock():
+            raise InvalidSessionTokenError(reason="expired")
+        return session
+
+    def _sign(self, payload: str) -> str:
+        return _encode(hmac.new(self._key, payload.encode("ascii"), hashlib.sha256).digest())
@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from group_sms_chat.infrastructure.metrics.registry import Histogram, MetricsRegistry
+from group_sms_chat.infrastructure.metrics.tracing import RequestTrace, current_trace
+
+_memory_database_ids = itertools.count()
+
+
+def _metered[T](function: Callable[[sqlite3.Connection], T], connection_type: str,
+                histogram: Histogram | None, trace: RequestTrace | None) -> Callable[[sqlite3.Connection], T]:
+    """
+    Wrap a database function to measure it in the thread it runs on, labelled with the repository method
+    it is defined in, such as SQLiteGroupRepository.get_group. The trace of the request is taken by the caller,
+    since the context of the event loop is not passed to the pool threads.
+    """
+    method = getattr(function, "__qualname__", type(function).__name__).partition(".<locals>")[0]
+
+    def metered(connection: sqlite3.Connection) -> T:
+        start = time.perf_counter()
+        try:
+            return function(connection)
+        finally:
+            elapsed = time.perf_counter() - start
+            if histogram is not None:
+                histogram.observe(elapsed, method, connection_type)
+            if trace is not None:
+                trace.add(f"sqlite.{method}", elapsed)
+
+    return metered
+
+
+class SQLiteConnectionPool:
+    """
+    Bounded pool of SQLite connections that runs every query outside the event loop.
+
+    Writes are serialised on a single writer connection owned by a dedicated thread, while reads are spread
+    over a fixed number of reader threads, each one with its own connection.
+    Several writes can be grouped in a single transaction with the transaction context manager.
+    The queries made while handling a traced request are added to its trace.
+    """
+
+    def __init__(self, file_path: str, readers: int = 4, busy_timeout: float = 5.0, *,
+                 metrics: MetricsRegistry | None = None) -> None:
+        """
+        Initialize the pool.
+
+        :param file_path: Path of the SQLite database file, or ":memory:" for a private in-memory database.
+        :param readers: Maximum number of reader connections (and threads) used for concurrent reads.
+        :param busy_timeout: Seconds a connection waits for a lock held by another connection.
+        :param metrics: Registry where the time taken by the reads and writes of each repository method is measured.
+        """
+        self.file_path = file_path
+        self.busy_timeout = busy_timeout
+        self._query_duration: Histogram | None = None
+        if metrics is not None:
+            self._query_duration = metrics.histogram(
+                "sqlite_query_duration_seconds", "Time taken to run the queries of a repository method",
+                labels=("method", "connection"),
+            )
+
+        self._in_memory = file_path == ":memory:"
+        if self._in_memory:
+            # Each connection to ":memory:" opens a different database, so a named shared-cache database is used
+            # to let the writer and the readers see the same data.
+            self._database = f"file:group_sms_chat_{next(_memory_database_ids)}?mode=memory&cache=shared"
+        else:
+            self._database = file_path
+
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._local = threading.local()
+
+        self._write_lock = asyncio.Lock()
+        self._in_transaction: ContextVar[bool] = ContextVar(f"sqlite_transaction_{id(self)}", default=False)
+
+        self._writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._reader_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+
+        self._writer = self._connect()
+        if not self._in_memory:
+            self._writer.execute("PRAGMA journal_mode = WAL")
+            self._writer.execute("PRAGMA synchronous = NORMAL")
+
+    def initialize[T](self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Run the given function on the writer connection and wait for it to finish.
+        It is meant for schema creation at start-up, before the event loop serves any request.
+
+        :param statements: Function that receives the writer connection.
+        :return: The value returned by the function.
+        """
+        return self._writer_executor.submit(self._run_write, statements).result()
+
+    async def read[T](self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Run a read-only function on one of the reader connections.
+
+        :param query: Function that receives a reader connection and returns the query result.
+        :return: The value returned by the function.
+        """
+        loop = asyncio.get_running_loop()
+        trace = current_trace()
+        if self._query_duration is not None or trace is not None:
+            query = _metered(query, "reader", self._query_duration, trace)
+        return await loop.run_in_executor(self._reader_executor, self._run_read, query)
+
+    async def write[T](self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Run a function on the writer connection inside a transaction.
+        The transaction is committed if the function returns and rolled back if it raises.
+        When called inside the transaction context manager, the function joins the open transaction instead.
+
+        :param statements: Function that receives the writer connection.
+        :return: The value returned by the function.
+        """
+        loop = asyncio.get_running_loop()
+        trace = current_trace()
+        if self._query_duration is not None or trace is not None:
+            statements = _metered(statements, "writer", self._query_duration, trace)
+        if self._in_transaction.get():
+            return await loop.run_in_executor(self._writer_executor, statements, self._writer)
+        async with self._write_lock:
+            return await loop.run_in_executor(self._writer_executor, self._run_write, statements)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Group every write done inside the context, including the ones of concurrent tasks started from it,
+        in a single transaction. It is committed when the context exits and rolled back if it raises.
+        Other writers wait until the transaction finishes. Nested transactions join the outer one.
+        """
+        if self._in_transaction.get():
+            yield
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self._write_lock:
+            token = self._in_transaction.set(True)
+            try:
+                yield
+            except BaseException:
+                await loop.run_in_executor(self._writer_executor, self._writer.rollback)
+                raise
+            else:
+                await loop.run_in_executor(self._writer_executor, self._writer.commit)
+            finally:
+                self._in_transaction.reset(token)
+
+    def close(self) -> None:
+        """
+        Wait for pending queries and close every connection of the pool.
+        """
+        self._writer_executor.shutdown(wait=True)
+        self._reader_executor.shutdown(wait=True)
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._database,
+            timeout=self.busy_timeout,
+            uri=self._in_memory,
+            check_same_thread=False,
+        )
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def _run_write[T](self, statements: Callable[[sqlite3.Connection], T]) -> T:
+        try:
+            result = statements(self._writer)
+        except BaseException:
+            self._writer.rollback()
+            raise
+        self._writer.commit()
+        return result
+
+    def _run_read[T](self, query: Callable[[sqlite3.Connection], T]) -> T:
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            if self._in_memory:
+                # Shared-cache readers would otherwise take table locks that make the writer fail
+                connection.execute("PRAGMA read_uncommitted = 1")
+            else:
+                connection.execute("PRAGMA query_only = 1")
+            self._local.connection = connection
+        return query(connection)
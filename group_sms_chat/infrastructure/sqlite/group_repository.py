@@ -1,104 +1,223 @@
+import json
 import sqlite3
 
-from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.exceptions import (
+    GroupAlreadyExistsError,
+    UnhandledError,
+    UserAlreadyInGroupError,
+    UserNotInGroupError,
+)
+from group_sms_chat.domain.group import Group, GroupName, GroupSummary, GroupUser
 from group_sms_chat.domain.group_repository import GroupRepository
+from group_sms_chat.domain.message_route import MessageRoute
 from group_sms_chat.domain.user import PhoneNumber, Username
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.migrations import has_table, migrate
 
 
 class SQLiteGroupRepository(GroupRepository):
-    def __init__(self, file_path: str) -> None:
-        self.file_path = file_path
-
-        self.connection = sqlite3.connect(file_path)
-        self.connection.execute(
-            "CREATE TABLE IF NOT EXISTS group_users ("
-            "    group_name TEXT NOT NULL,"
-            "    username TEXT NOT NULL,"
-            "    user_group_phone_number TEXT NOT NULL,"
-            "    PRIMARY KEY (group_name, username))"
-        )
-        self.connection.commit()
+    def __init__(self, file_path: str = ":memory:", pool: SQLiteConnectionPool | None = None) -> None:
+        """
+        Initialize the SQLiteGroupRepository.
+
+        :param file_path: Path of the SQLite database file. Ignored when a pool is given.
+        :param pool: Connection pool shared with other repositories of the same database.
+        """
+        self.pool = pool if pool is not None else SQLiteConnectionPool(file_path=file_path)
+        self.pool.initialize(migrate)
+        self.full_text_search = self.pool.initialize(lambda connection: has_table(connection, "groups_search"))
 
     async def create_or_update_group(self, group: Group) -> None:
         # This approach is very inefficient, because it deletes the group and then re-inserts all users
-        # However, it is simple and works for small groups.
-        cursor = self.connection.cursor()
-        cursor.execute("DELETE FROM group_users WHERE group_name = ?", (str(group.name),))
-        for user in group.users:
-            cursor.execute(
+        # Membership changes should use add_member and remove_member, which only touch one row.
+        def replace(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM group_users WHERE group_name = ?", (str(group.name),))
+            connection.executemany(
                 "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
-                (str(group.name), str(user.username), str(user.user_group_phone_number))
+                [(str(group.name), str(user.username), str(user.user_group_phone_number)) for user in group.users]
             )
-        self.connection.commit()
 
-    async def get_group(self, group_name: GroupName) -> Group | None:
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT group_name, username, user_group_phone_number "
-                       "FROM group_users WHERE group_name = ?", (str(group_name),))
-        rows = cursor.fetchall()
-
-        if not rows:
-            return None
-
-        group = Group(name=group_name)
-        for row in rows:
-            _, username, user_group_phone_number = row
-            group.add_user(
-                user=Username(root=username), phone_number=PhoneNumber(root=user_group_phone_number)
+        await self.pool.write(replace)
+
+    async def create_group(self, group_name: GroupName, username: Username, phone_number: PhoneNumber) -> None:
+        def insert(connection: sqlite3.Connection) -> None:
+            # The unique name of the groups table decides which of two concurrent creations wins,
+            # and the member trigger counts the first member
+            connection.execute("INSERT INTO groups (name, member_count) VALUES (?, 0)", (str(group_name),))
+            connection.execute(
+                "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
+                (str(group_name), str(username), str(phone_number))
             )
 
-        return group
-
-    async def find_groups_by_name(self, name: GroupName) -> list[Group]:
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT group_name, username, user_group_phone_number "
-                       "FROM group_users "
-                       "WHERE LOWER(group_name) LIKE ?", (f"%{str(name).lower()}%",))
-        rows = cursor.fetchall()
-
-        groups: dict[GroupName, Group] = {}
-        for row in rows:
-            group_name, username, user_group_phone_number = row
-            if group_name not in groups:
-                groups[group_name] = Group(name=GroupName(root=group_name))
-            groups[group_name].add_user(
-                user=Username(root=username), phone_number=PhoneNumber(root=user_group_phone_number)
+        try:
+            await self.pool.write(insert)
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed: groups.name" in str(e):
+                raise GroupAlreadyExistsError(group_name=group_name) from e
+            raise UnhandledError(message=str(e)) from e
+
+    async def add_member(self, group_name: GroupName, username: Username, phone_number: PhoneNumber) -> None:
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT INTO group_users (group_name, username, user_group_phone_number) VALUES (?, ?, ?)",
+                (str(group_name), str(username), str(phone_number))
             )
 
-        return list(groups.values())
+        try:
+            await self.pool.write(insert)
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed: group_users.group_name, group_users.username" in str(e):
+                raise UserAlreadyInGroupError(username=username, group_name=group_name) from e
+            raise UnhandledError(message=str(e)) from e
+
+    async def remove_member(self, group_name: GroupName, username: Username) -> None:
+        def delete(connection: sqlite3.Connection) -> int:
+            return connection.execute("DELETE FROM group_users WHERE group_name = ? AND username = ?",
+                                      (str(group_name), str(username))).rowcount
+
+        if not await self.pool.write(delete):
+            raise UserNotInGroupError(username=username, group_name=group_name)
+
+    async def get_group(self, group_name: GroupName) -> Group | None:
+        def select(connection: sqlite3.Connection) -> Group | None:
+            rows = connection.execute("SELECT username, user_group_phone_number "
+                                      "FROM group_users WHERE group_name = ?", (str(group_name),)).fetchall()
+
+            if not rows:
+                return None
+
+            return Group(name=group_name, users=[
+                GroupUser.from_trusted(username, user_group_phone_number) for username, user_group_phone_number in rows
+            ])
+
+        return await self.pool.read(select)
+
+    async def find_groups_by_name(
+            self, name: GroupName,
+            limit: int | None = None,
+            after: GroupName | None = None
+    ) -> list[Group]:
+        def select(connection: sqlite3.Connection) -> list[Group]:
+            members: dict[str, list[GroupUser]] = {
+                group_name: [] for group_name, _ in self._search(connection, name, limit, after)
+            }
+            rows = connection.execute(
+                "SELECT group_name, username, user_group_phone_number FROM group_users "
+                "WHERE group_name IN (SELECT value FROM json_each(?))", (json.dumps(list(members)),)
+            ).fetchall()
+
+            for group_name, username, user_group_phone_number in rows:
+                members[group_name].append(GroupUser.from_trusted(username, user_group_phone_number))
+
+            return [Group(name=GroupName(root=group_name), users=users) for group_name, users in members.items()]
+
+        return await self.pool.read(select)
+
+    async def find_group_summaries_by_name(
+            self, name: GroupName,
+            limit: int | None = None,
+            after: GroupName | None = None
+    ) -> list[GroupSummary]:
+        def select(connection: sqlite3.Connection) -> list[GroupSummary]:
+            return [
+                GroupSummary(name=GroupName(root=group_name), member_count=member_count)
+                for group_name, member_count in self._search(connection, name, limit, after)
+            ]
+
+        return await self.pool.read(select)
+
+    def _search(
+            self, connection: sqlite3.Connection,
+            name: GroupName,
+            limit: int | None,
+            after: GroupName | None
+    ) -> list[tuple[str, int]]:
+        # A negative limit means no limit in SQLite, and every group name comes after the empty string
+        parameters = (str(after) if after is not None else "", limit if limit is not None else -1)
+        if self.full_text_search:
+            phrase = '"' + str(name).lower().replace('"', '""') + '"'
+            return connection.execute(
+                "SELECT groups.name, groups.member_count FROM groups_search "
+                "JOIN groups ON groups.id = groups_search.rowid "
+                "WHERE groups_search MATCH ? AND groups.name > ? "
+                "ORDER BY groups.name LIMIT ?", (phrase, *parameters)
+            ).fetchall()
+
+        pattern = str(name).lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return connection.execute(
+            "SELECT name, member_count FROM groups "
+            "WHERE LOWER(name) LIKE ? ESCAPE '\\' AND name > ? "
+            "ORDER BY name LIMIT ?", (f"%{pattern}%", *parameters)
+        ).fetchall()
 
     async def find_user_groups(self, username: Username) -> list[Group]:
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT group_name, username, user_group_phone_number "
-                       "FROM group_users WHERE username = ?", (str(username),))
-        rows = cursor.fetchall()
-
-        groups = {}
-        for row in rows:
-            group_name, _, user_group_phone_number = row
-            if group_name not in groups:
-                groups[group_name] = Group(name=GroupName(root=group_name))
-            groups[group_name].add_user(
-                user=username, phone_number=PhoneNumber(root=user_group_phone_number)
-            )
+        def select(connection: sqlite3.Connection) -> list[Group]:
+            rows = connection.execute("SELECT group_name, user_group_phone_number "
+                                      "FROM group_users WHERE username = ?", (str(username),)).fetchall()
 
-        return list(groups.values())
+            return [
+                Group(name=GroupName(root=group_name),
+                      users=[GroupUser.from_trusted(str(username), user_group_phone_number)])
+                for group_name, user_group_phone_number in rows
+            ]
+
+        return await self.pool.read(select)
 
     async def delete_group(self, group_name: GroupName) -> None:
-        cursor = self.connection.cursor()
-        cursor.execute("DELETE FROM group_users WHERE group_name = ?", (str(group_name),))
-        self.connection.commit()
+        def delete(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM group_users WHERE group_name = ?", (str(group_name),))
+
+        await self.pool.write(delete)
 
     async def get_user_group_by_user_and_phone(
             self, username: Username, phone_number: PhoneNumber
     ) -> Group | None:
-        cursor = self.connection.cursor()
-        cursor.execute(
-            "SELECT group_name FROM group_users "
-            "WHERE username = ? AND user_group_phone_number = ?",
-            (str(username), str(phone_number))
-        )
-        row = cursor.fetchone()
-        if row:
-            return await self.get_group(GroupName(root=row[0]))
+        # Seeks the group_users_by_user index
+        def select(connection: sqlite3.Connection) -> str | None:
+            row = connection.execute(
+                "SELECT group_name FROM group_users "
+                "WHERE username = ? AND user_group_phone_number = ?",
+                (str(username), str(phone_number))
+            ).fetchone()
+            return row[0] if row else None
+
+        group_name = await self.pool.read(select)
+        if group_name:
+            return await self.get_group(GroupName(root=group_name))
         return None
+
+    async def get_message_route(
+            self, user_phone_number: PhoneNumber, group_phone_number: PhoneNumber
+    ) -> MessageRoute | None:
+        # Joins the users table, so the database must be shared with SQLiteUserRepository.
+        # The group is found with one lookup in the primary key of group_routes. The route is built by SQLite as
+        # a single JSON document and validated in one pass, which is much cheaper than a model for each row.
+        def select(connection: sqlite3.Connection) -> MessageRoute | None:
+            row = connection.execute(
+                "SELECT json_object("
+                "    'sender', route.username,"
+                "    'group_name', route.group_name,"
+                "    'recipients', ("
+                "        SELECT json_group_array(json_object("
+                "            'username', member.username,"
+                "            'phone_number', recipient.phone_number,"
+                "            'group_phone_number', member.user_group_phone_number))"
+                "        FROM group_users AS member "
+                "        LEFT JOIN users AS recipient ON recipient.username = member.username "
+                "        WHERE member.group_name = route.group_name AND member.username != route.username)) "
+                "FROM group_routes AS route "
+                "WHERE route.phone_number = ? AND route.group_phone_number = ?",
+                (str(user_phone_number), str(group_phone_number))
+            ).fetchone()
+
+            return MessageRoute.model_validate_json(row[0]) if row else None
+
+        return await self.pool.read(select)
+
+    async def count_members_by_phone_number(self) -> list[tuple[PhoneNumber, int]]:
+        def select(connection: sqlite3.Connection) -> list[tuple[PhoneNumber, int]]:
+            rows = connection.execute("SELECT user_group_phone_number, COUNT(*) FROM group_users "
+                                      "GROUP BY user_group_phone_number").fetchall()
+            return [(PhoneNumber(root=phone_number), count) for phone_number, count in rows]
+
+        return await self.pool.read(select)
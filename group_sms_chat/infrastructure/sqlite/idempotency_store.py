@@ -0,0 +1,59 @@
+import sqlite3
+import time
+from collections.abc import Callable
+
+from group_sms_chat.domain.idempotency_store import IdempotencyStore
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.migrations import migrate
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency store that keeps the keys in the database, so they are still known after a restart
+    and by every process sharing the database. The expired keys are deleted while recording new ones,
+    at most once per prune interval.
+    """
+
+    def __init__(self, file_path: str = ":memory:", pool: SQLiteConnectionPool | None = None, *,
+                 ttl: float = 86_400.0,
+                 prune_interval: float = 3600.0,
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        Initialize the SQLiteIdempotencyStore.
+
+        :param file_path: Path of the SQLite database file. Ignored when a pool is given.
+        :param pool: Connection pool shared with the repositories.
+        :param ttl: Seconds a key is kept.
+        :param prune_interval: Minimum seconds between two deletions of the expired keys.
+        :param clock: Wall clock returning seconds, shared by every process using the database.
+        """
+        self.pool = pool if pool is not None else SQLiteConnectionPool(file_path=file_path)
+        self.pool.initialize(migrate)
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self._pruned_at = float("-inf")
+
+    async def add(self, key: str) -> bool:
+        now = self.clock()
+        expired_before = now - self.ttl
+
+        def insert(connection: sqlite3.Connection) -> bool:
+            if now - self._pruned_at >= self.prune_interval:
+                connection.execute("DELETE FROM idempotency_keys WHERE created_at <= ?", (expired_before,))
+                self._pruned_at = now
+            # An expired key that was not pruned yet counts as new
+            cursor = connection.execute(
+                "INSERT INTO idempotency_keys (key, created_at) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET created_at = excluded.created_at WHERE created_at <= ?",
+                (key, now, expired_before)
+            )
+            return cursor.rowcount == 1
+
+        return await self.pool.write(insert)
+
+    async def discard(self, key: str) -> None:
+        def delete(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+        await self.pool.write(delete)
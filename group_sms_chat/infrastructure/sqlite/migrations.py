@@ -0,0 +1,198 @@
+import logging
+import sqlite3
+from collections.abc import Callable
+
+
+def create_users_and_group_users(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS users "
+        "(username TEXT PRIMARY KEY, phone_number TEXT NOT NULL UNIQUE, hashed_password TEXT)"
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS group_users ("
+        "    group_name TEXT NOT NULL,"
+        "    username TEXT NOT NULL,"
+        "    user_group_phone_number TEXT NOT NULL,"
+        "    PRIMARY KEY (group_name, username))"
+    )
+
+
+def create_sms_outbox(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS sms_outbox ("
+        "    id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        "    from_phone_number TEXT NOT NULL,"
+        "    to_phone_number TEXT NOT NULL,"
+        "    message TEXT NOT NULL,"
+        "    status TEXT NOT NULL,"
+        "    attempts INTEGER NOT NULL DEFAULT 0,"
+        "    created_at REAL NOT NULL,"
+        "    next_attempt_at REAL NOT NULL,"
+        "    last_error TEXT)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS sms_outbox_by_status ON sms_outbox (status, next_attempt_at)")
+
+
+def create_groups(connection: sqlite3.Connection) -> None:
+    # One row per group with its number of members, maintained by triggers on the members table,
+    # so a name search only has to scan the groups instead of every membership.
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS groups ("
+        "    id INTEGER PRIMARY KEY,"
+        "    name TEXT NOT NULL UNIQUE,"
+        "    member_count INTEGER NOT NULL)"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS group_users_after_insert AFTER INSERT ON group_users BEGIN"
+        "    INSERT INTO groups (name, member_count) VALUES (new.group_name, 1)"
+        "    ON CONFLICT (name) DO UPDATE SET member_count = member_count + 1;"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS group_users_after_delete AFTER DELETE ON group_users BEGIN"
+        "    UPDATE groups SET member_count = member_count - 1 WHERE name = old.group_name;"
+        "    DELETE FROM groups WHERE name = old.group_name AND member_count = 0;"
+        "END"
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO groups (name, member_count) "
+        "SELECT group_name, COUNT(*) FROM group_users GROUP BY group_name"
+    )
+
+
+def create_groups_search(connection: sqlite3.Connection) -> None:
+    # Trigram full-text index of the group names, used for substring searches when SQLite supports it
+    try:
+        connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS groups_search "
+            "USING fts5(name, content = 'groups', content_rowid = 'id', tokenize = 'trigram')"
+        )
+    except sqlite3.OperationalError:
+        logging.warning("SQLite has no FTS5 trigram tokenizer, group names will be searched with LIKE")
+        return
+
+    # The name of a group never changes, so only insertions and deletions are indexed
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS groups_after_insert AFTER INSERT ON groups BEGIN"
+        "    INSERT INTO groups_search (rowid, name) VALUES (new.id, new.name);"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS groups_after_delete AFTER DELETE ON groups BEGIN"
+        "    INSERT INTO groups_search (groups_search, rowid, name) VALUES ('delete', old.id, old.name);"
+        "END"
+    )
+    connection.execute("INSERT INTO groups_search (groups_search) VALUES ('rebuild')")
+
+
+def create_group_routes(connection: sqlite3.Connection) -> None:
+    # Maps the personal phone number of a member and the number they use for a group to the group,
+    # so an incoming message finds its group with a single primary key lookup.
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS group_routes ("
+        "    phone_number TEXT NOT NULL,"
+        "    group_phone_number TEXT NOT NULL,"
+        "    group_name TEXT NOT NULL,"
+        "    username TEXT NOT NULL,"
+        "    PRIMARY KEY (phone_number, group_phone_number)"
+        ") WITHOUT ROWID"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS group_routes_by_user ON group_routes (username, group_name)")
+    # Groups of a user, and the group a user reaches through one of the group numbers
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS group_users_by_user ON group_users (username, user_group_phone_number)"
+    )
+
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS group_users_add_route AFTER INSERT ON group_users BEGIN"
+        "    INSERT OR IGNORE INTO group_routes (phone_number, group_phone_number, group_name, username)"
+        "    SELECT phone_number, new.user_group_phone_number, new.group_name, new.username"
+        "    FROM users WHERE username = new.username;"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS group_users_remove_route AFTER DELETE ON group_users BEGIN"
+        "    DELETE FROM group_routes WHERE username = old.username AND group_name = old.group_name;"
+        "    INSERT OR IGNORE INTO group_routes (phone_number, group_phone_number, group_name, username)"
+        "    SELECT users.phone_number, group_users.user_group_phone_number, group_users.group_name, users.username"
+        "    FROM group_users JOIN users ON users.username = group_users.username"
+        "    WHERE group_users.username = old.username"
+        "    AND group_users.user_group_phone_number = old.user_group_phone_number;"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS users_add_routes AFTER INSERT ON users BEGIN"
+        "    INSERT OR IGNORE INTO group_routes (phone_number, group_phone_number, group_name, username)"
+        "    SELECT new.phone_number, user_group_phone_number, group_name, username"
+        "    FROM group_users WHERE username = new.username;"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS users_update_routes AFTER UPDATE OF phone_number ON users BEGIN"
+        "    UPDATE group_routes SET phone_number = new.phone_number WHERE username = old.username;"
+        "END"
+    )
+    connection.execute(
+        "CREATE TRIGGER IF NOT EXISTS users_remove_routes AFTER DELETE ON users BEGIN"
+        "    DELETE FROM group_routes WHERE username = old.username;"
+        "END"
+    )
+
+    # A user should never reach two groups through the same number, but nothing in group_users prevents it.
+    # When it happens only one route is kept, and the other one takes its place when it is removed.
+    connection.execute(
+        "INSERT OR IGNORE INTO group_routes (phone_number, group_phone_number, group_name, username) "
+        "SELECT users.phone_number, group_users.user_group_phone_number, group_users.group_name, users.username "
+        "FROM group_users JOIN users ON users.username = group_users.username"
+    )
+
+
+def create_idempotency_keys(connection: sqlite3.Connection) -> None:
+    connection.execute("CREATE TABLE IF NOT EXISTS idempotency_keys (key TEXT PRIMARY KEY, created_at REAL NOT NULL)")
+    # Pruning deletes the oldest keys
+    connection.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_by_age ON idempotency_keys (created_at)")
+
+
+def index_sms_outbox_by_sender(connection: sqlite3.Connection) -> None:
+    # The messages are claimed one sender at a time
+    connection.execute("CREATE INDEX IF NOT EXISTS sms_outbox_by_sender "
+                       "ON sms_outbox (status, from_phone_number, next_attempt_at)")
+
+
+# Every migration is applied once, in order, and its position is stored in the user_version of the database.
+# The first ones use IF NOT EXISTS because the tables were created without migrations before.
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    create_users_and_group_users,
+    create_sms_outbox,
+    create_groups,
+    create_groups_search,
+    create_group_routes,
+    create_idempotency_keys,
+    index_sms_outbox_by_sender,
+]
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    """
+    Apply the migrations the database does not have yet, each one in its own transaction.
+    It is safe to run from several processes at the same time.
+
+    :param connection: The writer connection.
+    """
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("PRAGMA user_version").fetchone()[0] < version:
+                migration(connection)
+                connection.execute(f"PRAGMA user_version = {version:d}")
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+
+def has_table(connection: sqlite3.Connection, name: str) -> bool:
+    """
+    Check whether the database has a table, for the optional ones.
+    """
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+import json
+import sqlite3
+import time
+from collections.abc import Collection, Sequence
+
+from group_sms_chat.domain.sms_outbox import OutboxMessage, OutboxStats, SMSOutbox
+from group_sms_chat.domain.sms_service import SMSMessage
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.migrations import migrate
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+FAILED = "failed"
+
+
+class SQLiteSMSOutbox(SMSOutbox):
+    def __init__(self, file_path: str = ":memory:", pool: SQLiteConnectionPool | None = None) -> None:
+        """
+        Initialize the SQLiteSMSOutbox.
+
+        :param file_path: Path of the SQLite database file. Ignored when a pool is given.
+        :param pool: Connection pool shared with the repositories, so that messages can be enqueued in the same
+            transaction as the changes that trigger them.
+        """
+        self.pool = pool if pool is not None else SQLiteConnectionPool(file_path=file_path)
+        self.pool.initialize(migrate)
+        self._new_messages = asyncio.Event()
+
+    async def enqueue(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        now = time.time()
+
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT INTO sms_outbox "
+                "(from_phone_number, to_phone_number, message, status, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(from_phone_number), str(to_phone_number), message, PENDING, now, now)
+            )
+
+        await self.pool.write(insert)
+        self._new_messages.set()
+
+    async def enqueue_many(self, messages: Sequence[SMSMessage]) -> None:
+        if not messages:
+            return
+        now = time.time()
+
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.executemany(
+                "INSERT INTO sms_outbox "
+                "(from_phone_number, to_phone_number, message, status, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(str(message.from_phone_number), str(message.to_phone_number), message.message, PENDING, now, now)
+                 for message in messages]
+            )
+
+        await self.pool.write(insert)
+        self._new_messages.set()
+
+    async def wait_for_messages(self, timeout: float) -> None:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._new_messages.wait(), timeout)
+        self._new_messages.clear()
+
+    async def claim(self, limit: int, exclude_senders: Collection[PhoneNumber] = ()) -> list[OutboxMessage]:
+        excluded = json.dumps([str(phone_number) for phone_number in exclude_senders])
+
+        def update(connection: sqlite3.Connection) -> list[OutboxMessage]:
+            now = time.time()
+            sender = connection.execute(
+                "SELECT from_phone_number FROM sms_outbox WHERE status = ? AND next_attempt_at <= ? "
+                "AND from_phone_number NOT IN (SELECT value FROM json_each(?)) "
+                "ORDER BY next_attempt_at LIMIT 1",
+                (PENDING, now, excluded)
+            ).fetchone()
+            if sender is None:
+                return []
+            rows = connection.execute(
+                "UPDATE sms_outbox SET status = ?, attempts = attempts + 1 "
+                "WHERE id IN ("
+                "    SELECT id FROM sms_outbox WHERE status = ? AND from_phone_number = ? AND next_attempt_at <= ? "
+                "    ORDER BY next_attempt_at LIMIT ?) "
+                "RETURNING id, from_phone_number, to_phone_number, message, attempts",
+                (IN_FLIGHT, PENDING, sender[0], now, limit)
+            ).fetchall()
+            messages = [
+                OutboxMessage(id=row[0], from_phone_number=PhoneNumber(root=row[1]),
+                              to_phone_number=PhoneNumber(root=row[2]), message=row[3], attempts=row[4])
+                for row in rows
+            ]
+            return sorted(messages, key=lambda message: message.id)
+
+        return await self.pool.write(update)
+
+    async def mark_sent(self, message_id: int) -> None:
+        def delete(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM sms_outbox WHERE id = ?", (message_id,))
+
+        await self.pool.write(delete)
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: float | None) -> None:
+        def update(connection: sqlite3.Connection) -> None:
+            if retry_in is None:
+                connection.execute("UPDATE sms_outbox SET status = ?, last_error = ? WHERE id = ?",
+                                   (FAILED, error, message_id))
+            else:
+                connection.execute("UPDATE sms_outbox SET status = ?, last_error = ?, next_attempt_at = ? "
+                                   "WHERE id = ?", (PENDING, error, time.time() + retry_in, message_id))
+
+        await self.pool.write(update)
+
+    async def recover_in_flight(self) -> int:
+        def update(connection: sqlite3.Connection) -> int:
+            return connection.execute("UPDATE sms_outbox SET status = ? WHERE status = ?",
+                                      (PENDING, IN_FLIGHT)).rowcount
+
+        return await self.pool.write(update)
+
+    async def stats(self) -> OutboxStats:
+        def select(connection: sqlite3.Connection) -> OutboxStats:
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM sms_outbox GROUP BY status").fetchall())
+            oldest = connection.execute("SELECT MIN(created_at) FROM sms_outbox WHERE status = ?",
+                                        (PENDING,)).fetchone()[0]
+            return OutboxStats(
+                pending=counts.get(PENDING, 0),
+                in_flight=counts.get(IN_FLIGHT, 0),
+                failed=counts.get(FAILED, 0),
+                oldest_pending_age_seconds=time.time() - oldest if oldest is not None else None,
+            )
+
+        return await self.pool.read(select)
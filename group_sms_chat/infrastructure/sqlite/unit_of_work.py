@@ -0,0 +1,17 @@
+from contextlib import AbstractAsyncContextManager
+
+from group_sms_chat.domain.unit_of_work import UnitOfWork
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+
+
+class SQLiteUnitOfWork(UnitOfWork):
+    def __init__(self, pool: SQLiteConnectionPool) -> None:
+        """
+        Initialize the SQLiteUnitOfWork.
+
+        :param pool: Connection pool shared by the repositories and the outbox taking part in the transactions.
+        """
+        self.pool = pool
+
+    def transaction(self) -> AbstractAsyncContextManager[None]:
+        return self.pool.transaction()
@@ -1,31 +1,38 @@
+import json
 import sqlite3
+from collections.abc import Collection
 
 from group_sms_chat.domain.exceptions import (
     PhoneNumberAlreadyExistsError,
     UnhandledError,
     UserAlreadyExistsError,
 )
-from group_sms_chat.domain.user import PhoneNumber, User, Username
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username
 from group_sms_chat.domain.user_repository import UserRepository
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.migrations import migrate
 
 
 class SQLiteUserRepository(UserRepository):
-    def __init__(self, file_path: str) -> None:
-        self.connection = sqlite3.connect(file_path)
-        self.connection.execute(
-            "CREATE TABLE IF NOT EXISTS users "
-            "(username TEXT PRIMARY KEY, phone_number TEXT NOT NULL UNIQUE, hashed_password TEXT)"
-        )
-        self.connection.commit()
+    def __init__(self, file_path: str = ":memory:", pool: SQLiteConnectionPool | None = None) -> None:
+        """
+        Initialize the SQLiteUserRepository.
+
+        :param file_path: Path of the SQLite database file. Ignored when a pool is given.
+        :param pool: Connection pool shared with other repositories of the same database.
+        """
+        self.pool = pool if pool is not None else SQLiteConnectionPool(file_path=file_path)
+        self.pool.initialize(migrate)
 
     async def add_user(self, user: User) -> None:
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.execute(
                 "INSERT INTO users (username, phone_number, hashed_password) VALUES (?, ?, ?)",
                 (str(user.username), str(user.phone_number), str(user.hashed_password))
             )
-            self.connection.commit()
+
+        try:
+            await self.pool.write(insert)
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed" in str(e):
                 if "username" in str(e):
@@ -35,24 +42,49 @@ class SQLiteUserRepository(UserRepository):
             raise UnhandledError(message=str(e)) from e
 
     async def get_user(self, username: Username) -> User | None:
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT username, phone_number, hashed_password FROM users WHERE username = ?", (str(username),))
-        row = cursor.fetchone()
-        if row:
-            return User(username=Username(root=row[0]), phone_number=row[1], hashed_password=row[2])
-        return None
+        def select(connection: sqlite3.Connection) -> User | None:
+            row = connection.execute(
+                "SELECT username, phone_number, hashed_password FROM users WHERE username = ?", (str(username),)
+            ).fetchone()
+            if row:
+                return User(username=Username(root=row[0]), phone_number=row[1], hashed_password=row[2])
+            return None
+
+        return await self.pool.read(select)
+
+    async def get_users(self, usernames: Collection[Username]) -> list[User]:
+        # The usernames are bound as a single JSON array, so any number of them fits in one query
+        names = json.dumps([str(username) for username in usernames])
+
+        def select(connection: sqlite3.Connection) -> list[User]:
+            rows = connection.execute(
+                "SELECT username, phone_number, hashed_password FROM users "
+                "WHERE username IN (SELECT value FROM json_each(?))", (names,)
+            ).fetchall()
+            return [User(username=Username(root=row[0]), phone_number=row[1], hashed_password=row[2]) for row in rows]
+
+        return await self.pool.read(select)
 
     async def get_user_by_phone_number(self, phone_number: PhoneNumber) -> User | None:
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT username, phone_number, hashed_password "
-                       "FROM users WHERE phone_number = ?",
-                       (str(phone_number),))
-        row = cursor.fetchone()
-        if row:
-            return User(username=Username(root=row[0]), phone_number=row[1], hashed_password=row[2])
-        return None
+        def select(connection: sqlite3.Connection) -> User | None:
+            row = connection.execute("SELECT username, phone_number, hashed_password "
+                                     "FROM users WHERE phone_number = ?",
+                                     (str(phone_number),)).fetchone()
+            if row:
+                return User(username=Username(root=row[0]), phone_number=row[1], hashed_password=row[2])
+            return None
+
+        return await self.pool.read(select)
+
+    async def update_password(self, username: Username, hashed_password: HashedPassword) -> None:
+        def update(connection: sqlite3.Connection) -> None:
+            connection.execute("UPDATE users SET hashed_password = ? WHERE username = ?",
+                               (str(hashed_password), str(username)))
+
+        await self.pool.write(update)
 
     async def delete_user(self, username: Username) -> None:
-        cursor = self.connection.cursor()
-        cursor.execute("DELETE FROM users WHERE username = ?", (str(username),))
-        self.connection.commit()
+        def delete(connection: sqlite3.Connection) -> None:
+            connection.execute("DELETE FROM users WHERE username = ?", (str(username),))
+
+        await self.pool.write(delete)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from collections.abc import Sequence
+
+import httpx
+
+from group_sms_chat.domain.background_service import BackgroundService
+from group_sms_chat.domain.exceptions import SMSDeliveryError
+from group_sms_chat.domain.sms_service import SMSMessage, SMSSendResult, SMSService
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter
+
+TWILIO_API_URL = "https://api.twilio.com"
+
+
+class TwilioHTTPSMSService(SMSService, BackgroundService):
+    """
+    SMS service that calls the Twilio Messages REST API through a pooled asynchronous HTTP client,
+    so sending a message never blocks the event loop.
+    """
+
+    def __init__(self, account_sid: str, auth_token: str, phone_numbers: list[str], *,
+                 base_url: str = TWILIO_API_URL,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0,
+                 timeout: float = 10.0,
+                 rate_limiter: PhoneNumberRateLimiter | None = None,
+                 transport: httpx.AsyncBaseTransport | None = None) -> None:
+        """
+        Initialize the TwilioHTTPSMSService.
+
+        :param account_sid: The Twilio account SID.
+        :param auth_token: The Twilio authentication token.
+        :param phone_numbers: The Twilio phone numbers that can be used to send SMS messages.
+        :param base_url: The URL of the Twilio API. It can point to a local stand-in server for testing.
+        :param max_connections: Maximum number of open connections to the API.
+        :param max_keepalive_connections: Maximum number of idle connections kept open for reuse.
+        :param keepalive_expiry: Seconds an idle connection is kept open.
+        :param timeout: Seconds to wait for the API to connect and respond.
+        :param rate_limiter: Limiter that paces the messages sent from each phone number.
+        :param transport: Transport used instead of the network one, mostly for testing.
+        """
+        self.account_sid = account_sid
+        self._phone_numbers = [PhoneNumber(root=num) for num in phone_numbers]
+        self.rate_limiter = rate_limiter
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(account_sid, auth_token),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections,
+                                keepalive_expiry=keepalive_expiry),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def available_phone_numbers(self) -> list[PhoneNumber]:
+        return list(self._phone_numbers)
+
+    async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(from_phone_number)
+        await self._post(from_phone_number, to_phone_number, message)
+
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        """
+        Send the messages concurrently over the pooled connections, at most max_concurrency at a time.
+        Each message waits for its turn from the rate limiter of its sender number before it takes a place,
+        so the messages of a throttled number do not hold back the messages sent from the other numbers.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def send(message: SMSMessage) -> None:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(message.from_phone_number)
+            async with semaphore:
+                await self._post(message.from_phone_number, message.to_phone_number, message.message)
+
+        outcomes = await asyncio.gather(*(send(message) for message in messages), return_exceptions=True)
+        return [SMSSendResult.of(message, outcome) for message, outcome in zip(messages, outcomes, strict=True)]
+
+    async def _post(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        logging.info(f"Sending SMS from {from_phone_number} to {to_phone_number}: {message}")
+
+        try:
+            response = await self.client.post(
+                f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                data={"From": str(from_phone_number), "To": str(to_phone_number), "Body": message},
+            )
+        except httpx.HTTPError as e:
+            raise SMSDeliveryError(to_phone_number, reason=f"{type(e).__name__}: {e}") from e
+
+        if response.is_error:
+            raise SMSDeliveryError(to_phone_number, reason=f"Twilio responded {response.status_code}: {response.text}")
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,144 @@
+import asyncio
+import math
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from group_sms_chat.domain.user import PhoneNumber
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Sustained rate, in messages per second, and number of messages that can be sent in a burst.
+    """
+
+    rate: float
+    burst: int
+
+
+@dataclass(frozen=True)
+class BucketStats:
+    phone_number: str
+    capacity: int
+    available_tokens: float
+    queued: int
+    waits: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+
+class TokenBucket:
+    __slots__ = ("burst", "max_wait", "rate", "tokens", "total_wait", "updated_at", "waits")
+
+    def __init__(self, limit: RateLimit, now: float) -> None:
+        self.rate = limit.rate
+        self.burst = limit.burst
+        self.tokens = float(limit.burst)
+        self.updated_at = now
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, float(self.burst))
+        self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token and return how many seconds the caller has to wait until it is actually available.
+        The tokens go negative while callers are waiting, so every caller gets its own slot in arrival order.
+        """
+        self.refill(now)
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay > 0:
+            self.waits += 1
+            self.total_wait += delay
+            self.max_wait = max(self.max_wait, delay)
+        return delay
+
+
+class PhoneNumberRateLimiter:
+    """
+    Token-bucket scheduler that paces the messages sent from each phone number independently, so a busy number
+    never delays the messages sent from the others.
+    """
+
+    def __init__(self, default_limit: RateLimit,
+                 limits: Mapping[str, RateLimit] | None = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize the PhoneNumberRateLimiter.
+
+        :param default_limit: Limit of the phone numbers without a specific one.
+        :param limits: Specific limits by phone number.
+        :param clock: Monotonic clock returning seconds.
+        """
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self.clock = clock
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def acquire(self, phone_number: PhoneNumber) -> float:
+        """
+        Wait until a message can be sent from the given phone number.
+
+        :param phone_number: The phone number the message is sent from.
+        :return: The number of seconds waited.
+        """
+        key = str(phone_number)
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.limits.get(key, self.default_limit), now)
+
+        delay = bucket.reserve(now)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> list[BucketStats]:
+        """
+        Get the occupancy and the waiting time of the bucket of each phone number used so far.
+        """
+        now = self.clock()
+        return [self._stats(phone_number, bucket, now) for phone_number, bucket in self._buckets.items()]
+
+    def phone_number_stats(self, phone_number: str) -> BucketStats:
+        """
+        Get the occupancy and the waiting time of the bucket of a phone number, full if it was not used yet.
+
+        :param phone_number: The phone number the messages are sent from.
+        """
+        now = self.clock()
+        bucket = self._buckets.get(phone_number)
+        if bucket is None:
+            bucket = TokenBucket(self.limits.get(phone_number, self.default_limit), now)
+        return self._stats(phone_number, bucket, now)
+
+    @staticmethod
+    def _stats(phone_number: str, bucket: TokenBucket, now: float) -> BucketStats:
+        bucket.refill(now)
+        return BucketStats(
+            phone_number=phone_number,
+            capacity=bucket.burst,
+            available_tokens=max(bucket.tokens, 0.0),
+            queued=math.ceil(-bucket.tokens) if bucket.tokens < 0 else 0,
+            waits=bucket.waits,
+            total_wait_seconds=bucket.total_wait,
+            max_wait_seconds=bucket.max_wait,
+        )
+
+
+def parse_rate_limits(value: str) -> dict[str, RateLimit]:
+    """
+    Parse specific rate limits written as comma-separated "<phone number>=<rate>/<burst>" items,
+    for example "+15550000001=10/20,+15550000002=1/1".
+    """
+    limits = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        phone_number, _, limit = item.partition("=")
+        rate, _, burst = limit.partition("/")
+        limits[phone_number.strip()] = RateLimit(rate=float(rate), burst=int(burst or 1))
+    return limits
@@ -1,22 +1,50 @@
+import asyncio
 import logging
+from collections.abc import Sequence
 
 from twilio.rest import Client  # type: ignore[import-untyped]
 
-from group_sms_chat.domain.sms_service import SMSService
+from group_sms_chat.domain.sms_service import SMSMessage, SMSSendResult, SMSService
 from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter
 
 
 class TwilioSMSService(SMSService):
-    def __init__(self, account_sid: str, auth_token: str, phone_numbers: list[str]) -> None:
+    def __init__(self, account_sid: str, auth_token: str, phone_numbers: list[str],
+                 rate_limiter: PhoneNumberRateLimiter | None = None) -> None:
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.client = Client(account_sid, auth_token)
         self._phone_numbers = [PhoneNumber(root=num) for num in phone_numbers]
+        self.rate_limiter = rate_limiter
 
     async def available_phone_numbers(self) -> list[PhoneNumber]:
         return list(self._phone_numbers)
 
     async def send_sms(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(from_phone_number)
+        self._create(from_phone_number, to_phone_number, message)
+
+    async def send_bulk(self, messages: Sequence[SMSMessage], max_concurrency: int = 10) -> list[SMSSendResult]:
+        """
+        Send the messages concurrently from a pool of threads, since the Twilio client blocks,
+        at most max_concurrency at a time. Each message waits for its turn from the rate limiter of its
+        sender number before it takes a thread.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def send(message: SMSMessage) -> None:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(message.from_phone_number)
+            async with semaphore:
+                await asyncio.to_thread(self._create, message.from_phone_number, message.to_phone_number,
+                                        message.message)
+
+        outcomes = await asyncio.gather(*(send(message) for message in messages), return_exceptions=True)
+        return [SMSSendResult.of(message, outcome) for message, outcome in zip(messages, outcomes, strict=True)]
+
+    def _create(self, from_phone_number: PhoneNumber, to_phone_number: PhoneNumber, message: str) -> None:
         logging.info(f"Sending SMS from {from_phone_number} to {to_phone_number}: {message}")
         self.client.messages.create(
             body=message,
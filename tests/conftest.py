@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(params=["memory", "file"])
+def database_path(request: pytest.FixtureRequest, tmp_path: Path) -> str:
+    """
+    Path of the database of a test run against both kinds of pools. The in-memory pools read through a shared cache
+    that sees the writes of open transactions, while the file pools used in production only see committed ones.
+    """
+    if request.param == "memory":
+        return ":memory:"
+    return str(tmp_path / "test.db")
@@ -1,17 +1,41 @@
 from http import HTTPStatus
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from group_sms_chat.app import APIHandlers, create_app
+from group_sms_chat.app import APIHandlers, create_app, create_fan_out_segments_counter, register_rate_limiter_metrics
+from group_sms_chat.application.accept_group_message_handler import AcceptedGroupMessage, AcceptGroupMessageHandler
+from group_sms_chat.application.authenticate_session_handler import AuthenticateSessionHandler
 from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.application.delete_user_handler import DeleteUserHandler
+from group_sms_chat.application.find_group_summaries_handler import FindGroupSummariesHandler
 from group_sms_chat.application.find_groups_handler import FindGroupsHandler
+from group_sms_chat.application.get_outbox_stats_handler import GetOutboxStatsHandler
+from group_sms_chat.application.get_phone_number_load_handler import GetPhoneNumberLoadHandler
+from group_sms_chat.application.get_routing_cache_stats_handler import GetRoutingCacheStatsHandler
 from group_sms_chat.application.join_group_handler import JoinGroupHandler
 from group_sms_chat.application.leave_group_handler import LeaveGroupHandler
+from group_sms_chat.application.login_handler import LoginHandler
 from group_sms_chat.application.register_user_handler import RegisterUserHandler
-from group_sms_chat.application.send_group_message_handler import SendGroupMessageHandler
+from group_sms_chat.application.send_group_message_handler import ComposedMessage
 from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.exceptions import InvalidSessionTokenError, MessageTooLongError
+from group_sms_chat.domain.group import Group, GroupName, GroupSummary
+from group_sms_chat.domain.message_route import MessageRecipient, MessageRoute
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberLoad
+from group_sms_chat.domain.session import SessionToken
+from group_sms_chat.domain.sms_encoding import count_segments
+from group_sms_chat.domain.sms_outbox import OutboxStats
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.metrics.profiler import SamplingProfiler
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter, RateLimit
+
+ADMIN_TOKEN = "admin-token"
+ADMIN_HEADERS = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
 
 
 @pytest.fixture
@@ -19,15 +43,297 @@ def handlers() -> APIHandlers:
     return APIHandlers(
         validate_user=AsyncMock(spec=ValidateUserPasswordHandler),
         register_user=AsyncMock(spec=RegisterUserHandler),
+        login=AsyncMock(spec=LoginHandler),
+        authenticate_session=AsyncMock(spec=AuthenticateSessionHandler),
+        delete_user=AsyncMock(spec=DeleteUserHandler),
         create_new_group=AsyncMock(spec=CreateNewGroupHandler),
         find_groups=AsyncMock(spec=FindGroupsHandler),
+        find_group_summaries=AsyncMock(spec=FindGroupSummariesHandler),
         join_group=AsyncMock(spec=JoinGroupHandler),
         leave_group=AsyncMock(spec=LeaveGroupHandler),
-        send_group_message=AsyncMock(spec=SendGroupMessageHandler),
+        accept_group_message=AsyncMock(spec=AcceptGroupMessageHandler),
+        get_outbox_stats=AsyncMock(spec=GetOutboxStatsHandler),
+        get_routing_cache_stats=AsyncMock(spec=GetRoutingCacheStatsHandler),
+        get_phone_number_load=AsyncMock(spec=GetPhoneNumberLoadHandler),
     )
 
 
+def accepted_message(recipients: int, *, coalesced: bool = False) -> AcceptedGroupMessage:
+    route = MessageRoute(sender=Username(root="alice"), group_name=GroupName(root="team"), recipients=[
+        MessageRecipient(username=Username(root=f"user{i}"), phone_number=PhoneNumber(root=f"+340000000{i:02d}"),
+                         group_phone_number=PhoneNumber(root="+1000000001"))
+        for i in range(recipients)
+    ])
+    text = "alice: hello"
+    return AcceptedGroupMessage(route=route, message=ComposedMessage(text=text, segments=count_segments(text)),
+                                coalesced=coalesced)
+
+
 def test_api_health_check(handlers: APIHandlers) -> None:
     client = TestClient(create_app(handlers))
     response = client.get("/health")
     assert response.status_code == HTTPStatus.OK
+
+
+def test_api_metrics(handlers: APIHandlers) -> None:
+    handlers.accept_group_message.handle.return_value = accepted_message(4)  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers, metrics=MetricsRegistry()))
+
+    client.get("/health")
+    client.post("/webhooks/twilio/sms", data={"From": "+3400000001", "To": "+1000000001", "Body": "hello"})
+    client.post("/groups/team/users/")
+    response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"} 1' in lines
+    assert ('http_request_duration_seconds_count{method="POST",route="/groups/{group_name}/users/",status="401"} 1'
+            in lines)
+    assert 'handler_duration_seconds_count{handler="accept_group_message",outcome="ok"} 1' in lines
+    assert "group_message_fan_out_size_sum 4" in lines
+    assert 'group_message_segments_count{encoding="GSM-7"} 1' in lines
+    assert 'group_message_fan_out_segments_total{encoding="GSM-7"} 4' in lines
+
+
+@pytest.mark.asyncio
+async def test_api_metrics_of_the_send_rate_limits(handlers: APIHandlers) -> None:
+    metrics = MetricsRegistry()
+    rate_limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=1000, burst=2))
+    register_rate_limiter_metrics(metrics, rate_limiter, ["+1000000001", "+1000000002"])
+    client = TestClient(create_app(handlers, metrics=metrics))
+
+    for _ in range(3):
+        await rate_limiter.acquire(PhoneNumber(root="+1000000001"))
+    lines = client.get("/metrics").text.splitlines()
+
+    assert 'sms_rate_limit_capacity{from_phone_number="+1000000001"} 2' in lines
+    assert 'sms_rate_limit_waits_total{from_phone_number="+1000000001"} 1' in lines
+    assert 'sms_rate_limit_queued{from_phone_number="+1000000001"} 0' in lines
+    # The numbers that did not send anything yet have a full bucket
+    assert 'sms_rate_limit_available_tokens{from_phone_number="+1000000002"} 2' in lines
+    assert 'sms_rate_limit_wait_seconds_total{from_phone_number="+1000000002"} 0' in lines
+    assert 'sms_rate_limit_max_wait_seconds{from_phone_number="+1000000002"} 0' in lines
+
+
+def test_api_counts_the_segments_in_the_counter_given(handlers: APIHandlers) -> None:
+    handlers.accept_group_message.handle.return_value = accepted_message(4)  # type: ignore[attr-defined]
+    fan_out_segments = create_fan_out_segments_counter(MetricsRegistry())
+    client = TestClient(create_app(handlers, metrics=MetricsRegistry(), fan_out_segments=fan_out_segments))
+
+    client.post("/webhooks/twilio/sms", data={"From": "+3400000001", "To": "+1000000001", "Body": "hello"})
+
+    assert fan_out_segments.value("GSM-7") == 4
+
+
+def test_api_leaves_the_segments_of_coalesced_messages_to_the_coalescer(handlers: APIHandlers) -> None:
+    handlers.accept_group_message.handle.return_value = accepted_message(4, coalesced=True)  # type: ignore[attr-defined]
+    metrics = MetricsRegistry()
+    client = TestClient(create_app(handlers, metrics=metrics))
+
+    client.post("/webhooks/twilio/sms", data={"From": "+3400000001", "To": "+1000000001", "Body": "hello"})
+
+    assert metrics.histogram("group_message_segments", "", labels=("encoding",)).count("GSM-7") == 1
+    assert metrics.counter("group_message_fan_out_segments_total", "", labels=("encoding",)).value("GSM-7") == 0
+
+
+def test_api_measures_the_handlers_without_changing_them(handlers: APIHandlers) -> None:
+    handle = handlers.login.handle
+    handle.return_value = SessionToken(token="token", expires_at=1.5)  # type: ignore[attr-defined]
+    create_app(handlers, metrics=MetricsRegistry())
+    metrics = MetricsRegistry()
+    client = TestClient(create_app(handlers, metrics=metrics))
+
+    client.post("/login", json={"username": "testuser", "password": "password123"})
+
+    assert handlers.login.handle is handle
+    lines = client.get("/metrics").text.splitlines()
+    assert 'handler_duration_seconds_count{handler="login",outcome="ok"} 1' in lines
+    assert not any(line.startswith('handler_duration_seconds_count{handler="validate_user"') for line in lines)
+
+
+def test_api_ignores_duplicate_messages(handlers: APIHandlers) -> None:
+    handle = handlers.accept_group_message.handle
+    handle.return_value = None  # type: ignore[attr-defined]
+    metrics = MetricsRegistry()
+    client = TestClient(create_app(handlers, metrics=metrics))
+
+    response = client.post("/webhooks/twilio/sms",
+                           data={"From": "+3400000001", "To": "+1000000001", "Body": "hello", "MessageSid": "SM1"})
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    handle.assert_awaited_once_with(  # type: ignore[attr-defined]
+        user_number=PhoneNumber(root="+3400000001"), group_number=PhoneNumber(root="+1000000001"),
+        message="hello", message_id="SM1"
+    )
+    assert metrics.counter("group_message_duplicates_total", "").value() == 1
+
+
+def test_api_rejects_messages_too_long(handlers: APIHandlers) -> None:
+    handlers.accept_group_message.handle.side_effect = MessageTooLongError(12, 10)  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers))
+
+    response = client.post("/webhooks/twilio/sms", data={"From": "+3400000001", "To": "+1000000001", "Body": "hi"})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == "Message takes 12 SMS segments, more than the maximum of 10."
+
+
+def test_api_server_timing(handlers: APIHandlers) -> None:
+    handlers.accept_group_message.handle.return_value = accepted_message(1)  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers, metrics=MetricsRegistry(), server_timing=True))
+
+    response = client.post("/webhooks/twilio/sms", data={"From": "+3400000001", "To": "+1000000001", "Body": "hi"})
+
+    entries = response.headers["Server-Timing"].split(", ")
+    assert entries[0].startswith("handler.accept_group_message;dur=")
+    assert entries[0].endswith(';desc="1 calls"')
+    assert entries[-1].startswith("total;dur=")
+
+
+def test_api_arm_profiler(handlers: APIHandlers, tmp_path: Path) -> None:
+    client = TestClient(create_app(handlers, profiler=SamplingProfiler(output_dir=str(tmp_path)),
+                                   admin_token=ADMIN_TOKEN), headers=ADMIN_HEADERS)
+
+    response = client.post("/admin/profile", params={"requests": 5})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"remaining_requests": 5, "in_flight_requests": 0, "samples": 0, "last_profile": None}
+    # The request that reads the status is the first one profiled
+    assert client.get("/admin/profile").json()["remaining_requests"] == 4
+
+
+def test_api_profiler_endpoint_only_exists_with_a_profiler(handlers: APIHandlers) -> None:
+    client = TestClient(create_app(handlers, admin_token=ADMIN_TOKEN), headers=ADMIN_HEADERS)
+
+    assert client.post("/admin/profile").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_outbox_status(handlers: APIHandlers) -> None:
+    handlers.get_outbox_stats.handle.return_value = OutboxStats(  # type: ignore[attr-defined]
+        pending=3, in_flight=1, failed=0, oldest_pending_age_seconds=1.5
+    )
+    client = TestClient(create_app(handlers, admin_token=ADMIN_TOKEN))
+    response = client.get("/admin/outbox", headers=ADMIN_HEADERS)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"pending": 3, "in_flight": 1, "failed": 0, "oldest_pending_age_seconds": 1.5}
+
+
+def test_api_phone_number_load(handlers: APIHandlers) -> None:
+    handlers.get_phone_number_load.handle.return_value = [  # type: ignore[attr-defined]
+        PhoneNumberLoad(phone_number=PhoneNumber(root="+1000000001"), members=120, messages_per_minute=3.5),
+        PhoneNumberLoad(phone_number=PhoneNumber(root="+1000000002"), members=80, messages_per_minute=0.0),
+    ]
+    client = TestClient(create_app(handlers, admin_token=ADMIN_TOKEN))
+    response = client.get("/admin/phone-numbers", headers=ADMIN_HEADERS)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [
+        {"phone_number": "+1000000001", "members": 120, "messages_per_minute": 3.5},
+        {"phone_number": "+1000000002", "members": 80, "messages_per_minute": 0.0},
+    ]
+
+
+def test_api_admin_endpoints_require_the_admin_token(handlers: APIHandlers) -> None:
+    handlers.get_outbox_stats.handle.return_value = OutboxStats(  # type: ignore[attr-defined]
+        pending=0, in_flight=0, failed=0, oldest_pending_age_seconds=None
+    )
+
+    client = TestClient(create_app(handlers, admin_token=ADMIN_TOKEN))
+    assert client.get("/admin/outbox").status_code == HTTPStatus.UNAUTHORIZED
+    assert client.get("/admin/routing-cache", headers={"Authorization": "Bearer wrong"}).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+    assert client.get("/admin/outbox", headers=ADMIN_HEADERS).status_code == HTTPStatus.OK
+
+    # Without an admin token, nobody can use them
+    client = TestClient(create_app(handlers))
+    assert client.get("/admin/outbox", headers=ADMIN_HEADERS).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_api_find_groups_in_pages(handlers: APIHandlers) -> None:
+    group = Group(name=GroupName(root="team-a"))
+    group.add_user(Username(root="user1"), PhoneNumber(root="+1000000001"))
+    handlers.find_groups.handle.return_value = [group]  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers))
+
+    response = client.get("/groups", params={"group_name": "team", "limit": 1})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [{"name": "team-a", "users": ["user1"]}]
+    assert response.headers["X-Next-Cursor"] == "team-a"
+
+    response = client.get("/groups", params={"group_name": "team", "limit": 2, "cursor": "team-a"})
+    assert "X-Next-Cursor" not in response.headers
+    handlers.find_groups.handle.assert_called_with(  # type: ignore[attr-defined]
+        GroupName(root="team"), limit=2, after=GroupName(root="team-a")
+    )
+
+    response = client.get("/groups", params={"group_name": "team", "cursor": "NOT A GROUP"})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == "Invalid cursor."
+
+
+def test_api_find_group_summaries(handlers: APIHandlers) -> None:
+    handlers.find_group_summaries.handle.return_value = [  # type: ignore[attr-defined]
+        GroupSummary(name=GroupName(root="team-a"), member_count=5000)
+    ]
+    client = TestClient(create_app(handlers))
+
+    response = client.get("/groups", params={"group_name": "team", "include_members": False})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [{"name": "team-a", "member_count": 5000}]
+    handlers.find_groups.handle.assert_not_called()  # type: ignore[attr-defined]
+
+
+def create_user() -> User:
+    return User(username=Username(root="testuser"), phone_number=PhoneNumber(root="+1234567890"),
+                hashed_password=HashedPassword.from_string(UserPassword(root="password123")))
+
+
+def test_api_login(handlers: APIHandlers) -> None:
+    handlers.login.handle.return_value = SessionToken(token="token", expires_at=1.5)  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers))
+
+    response = client.post("/login", json={"username": "testuser", "password": "password123"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"access_token": "token", "token_type": "bearer", "expires_at": 1.5}
+
+
+def test_api_authenticates_with_a_session_token(handlers: APIHandlers) -> None:
+    user = create_user()
+    handlers.authenticate_session.handle.return_value = user  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers))
+
+    response = client.delete("/users/me", headers={"Authorization": "Bearer token"})
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    handlers.authenticate_session.handle.assert_called_once_with("token")  # type: ignore[attr-defined]
+    handlers.validate_user.handle.assert_not_called()  # type: ignore[attr-defined]
+    handlers.delete_user.handle.assert_called_once_with(user)  # type: ignore[attr-defined]
+
+    handlers.authenticate_session.handle.side_effect = InvalidSessionTokenError(  # type: ignore[attr-defined]
+        reason="expired"
+    )
+    response = client.delete("/users/me", headers={"Authorization": "Bearer token"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_api_refuses_non_ascii_session_tokens(handlers: APIHandlers) -> None:
+    handlers.authenticate_session = AuthenticateSessionHandler(user_repository=AsyncMock(),
+                                                               session_tokens=HMACSessionTokens(secret="secret"))
+    client = TestClient(create_app(handlers))
+
+    response = client.delete("/users/me", headers={b"Authorization": "Bearer abc.é".encode()})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    handlers.delete_user.handle.assert_not_called()  # type: ignore[attr-defined]
+
+
+def test_api_authenticates_with_credentials_without_a_session_token(handlers: APIHandlers) -> None:
+    handlers.validate_user.handle.return_value = create_user()  # type: ignore[attr-defined]
+    client = TestClient(create_app(handlers))
+
+    response = client.request("DELETE", "/users/me", json={"username": "testuser", "password": "password123"})
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    handlers.validate_user.handle.assert_called_once_with(  # type: ignore[attr-defined]
+        Username(root="testuser"), UserPassword(root="password123")
+    )
+
+    response = client.delete("/users/me")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
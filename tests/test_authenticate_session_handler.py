@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+import pytest
+
+from group_sms_chat.application.authenticate_session_handler import AuthenticateSessionHandler
+from group_sms_chat.application.delete_user_handler import DeleteUserHandler
+from group_sms_chat.application.login_handler import LoginHandler
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.exceptions import InvalidSessionTokenError, UserInvalidCredentialsError
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.phone_number_allocator import PhoneNumberAllocator
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.user_repository import CachedUserRepository
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+PASSWORD = UserPassword(root="password123")
+
+
+@pytest.mark.asyncio
+async def test_session_is_revoked_when_the_user_is_deleted(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    user_repo = CachedUserRepository(SQLiteUserRepository(pool=pool))
+    group_repo = SQLiteGroupRepository(pool=pool)
+    session_tokens = HMACSessionTokens(secret="secret")
+    validate_user = ValidateUserPasswordHandler(user_repository=user_repo, password_hasher=ScryptPasswordHasher(cost=4))
+    login = LoginHandler(validate_user=validate_user, session_tokens=session_tokens)
+    authenticate = AuthenticateSessionHandler(user_repository=user_repo, session_tokens=session_tokens)
+    delete_user = DeleteUserHandler(user_repository=user_repo, group_repository=group_repo,
+                                    unit_of_work=SQLiteUnitOfWork(pool=pool),
+                                    phone_number_allocator=Mock(spec=PhoneNumberAllocator))
+
+    user = User(username=Username(root="testuser"), phone_number=PhoneNumber(root="+1234567890"),
+                hashed_password=HashedPassword.from_string(PASSWORD))
+    await user_repo.add_user(user)
+    await group_repo.add_member(GroupName(root="testgroup"), user.username, PhoneNumber(root="+1000000001"))
+
+    with pytest.raises(UserInvalidCredentialsError):
+        await login.handle(user.username, UserPassword(root="wrongpassword"))
+    token = (await login.handle(user.username, PASSWORD)).token
+    authenticated_user = await authenticate.handle(token)
+    assert authenticated_user.username == user.username
+    # The legacy hash was replaced when logging in
+    assert not authenticated_user.hashed_password.is_legacy
+
+    await delete_user.handle(user)
+    assert await group_repo.find_user_groups(user.username) == []
+    with pytest.raises(InvalidSessionTokenError):
+        await authenticate.handle(token)
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_is_revoked_when_the_password_changes() -> None:
+    user_repo = SQLiteUserRepository(file_path=":memory:")
+    session_tokens = HMACSessionTokens(secret="secret")
+    authenticate = AuthenticateSessionHandler(user_repository=user_repo, session_tokens=session_tokens)
+
+    user = User(username=Username(root="testuser"), phone_number=PhoneNumber(root="+1234567890"),
+                hashed_password=HashedPassword.from_string(PASSWORD))
+    token = session_tokens.issue(user).token
+    await user_repo.add_user(user.model_copy(
+        update={"hashed_password": HashedPassword.from_string(UserPassword(root="newpassword"))}
+    ))
+
+    with pytest.raises(InvalidSessionTokenError):
+        await authenticate.handle(token)
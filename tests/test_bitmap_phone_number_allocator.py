@@ -0,0 +1,123 @@
+import asyncio
+import math
+
+import pytest
+
+from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.domain.exceptions import MaximumNumberOfGroupsReachedError, SMSDeliveryError
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+
+PHONE_NUMBERS = ["+1000000001", "+1000000002", "+1000000003"]
+USERNAME = Username(root="user1")
+
+
+@pytest.mark.asyncio
+async def test_allocate_and_release() -> None:
+    allocator = BitmapPhoneNumberAllocator(SQLiteGroupRepository(), FakeSMSService(phone_numbers=PHONE_NUMBERS))
+
+    assert [await allocator.allocate(USERNAME) for _ in PHONE_NUMBERS] == [PhoneNumber(root=n) for n in PHONE_NUMBERS]
+    with pytest.raises(MaximumNumberOfGroupsReachedError):
+        await allocator.allocate(USERNAME)
+
+    allocator.release(USERNAME, PhoneNumber(root="+1000000002"))
+    assert await allocator.allocate(USERNAME) == PhoneNumber(root="+1000000002")
+    # Other users have their own numbers
+    assert await allocator.allocate(Username(root="user2")) == PhoneNumber(root="+1000000001")
+
+    # The handlers release the numbers of the groups of a deleted user before forgetting them
+    for phone_number in PHONE_NUMBERS:
+        allocator.release(USERNAME, PhoneNumber(root=phone_number))
+    allocator.release_user(USERNAME)
+    assert await allocator.allocate(USERNAME) == PhoneNumber(root="+1000000002")
+
+
+@pytest.mark.asyncio
+async def test_used_numbers_are_loaded_from_the_groups_of_the_user() -> None:
+    group_repo = SQLiteGroupRepository()
+    await group_repo.add_member(GroupName(root="group1"), USERNAME, PhoneNumber(root="+1000000001"))
+    await group_repo.add_member(GroupName(root="group2"), USERNAME, PhoneNumber(root="+1000000003"))
+    # A number that is no longer provided does not take a slot
+    await group_repo.add_member(GroupName(root="group3"), USERNAME, PhoneNumber(root="+1999999999"))
+    allocator = BitmapPhoneNumberAllocator(group_repo, FakeSMSService(phone_numbers=PHONE_NUMBERS), max_users=1)
+
+    assert await allocator.allocate(USERNAME) == PhoneNumber(root="+1000000002")
+
+    # Once dropped, the numbers of the user are loaded again
+    await allocator.allocate(Username(root="user2"))
+    await group_repo.add_member(GroupName(root="group4"), USERNAME, PhoneNumber(root="+1000000002"))
+    with pytest.raises(MaximumNumberOfGroupsReachedError):
+        await allocator.allocate(USERNAME)
+
+
+@pytest.mark.asyncio
+async def test_users_with_pending_reservations_are_not_dropped() -> None:
+    allocator = BitmapPhoneNumberAllocator(SQLiteGroupRepository(), FakeSMSService(phone_numbers=PHONE_NUMBERS),
+                                           max_users=1)
+    first = await allocator.allocate(USERNAME)
+
+    # The reservation of user1 is not saved yet, so their numbers are kept over the maximum
+    await allocator.allocate(Username(root="user2"))
+    assert await allocator.allocate(USERNAME) != first
+
+
+@pytest.mark.asyncio
+async def test_concurrent_allocations_get_different_numbers() -> None:
+    allocator = BitmapPhoneNumberAllocator(SQLiteGroupRepository(), FakeSMSService(phone_numbers=PHONE_NUMBERS))
+
+    numbers = await asyncio.gather(*(allocator.allocate(USERNAME) for _ in PHONE_NUMBERS))
+    assert sorted(numbers, key=str) == [PhoneNumber(root=n) for n in PHONE_NUMBERS]
+
+
+@pytest.mark.asyncio
+async def test_a_failed_group_creation_releases_its_number(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    user = User(username=USERNAME, phone_number=PhoneNumber(root="+3400000001"),
+                hashed_password=HashedPassword.from_string(UserPassword(root="password123")))
+    sms_service = FakeSMSService(phone_numbers=PHONE_NUMBERS[:1], failing_phone_numbers=[str(user.phone_number)])
+    allocator = BitmapPhoneNumberAllocator(group_repo, sms_service)
+    create = CreateNewGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                   unit_of_work=SQLiteUnitOfWork(pool=pool), phone_number_allocator=allocator)
+
+    with pytest.raises(SMSDeliveryError):
+        await create.handle(GroupName(root="group1"), user)
+
+    assert await group_repo.get_group(GroupName(root="group1")) is None
+    assert await allocator.allocate(USERNAME) == PhoneNumber(root="+1000000001")
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_new_members_get_the_least_loaded_number() -> None:
+    group_repo = SQLiteGroupRepository()
+    for i in range(3):
+        await group_repo.add_member(GroupName(root="busy"), Username(root=f"member{i}"),
+                                    PhoneNumber(root="+1000000001"))
+    await group_repo.add_member(GroupName(root="quiet"), Username(root="member9"), PhoneNumber(root="+1000000002"))
+    now = [0.0]
+    allocator = BitmapPhoneNumberAllocator(group_repo, FakeSMSService(phone_numbers=PHONE_NUMBERS),
+                                           sent_half_life=60, clock=lambda: now[0])
+
+    # The third number has no members
+    assert await allocator.allocate(Username(root="user1")) == PhoneNumber(root="+1000000003")
+
+    # Members are counted together with the messages recently sent from each number
+    allocator.record_sent(PhoneNumber(root="+1000000003"), count=100)
+    assert await allocator.allocate(Username(root="user2")) == PhoneNumber(root="+1000000002")
+
+    loads = await allocator.load()
+    assert [(str(load.phone_number), load.members) for load in loads] == [
+        ("+1000000001", 3), ("+1000000002", 2), ("+1000000003", 1),
+    ]
+    assert loads[2].messages_per_minute == pytest.approx(100 * math.log(2))
+
+    # Old messages stop counting
+    now[0] = 3600
+    assert (await allocator.load())[2].messages_per_minute == pytest.approx(0, abs=1e-6)
+    assert await allocator.allocate(Username(root="user3")) == PhoneNumber(root="+1000000003")
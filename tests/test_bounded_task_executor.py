@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from functools import partial
+
+import pytest
+
+from group_sms_chat.infrastructure.background.task_executor import BoundedTaskExecutor
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+
+
+@pytest.mark.asyncio
+async def test_pending_tasks_are_drained_on_stop() -> None:
+    executor = BoundedTaskExecutor(workers=2)
+    done = []
+
+    async def task(i: int) -> None:
+        await asyncio.sleep(0.01)
+        done.append(i)
+
+    await executor.start()
+    for i in range(6):
+        await executor.submit(partial(task, i))
+    assert done == []
+    await executor.stop()
+
+    assert sorted(done) == list(range(6))
+    assert executor.backlog == 0
+
+
+@pytest.mark.asyncio
+async def test_submit_waits_while_the_queue_is_full() -> None:
+    metrics = MetricsRegistry()
+    executor = BoundedTaskExecutor(name="test", workers=1, max_queued=1, metrics=metrics)
+    release = asyncio.Event()
+
+    await executor.start()
+    await executor.submit(release.wait)
+    await asyncio.sleep(0)
+    await executor.submit(release.wait)
+    blocked = asyncio.create_task(executor.submit(release.wait))
+    await asyncio.sleep(0.01)
+
+    assert not blocked.done()
+    assert 'background_tasks_backlog{executor="test"} 2' in metrics.render().splitlines()
+    release.set()
+    await blocked
+    await executor.stop()
+    assert metrics.histogram("background_task_queue_seconds", "", labels=("executor",)).count("test") == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_logged_and_does_not_stop_the_worker(caplog: pytest.LogCaptureFixture) -> None:
+    executor = BoundedTaskExecutor(workers=1)
+    done = []
+
+    async def fail() -> None:
+        message = "boom"
+        raise RuntimeError(message)
+
+    async def succeed() -> None:
+        done.append(True)
+
+    await executor.start()
+    with caplog.at_level(logging.ERROR):
+        await executor.submit(fail)
+        await executor.submit(succeed)
+        await executor.stop()
+
+    assert done == [True]
+    assert "Background task of the background executor failed" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_abandoned_after_the_drain_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    executor = BoundedTaskExecutor(workers=1, drain_timeout=0.01)
+
+    await executor.start()
+    await executor.submit(asyncio.Event().wait)
+    with caplog.at_level(logging.WARNING):
+        await executor.stop()
+
+    assert "Cancelled 1 tasks of the background executor" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_tasks_run_inline_when_the_executor_is_not_running() -> None:
+    executor = BoundedTaskExecutor()
+    done = []
+
+    async def task() -> None:
+        done.append(True)
+
+    await executor.submit(task)
+
+    assert done == [True]
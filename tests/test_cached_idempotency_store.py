@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.domain.idempotency_store import IdempotencyStore
+from group_sms_chat.infrastructure.cache.idempotency_store import CachedIdempotencyStore
+
+
+class RecordingStore(IdempotencyStore):
+    def __init__(self, latency: float = 0.0, fail: bool = False) -> None:
+        self.keys: set[str] = set()
+        self.calls = 0
+        self.latency = latency
+        self.fail = fail
+
+    async def add(self, key: str) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            message = "database unavailable"
+            raise RuntimeError(message)
+        new = key not in self.keys
+        self.keys.add(key)
+        return new
+
+    async def discard(self, key: str) -> None:
+        self.keys.discard(key)
+
+
+@pytest.mark.asyncio
+async def test_recent_duplicates_do_not_query_the_store() -> None:
+    store = RecordingStore()
+    cache = CachedIdempotencyStore(store)
+
+    assert await cache.add("SM1") is True
+    assert await cache.add("SM1") is False
+    assert store.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_are_recognized() -> None:
+    store = RecordingStore(latency=0.01)
+    cache = CachedIdempotencyStore(store)
+
+    results = await asyncio.gather(cache.add("SM1"), cache.add("SM1"))
+
+    assert sorted(results) == [False, True]
+    assert store.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_evicted_and_expired_keys_are_checked_in_the_store() -> None:
+    now = [0.0]
+    store = RecordingStore()
+    cache = CachedIdempotencyStore(store, ttl=10, max_size=1, clock=lambda: now[0])
+    await cache.add("SM1")
+    await cache.add("SM2")
+
+    assert await cache.add("SM1") is False
+    now[0] = 10
+    assert await cache.add("SM1") is False
+    assert store.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_key_is_forgotten_when_the_store_fails() -> None:
+    store = RecordingStore(fail=True)
+    cache = CachedIdempotencyStore(store)
+
+    with pytest.raises(RuntimeError):
+        await cache.add("SM1")
+    store.fail = False
+
+    assert await cache.add("SM1") is True
+
+
+@pytest.mark.asyncio
+async def test_discarded_key_is_forgotten_by_the_cache_and_the_store() -> None:
+    store = RecordingStore()
+    cache = CachedIdempotencyStore(store)
+    await cache.add("SM1")
+
+    await cache.discard("SM1")
+
+    assert await cache.add("SM1") is True
+    assert store.calls == 2
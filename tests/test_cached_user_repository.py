@@ -0,0 +1,75 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.user_repository import CachedUserRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_user(number: int) -> User:
+    return User(
+        username=Username(root=f"user{number}"),
+        phone_number=PhoneNumber(root=f"+1{number:010d}"),
+        hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+    )
+
+
+@pytest.mark.asyncio
+async def test_users_are_served_from_the_cache_until_they_expire() -> None:
+    clock = FakeClock()
+    repository = SQLiteUserRepository(file_path=":memory:")
+    repository.get_user = AsyncMock(wraps=repository.get_user)  # type: ignore[method-assign]
+    cache = CachedUserRepository(repository, ttl=60, clock=clock)
+    user = create_user(1)
+    await cache.add_user(user)
+
+    assert await cache.get_user(user.username) == user
+    assert await cache.get_user(user.username) == user
+    assert repository.get_user.await_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    clock.now += 61
+    assert await cache.get_user(user.username) == user
+    assert repository.get_user.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_deleted_users_are_evicted() -> None:
+    cache = CachedUserRepository(SQLiteUserRepository(file_path=":memory:"))
+    user = create_user(1)
+    await cache.add_user(user)
+    assert await cache.get_user(user.username) == user
+
+    await cache.delete_user(user.username)
+    assert await cache.get_user(user.username) is None
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_users_are_evicted_first() -> None:
+    repository = SQLiteUserRepository(file_path=":memory:")
+    repository.get_user = AsyncMock(wraps=repository.get_user)  # type: ignore[method-assign]
+    cache = CachedUserRepository(repository, max_size=2)
+    users = [create_user(i) for i in range(3)]
+    for user in users:
+        await cache.add_user(user)
+
+    await cache.get_user(users[0].username)
+    await cache.get_user(users[1].username)
+    await cache.get_user(users[0].username)
+    await cache.get_user(users[2].username)
+    assert repository.get_user.await_count == 3
+
+    # user1 was the least recently used one
+    await cache.get_user(users[0].username)
+    assert repository.get_user.await_count == 3
+    await cache.get_user(users[1].username)
+    assert repository.get_user.await_count == 4
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.application.create_new_group_handler import CreateNewGroupHandler
+from group_sms_chat.domain.exceptions import GroupAlreadyExistsError
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+
+
+def create_user(username: str, phone_number: str) -> User:
+    return User(username=Username(root=username), phone_number=PhoneNumber(root=phone_number),
+                hashed_password=HashedPassword.from_string(UserPassword(root="password123")))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creations_of_a_group_create_it_once(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    sms_service = FakeSMSService(phone_numbers=["+1000000001"], latency=0.01)
+    allocator = BitmapPhoneNumberAllocator(group_repo, sms_service)
+    create = CreateNewGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                                   unit_of_work=SQLiteUnitOfWork(pool=pool), phone_number_allocator=allocator)
+    alice = create_user("alice", "+3400000001")
+    bob = create_user("bob", "+3400000002")
+
+    results = await asyncio.gather(create.handle(GroupName(root="foo"), alice),
+                                   create.handle(GroupName(root="foo"), bob), return_exceptions=True)
+
+    assert sorted(isinstance(result, Group) for result in results) == [False, True]
+    assert any(isinstance(result, GroupAlreadyExistsError) for result in results)
+    group = await group_repo.get_group(GroupName(root="foo"))
+    assert group is not None
+    assert len(group.users) == 1
+    assert len(sms_service.sent_messages) == 1
+    # The number of the user who lost the race is released
+    loser = bob if isinstance(results[1], GroupAlreadyExistsError) else alice
+    assert await allocator.allocate(loser.username) == PhoneNumber(root="+1000000001")
+    pool.close()
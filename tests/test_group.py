@@ -0,0 +1,73 @@
+import pytest
+from pydantic import ValidationError
+
+from group_sms_chat.domain.group import Group, GroupName, GroupUser
+from group_sms_chat.domain.user import PhoneNumber, Username
+
+USER1 = GroupUser(username=Username(root="user1"), user_group_phone_number=PhoneNumber(root="+1000000001"))
+USER2 = GroupUser(username=Username(root="user2"), user_group_phone_number=PhoneNumber(root="+1000000002"))
+
+
+def test_members_are_indexed_by_username() -> None:
+    group = Group(name=GroupName(root="group1"), users={USER1})
+    group.add_user(Username(root="user2"), PhoneNumber(root="+1000000002"))
+
+    assert group.users == {USER1, USER2}
+    assert group.get_user_phone_number(Username(root="user2")) == PhoneNumber(root="+1000000002")
+    assert group.get_user_phone_number(Username(root="user3")) is None
+
+    # Adding a member again replaces their phone number
+    group.add_user(Username(root="user2"), PhoneNumber(root="+1000000003"))
+    assert group.get_user_phone_number(Username(root="user2")) == PhoneNumber(root="+1000000003")
+
+    group.remove_user(Username(root="user2"))
+    group.remove_user(Username(root="user3"))
+    assert group.users == {USER1}
+
+
+def test_groups_with_the_same_members_are_equal() -> None:
+    assert Group(name=GroupName(root="group1"), users=[USER1, USER2]) == Group(
+        name=GroupName(root="group1"), users=[USER2, USER1]
+    )
+    assert Group(name=GroupName(root="group1"), users=[USER1]) != Group(name=GroupName(root="group1"))
+    assert USER1.username == Username(root="user1")
+    assert GroupUser(username=Username(root="user1"), user_group_phone_number=PhoneNumber(root="+1000000001")) == USER1
+
+
+def test_trusted_members_equal_validated_ones() -> None:
+    member = GroupUser.from_trusted("user1", "+1000000001")
+    assert member == USER1
+    assert hash(member) == hash(USER1)
+    assert member.user_group_phone_number == PhoneNumber(root="+1000000001")
+
+
+def test_members_are_changed_through_the_users_field() -> None:
+    group = Group(name=GroupName(root="group1"))
+    group.users.add(USER1)
+    group.users.add(USER2)
+    group.users.discard(USER2)
+
+    assert group.users == {USER1}
+    assert group.get_user_phone_number(Username(root="user1")) == PhoneNumber(root="+1000000001")
+    assert group.get_user_phone_number(Username(root="user2")) is None
+
+
+def test_groups_are_validated_and_dumped_with_their_members() -> None:
+    data = {"name": "group1", "users": [{"username": "user1", "user_group_phone_number": "+1000000001"}]}
+
+    group = Group.model_validate(data)
+
+    assert group == Group(name=GroupName(root="group1"), users=[USER1])
+    assert group.model_dump() == data
+    assert Group.model_validate_json(group.model_dump_json()) == group
+    with pytest.raises(ValidationError):
+        Group.model_validate({"name": "group1", "users": [{"username": "user1"}]})
+
+
+def test_copies_do_not_share_their_members() -> None:
+    group = Group(name=GroupName(root="group1"), users=[USER1])
+
+    for copy in (group.model_copy(), group.model_copy(deep=True)):
+        copy.add_user(Username(root="user2"), PhoneNumber(root="+1000000002"))
+        assert group.users == {USER1}
+        assert copy.users == {USER1, USER2}
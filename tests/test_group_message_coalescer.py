@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.application.accept_group_message_handler import AcceptGroupMessageHandler
+from group_sms_chat.application.group_message_coalescer import GroupMessageCoalescer
+from group_sms_chat.application.send_group_message_handler import FanOutResult, SendGroupMessageHandler
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.sms_encoding import SMSSegments
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBER = PhoneNumber(root="+15550000001")
+SENDER = PhoneNumber(root="+16660000000")
+
+
+async def create_handler(sms_service: FakeSMSService, groups: list[str], members: int = 3,
+                         database_path: str = ":memory:") -> SendGroupMessageHandler:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+
+    for i in range(members):
+        await user_repo.add_user(User(
+            username=Username(root=f"user{i}"),
+            phone_number=PhoneNumber(root=f"+1666{i:07d}"),
+            hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+        ))
+    for index, name in enumerate(groups):
+        group = Group(name=GroupName(root=name))
+        for i in range(members):
+            group.add_user(Username(root=f"user{i}"), PhoneNumber(root=f"+155500000{index + 1:02d}"))
+        await group_repo.create_or_update_group(group)
+
+    return SendGroupMessageHandler(user_repository=user_repo, group_repository=group_repo, sms_service=sms_service)
+
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_to_each_member_in_a_single_sms(database_path: str) -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    send_group_message = await create_handler(sms_service, groups=["chatty"], database_path=database_path)
+    coalescer = GroupMessageCoalescer(send_group_message, window=0.05)
+    accept = AcceptGroupMessageHandler(send_group_message, coalescer=coalescer)
+
+    for text in ("hi", "how are you", "see you at 8"):
+        await accept.handle(SENDER, GROUP_NUMBER, text)
+    assert sms_service.sent_messages == []
+
+    await asyncio.sleep(0.1)
+    assert sorted(str(sms.to_phone_number) for sms in sms_service.sent_messages) == ["+16660000001", "+16660000002"]
+    assert all(sms.message == "user0: hi\nuser0: how are you\nuser0: see you at 8"
+               for sms in sms_service.sent_messages)
+    assert coalescer.coalesced_messages == 3
+    assert coalescer.saved_sends == 4
+
+
+@pytest.mark.asyncio
+async def test_merged_messages_fit_the_segment_budget() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    send_group_message = await create_handler(sms_service, groups=["chatty"], members=2)
+    coalescer = GroupMessageCoalescer(send_group_message, window=60, max_segments=1)
+    accept = AcceptGroupMessageHandler(send_group_message, coalescer=coalescer)
+
+    for text in ("a" * 70, "b" * 70, "c" * 70):
+        await accept.handle(SENDER, GROUP_NUMBER, text)
+    result = await coalescer.flush(GroupName(root="chatty"))
+
+    # Two of the 77 characters messages fit a 160 characters segment, the third one is sent alone
+    assert result == FanOutResult(sent=2)
+    assert [sms.message for sms in sms_service.sent_messages] == [
+        f"user0: {'a' * 70}\nuser0: {'b' * 70}", f"user0: {'c' * 70}"
+    ]
+    assert coalescer.saved_sends == 1
+
+
+@pytest.mark.asyncio
+async def test_the_segments_of_the_merged_messages_are_recorded_when_sent() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    send_group_message = await create_handler(sms_service, groups=["chatty"])
+    recorded: list[SMSSegments] = []
+    coalescer = GroupMessageCoalescer(send_group_message, window=60, record_segments=recorded.append)
+    accept = AcceptGroupMessageHandler(send_group_message, coalescer=coalescer)
+
+    for text in ("a" * 100, "b" * 100):
+        await accept.handle(SENDER, GROUP_NUMBER, text)
+    assert recorded == []
+
+    await coalescer.flush(GroupName(root="chatty"))
+    # Each of the two other members gets a single merged message of two segments
+    assert [segments.count for segments in recorded] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_only_the_listed_groups_are_coalesced() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER), "+15550000002"])
+    send_group_message = await create_handler(sms_service, groups=["quiet", "chatty"], members=2)
+    coalescer = GroupMessageCoalescer(send_group_message, groups=["chatty"], window=60)
+    accept = AcceptGroupMessageHandler(send_group_message, coalescer=coalescer)
+
+    await accept.handle(SENDER, GROUP_NUMBER, "sent now")
+    await accept.handle(SENDER, PhoneNumber(root="+15550000002"), "held")
+
+    assert [sms.message for sms in sms_service.sent_messages] == ["user0: sent now"]
+    assert coalescer.coalesced_messages == 1
+
+
+@pytest.mark.asyncio
+async def test_held_messages_are_sent_on_stop(database_path: str) -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    send_group_message = await create_handler(sms_service, groups=["chatty"], members=2, database_path=database_path)
+    coalescer = GroupMessageCoalescer(send_group_message, window=60)
+    accept = AcceptGroupMessageHandler(send_group_message, coalescer=coalescer)
+
+    await accept.handle(SENDER, GROUP_NUMBER, "one")
+    await accept.handle(SENDER, GROUP_NUMBER, "two")
+    await coalescer.stop()
+
+    assert [sms.message for sms in sms_service.sent_messages] == ["user0: one\nuser0: two"]
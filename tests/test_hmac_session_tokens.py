@@ -0,0 +1,74 @@
+import pytest
+
+from group_sms_chat.domain.exceptions import InvalidSessionTokenError
+from group_sms_chat.domain.session import password_fingerprint
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.session.hmac_session_tokens import HMACSessionTokens
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_user() -> User:
+    return User(
+        username=Username(root="testuser"),
+        phone_number=PhoneNumber(root="+1234567890"),
+        hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+    )
+
+
+def test_issued_token_is_verified() -> None:
+    clock = FakeClock()
+    tokens = HMACSessionTokens(secret="secret", ttl=60, clock=clock)
+    user = create_user()
+
+    session_token = tokens.issue(user)
+    assert session_token.expires_at == clock.now + 60
+
+    session = tokens.verify(session_token.token)
+    assert session.username == user.username
+    assert session.password_fingerprint == password_fingerprint(user.hashed_password)
+
+    # Another instance with the same secret accepts it
+    assert HMACSessionTokens(secret="secret", clock=clock).verify(session_token.token) == session
+
+
+@pytest.mark.parametrize("token", ["", "garbage", "eyJzdWIiOiJ4In0.signature", "a.b.c", "abc.é", "é.abc"])
+def test_malformed_tokens_are_rejected(token: str) -> None:
+    tokens = HMACSessionTokens(secret="secret")
+    with pytest.raises(InvalidSessionTokenError):
+        tokens.verify(token)
+
+
+def test_tokens_signed_with_another_secret_are_rejected() -> None:
+    token = HMACSessionTokens(secret="other").issue(create_user()).token
+    with pytest.raises(InvalidSessionTokenError):
+        HMACSessionTokens(secret="secret").verify(token)
+
+
+def test_tampered_tokens_are_rejected() -> None:
+    tokens = HMACSessionTokens(secret="secret")
+    signature = tokens.issue(create_user()).token.partition(".")[2]
+    forged_payload = HMACSessionTokens(secret="other").issue(User(
+        username=Username(root="admin"),
+        phone_number=PhoneNumber(root="+1234567890"),
+        hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+    )).token.partition(".")[0]
+
+    with pytest.raises(InvalidSessionTokenError):
+        tokens.verify(f"{forged_payload}.{signature}")
+
+
+def test_expired_tokens_are_rejected() -> None:
+    clock = FakeClock()
+    tokens = HMACSessionTokens(secret="secret", ttl=60, clock=clock)
+    token = tokens.issue(create_user()).token
+
+    clock.now += 61
+    with pytest.raises(InvalidSessionTokenError):
+        tokens.verify(token)
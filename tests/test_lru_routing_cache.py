@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.application.join_group_handler import JoinGroupHandler
+from group_sms_chat.application.send_group_message_handler import FanOutResult, SendGroupMessageHandler
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.message_route import MessageRecipient, MessageRoute
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.cache.phone_number_allocator import BitmapPhoneNumberAllocator
+from group_sms_chat.infrastructure.cache.routing_cache import LRURoutingCache
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.unit_of_work import SQLiteUnitOfWork
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBER = PhoneNumber(root="+15550000001")
+
+
+def create_route(sender: str, group_name: str, recipients: list[str]) -> MessageRoute:
+    return MessageRoute(
+        sender=Username(root=sender),
+        group_name=GroupName(root=group_name),
+        recipients=[MessageRecipient(username=Username(root=recipient), phone_number=None,
+                                     group_phone_number=GROUP_NUMBER) for recipient in recipients]
+    )
+
+
+class RouteLoader:
+    def __init__(self, route: MessageRoute | None) -> None:
+        self.route = route
+        self.calls = 0
+
+    async def __call__(self) -> MessageRoute | None:
+        self.calls += 1
+        return self.route
+
+
+@pytest.mark.asyncio
+async def test_routes_are_loaded_once() -> None:
+    cache = LRURoutingCache()
+    load = RouteLoader(create_route("user1", "group1", ["user2"]))
+
+    for _ in range(3):
+        assert await cache.get_or_load(PhoneNumber(root="+16660000001"), GROUP_NUMBER, load) == load.route
+    assert load.calls == 1
+
+    missing = RouteLoader(None)
+    for _ in range(2):
+        assert await cache.get_or_load(PhoneNumber(root="+16660000002"), GROUP_NUMBER, missing) is None
+    assert missing.calls == 2
+
+    stats = cache.stats()
+    assert (stats.size, stats.hits, stats.misses) == (1, 2, 3)
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_routes_are_evicted() -> None:
+    cache = LRURoutingCache(max_size=2)
+    loads = [RouteLoader(create_route(f"user{i}", "group1", [])) for i in range(3)]
+    numbers = [PhoneNumber(root=f"+1666000000{i}") for i in range(3)]
+
+    await cache.get_or_load(numbers[0], GROUP_NUMBER, loads[0])
+    await cache.get_or_load(numbers[1], GROUP_NUMBER, loads[1])
+    await cache.get_or_load(numbers[0], GROUP_NUMBER, loads[0])
+    await cache.get_or_load(numbers[2], GROUP_NUMBER, loads[2])
+    await cache.get_or_load(numbers[0], GROUP_NUMBER, loads[0])
+    await cache.get_or_load(numbers[1], GROUP_NUMBER, loads[1])
+
+    assert [load.calls for load in loads] == [1, 2, 1]
+    assert cache.stats().evictions == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_removes_the_routes_of_a_group_or_a_sender() -> None:
+    cache = LRURoutingCache()
+    routes = {
+        ("user1", "group1"): RouteLoader(create_route("user1", "group1", ["user2"])),
+        ("user2", "group1"): RouteLoader(create_route("user2", "group1", ["user1"])),
+        ("user1", "group2"): RouteLoader(create_route("user1", "group2", [])),
+    }
+    numbers = {"user1": PhoneNumber(root="+16660000001"), "user2": PhoneNumber(root="+16660000002")}
+    group_numbers = {"group1": GROUP_NUMBER, "group2": PhoneNumber(root="+15550000002")}
+
+    async def load_all() -> list[int]:
+        for (sender, group), load in routes.items():
+            await cache.get_or_load(numbers[sender], group_numbers[group], load)
+        return [load.calls for load in routes.values()]
+
+    assert await load_all() == [1, 1, 1]
+    cache.invalidate_group(GroupName(root="group1"))
+    assert await load_all() == [2, 2, 1]
+    cache.invalidate_user(Username(root="user1"))
+    assert await load_all() == [3, 2, 2]
+    assert cache.stats().size == 3
+
+
+@pytest.mark.asyncio
+async def test_route_loaded_during_an_invalidation_is_not_cached() -> None:
+    cache = LRURoutingCache()
+    loading = asyncio.Event()
+    invalidated = asyncio.Event()
+
+    async def slow_load() -> MessageRoute | None:
+        loading.set()
+        await invalidated.wait()
+        return create_route("user1", "group1", [])
+
+    task = asyncio.create_task(cache.get_or_load(PhoneNumber(root="+16660000001"), GROUP_NUMBER, slow_load))
+    await loading.wait()
+    cache.invalidate_group(GroupName(root="group1"))
+    invalidated.set()
+    await task
+
+    assert cache.stats().size == 0
+
+
+@pytest.mark.asyncio
+async def test_new_members_receive_the_messages_of_a_cached_route() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    cache = LRURoutingCache()
+    send = SendGroupMessageHandler(user_repository=user_repo, group_repository=group_repo, sms_service=sms_service,
+                                   routing_cache=cache)
+    join = JoinGroupHandler(group_repository=group_repo, sms_service=sms_service,
+                            unit_of_work=SQLiteUnitOfWork(pool=pool),
+                            phone_number_allocator=BitmapPhoneNumberAllocator(group_repo, sms_service),
+                            routing_cache=cache)
+
+    users = [User(username=Username(root=f"user{i}"), phone_number=PhoneNumber(root=f"+1666000000{i}"),
+                  hashed_password=HashedPassword.from_string(UserPassword(root="password123"))) for i in range(3)]
+    for user in users:
+        await user_repo.add_user(user)
+    for user in users[:2]:
+        await group_repo.add_member(GroupName(root="group1"), user.username, GROUP_NUMBER)
+
+    assert await send.handle(users[0].phone_number, GROUP_NUMBER, "hello") == FanOutResult(sent=1)
+    assert await send.handle(users[0].phone_number, GROUP_NUMBER, "hello") == FanOutResult(sent=1)
+    assert cache.stats().hits == 1
+
+    await join.handle(GroupName(root="group1"), users[2])
+    assert await send.handle(users[0].phone_number, GROUP_NUMBER, "hello") == FanOutResult(sent=2)
@@ -0,0 +1,86 @@
+import pytest
+
+from group_sms_chat.domain.exceptions import SMSDeliveryError
+from group_sms_chat.domain.sms_service import SMSMessage
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+from group_sms_chat.infrastructure.metrics.sms_service import MeteredSMSService
+
+
+def test_render_counters_and_histograms() -> None:
+    metrics = MetricsRegistry()
+    requests = metrics.counter("requests_total", "Requests", labels=("route",))
+    latency = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests.inc("/health")
+    requests.inc("/health")
+    requests.inc('/a"b', amount=0.5)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert metrics.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/health"} 2\n'
+        'requests_total{route="/a\\"b"} 0.5\n'
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+def test_metrics_are_shared_by_name() -> None:
+    metrics = MetricsRegistry()
+    counter = metrics.counter("requests_total", "Requests", labels=("route",))
+
+    assert metrics.counter("requests_total", "Requests", labels=("route",)) is counter
+    with pytest.raises(ValueError, match="already registered"):
+        metrics.histogram("requests_total", "Requests", labels=("route",))
+
+
+@pytest.mark.asyncio
+async def test_sms_messages_are_measured_by_sender_number() -> None:
+    metrics = MetricsRegistry()
+    sms_service = MeteredSMSService(FakeSMSService(phone_numbers=["+1000000001"],
+                                                   failing_phone_numbers=["+3400000002"]), metrics)
+    sender = PhoneNumber(root="+1000000001")
+
+    await sms_service.send_sms(sender, PhoneNumber(root="+3400000001"), "hello")
+    with pytest.raises(SMSDeliveryError):
+        await sms_service.send_sms(sender, PhoneNumber(root="+3400000002"), "hello")
+
+    assert sms_service.messages.value("+1000000001", "sent") == 1
+    assert sms_service.messages.value("+1000000001", "failed") == 1
+    assert sms_service.duration.count("+1000000001") == 2
+
+
+def test_counter_values_can_be_read_from_a_function() -> None:
+    metrics = MetricsRegistry()
+    counts = {"saved": 3}
+    metrics.counter("saved_total", "Saved").set_function(lambda: counts["saved"])
+
+    counts["saved"] = 5
+
+    assert metrics.render() == "# HELP saved_total Saved\n# TYPE saved_total counter\nsaved_total 5\n"
+
+
+@pytest.mark.asyncio
+async def test_bulk_sends_are_counted_by_sender_number() -> None:
+    metrics = MetricsRegistry()
+    sms_service = MeteredSMSService(FakeSMSService(phone_numbers=["+1000000001"],
+                                                   failing_phone_numbers=["+3400000002"]), metrics)
+    sender = PhoneNumber(root="+1000000001")
+
+    results = await sms_service.send_bulk([SMSMessage(sender, PhoneNumber(root=f"+340000000{i}"), "hello")
+                                           for i in range(1, 4)])
+
+    assert [result.sent for result in results] == [True, False, True]
+    assert sms_service.messages.value("+1000000001", "sent") == 2
+    assert sms_service.messages.value("+1000000001", "failed") == 1
+    assert sms_service.bulk_duration.count("+1000000001") == 1
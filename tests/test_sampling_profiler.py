@@ -0,0 +1,45 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from group_sms_chat.infrastructure.metrics.profiler import SamplingProfiler
+
+
+def slow_request_work() -> None:
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_the_armed_requests_are_profiled_to_a_file(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=str(tmp_path), interval=0.001)
+    assert not profiler.request_started()
+
+    profiler.arm(1)
+    assert profiler.request_started()
+    assert not profiler.request_started()
+    slow_request_work()
+    profiler.request_finished()
+
+    for _ in range(100):
+        if profiler.status().last_profile is not None:
+            break
+        await asyncio.sleep(0.01)
+    status = profiler.status()
+    assert status.remaining_requests == 0
+    assert status.last_profile is not None
+    stacks = Path(status.last_profile).read_text(encoding="utf-8").splitlines()
+    assert any("slow_request_work (test_sampling_profiler.py:" in stack for stack in stacks)
+    assert all(stack.rsplit(" ", 1)[1].isdigit() for stack in stacks)
+    await profiler.stop()
+
+
+def test_armed_requests_are_capped(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(output_dir=str(tmp_path), requests=50, max_requests=20)
+    assert profiler.status().remaining_requests == 20
+
+    profiler.arm(15)
+    assert profiler.status().remaining_requests == 20
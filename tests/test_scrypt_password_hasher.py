@@ -0,0 +1,59 @@
+import pytest
+
+from group_sms_chat.application.validate_user_password import ValidateUserPasswordHandler
+from group_sms_chat.domain.exceptions import UserInvalidCredentialsError
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.scrypt.password_hasher import ScryptPasswordHasher
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+PASSWORD = UserPassword(root="password123")
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify() -> None:
+    hasher = ScryptPasswordHasher(cost=4)
+
+    hashed_password = await hasher.hash(PASSWORD)
+    assert str(hashed_password).startswith("scrypt$4$8$1$")
+    assert not hashed_password.is_legacy
+    # Every hash has its own salt
+    assert await hasher.hash(PASSWORD) != hashed_password
+
+    assert await hasher.verify(PASSWORD, hashed_password)
+    assert not await hasher.verify(UserPassword(root="wrongpassword"), hashed_password)
+    assert not hasher.needs_rehash(hashed_password)
+    assert ScryptPasswordHasher(cost=5).needs_rehash(hashed_password)
+    await hasher.stop()
+
+
+@pytest.mark.asyncio
+async def test_verify_legacy_hashes() -> None:
+    hasher = ScryptPasswordHasher(cost=4)
+    legacy_password = HashedPassword.from_string(PASSWORD)
+
+    assert legacy_password.is_legacy
+    assert await hasher.verify(PASSWORD, legacy_password)
+    assert not await hasher.verify(UserPassword(root="wrongpassword"), legacy_password)
+    assert hasher.needs_rehash(legacy_password)
+
+
+@pytest.mark.asyncio
+async def test_legacy_hash_is_replaced_on_login() -> None:
+    user_repo = SQLiteUserRepository(file_path=":memory:")
+    handler = ValidateUserPasswordHandler(user_repository=user_repo, password_hasher=ScryptPasswordHasher(cost=4))
+    await user_repo.add_user(User(username=Username(root="testuser"), phone_number=PhoneNumber(root="+1234567890"),
+                                  hashed_password=HashedPassword.from_string(PASSWORD)))
+
+    with pytest.raises(UserInvalidCredentialsError):
+        await handler.handle(Username(root="testuser"), UserPassword(root="wrongpassword"))
+    stored_user = await user_repo.get_user(Username(root="testuser"))
+    assert stored_user is not None
+    assert stored_user.hashed_password.is_legacy
+
+    user = await handler.handle(Username(root="testuser"), PASSWORD)
+    stored_user = await user_repo.get_user(Username(root="testuser"))
+    assert stored_user == user
+    assert not user.hashed_password.is_legacy
+
+    # The new hash is accepted on the next login and kept
+    assert await handler.handle(Username(root="testuser"), PASSWORD) == user
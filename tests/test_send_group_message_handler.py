@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.application.accept_group_message_handler import AcceptGroupMessageHandler
+from group_sms_chat.application.send_group_message_handler import FanOutResult, SendGroupMessageHandler
+from group_sms_chat.domain.exceptions import MessageTooLongError, PhoneNotFoundError
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.message_route import MessageRoute
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.background.task_executor import BoundedTaskExecutor
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.idempotency_store import SQLiteIdempotencyStore
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+GROUP_NUMBER = PhoneNumber(root="+15550000001")
+
+
+async def create_handler(members: int, sms_service: FakeSMSService, max_concurrency: int = 10,
+                         registered_members: int | None = None,
+                         database_path: str = ":memory:") -> SendGroupMessageHandler:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+
+    group = Group(name=GroupName(root="testgroup"))
+    for i in range(members):
+        username = Username(root=f"user{i}")
+        if registered_members is None or i < registered_members:
+            await user_repo.add_user(User(
+                username=username,
+                phone_number=PhoneNumber(root=f"+1666{i:07d}"),
+                hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+            ))
+        group.add_user(username, GROUP_NUMBER)
+    await group_repo.create_or_update_group(group)
+
+    return SendGroupMessageHandler(user_repository=user_repo, group_repository=group_repo,
+                                   sms_service=sms_service, max_concurrency=max_concurrency)
+
+
+@pytest.mark.asyncio
+async def test_message_is_sent_to_every_other_member(database_path: str) -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = await create_handler(members=3, sms_service=sms_service, database_path=database_path)
+
+    result = await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello")
+
+    assert result == FanOutResult(sent=2)
+    assert {str(sms.to_phone_number) for sms in sms_service.sent_messages} == {"+16660000001", "+16660000002"}
+    assert all(sms.message == "user0: hello" for sms in sms_service.sent_messages)
+    assert all(sms.from_phone_number == GROUP_NUMBER for sms in sms_service.sent_messages)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_is_concurrent_up_to_the_limit(database_path: str) -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)], latency=0.01)
+    handler = await create_handler(members=21, sms_service=sms_service, max_concurrency=5,
+                                   database_path=database_path)
+
+    result = await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello")
+
+    assert result == FanOutResult(sent=20)
+    assert sms_service.max_in_flight == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_and_unknown_recipients_do_not_abort_the_fan_out() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)], failing_phone_numbers={"+16660000001"})
+    handler = await create_handler(members=5, sms_service=sms_service, registered_members=4)
+
+    result = await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello")
+
+    assert result == FanOutResult(sent=2, failed=1, skipped=1)
+
+
+@pytest.mark.asyncio
+async def test_unknown_sender_raises_an_error() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = await create_handler(members=2, sms_service=sms_service)
+
+    with pytest.raises(PhoneNotFoundError):
+        await handler.handle(PhoneNumber(root="+19999999999"), GROUP_NUMBER, "hello")
+
+
+@pytest.mark.asyncio
+async def test_unknown_group_number_raises_an_error() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = await create_handler(members=2, sms_service=sms_service)
+
+    with pytest.raises(PhoneNotFoundError, match=r"\+15559999999"):
+        await handler.handle(PhoneNumber(root="+16660000000"), PhoneNumber(root="+15559999999"), "hello")
+
+
+@pytest.mark.asyncio
+async def test_accepted_message_is_sent_in_the_background(database_path: str) -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)], latency=0.05)
+    executor = BoundedTaskExecutor(workers=1)
+    send_group_message = await create_handler(members=3, sms_service=sms_service, database_path=database_path)
+    handler = AcceptGroupMessageHandler(send_group_message=send_group_message, task_executor=executor)
+    await executor.start()
+
+    accepted = await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello")
+
+    assert accepted is not None
+    assert str(accepted.route.sender) == "user0"
+    assert len(accepted.route.recipients) == 2
+    assert accepted.message.text == "user0: hello"
+    assert sms_service.sent_messages == []
+    await executor.stop()
+    assert len(sms_service.sent_messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_sender_is_rejected_before_the_message_is_accepted() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    executor = BoundedTaskExecutor()
+    handler = AcceptGroupMessageHandler(send_group_message=await create_handler(members=2, sms_service=sms_service),
+                                        task_executor=executor)
+
+    with pytest.raises(PhoneNotFoundError):
+        await handler.handle(PhoneNumber(root="+19999999999"), GROUP_NUMBER, "hello")
+    await asyncio.sleep(0)
+    assert executor.backlog == 0
+
+
+@pytest.mark.asyncio
+async def test_message_delivered_again_is_not_sent_twice() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = AcceptGroupMessageHandler(send_group_message=await create_handler(members=3, sms_service=sms_service),
+                                        idempotency_store=SQLiteIdempotencyStore(file_path=":memory:"))
+
+    assert await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello", message_id="SM1")
+    assert await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello", message_id="SM1") is None
+    assert await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello", message_id="SM2")
+
+    assert len(sms_service.sent_messages) == 4
+
+
+@pytest.mark.asyncio
+async def test_look_alike_characters_are_normalized_to_gsm7() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = await create_handler(members=2, sms_service=sms_service)
+    handler.normalize_to_gsm7 = True
+
+    await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "it\u2019s \u201cdone\u201d \u2014 caf\u00e9")
+    await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "it\u2019s done \U0001f389")
+
+    assert [sms.message for sms in sms_service.sent_messages] == [
+        'user0: it\'s "done" - caf\u00e9', "user0: it\u2019s done \U0001f389"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_messages_longer_than_the_maximum_segments_are_rejected() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    handler = await create_handler(members=2, sms_service=sms_service)
+    handler.max_segments = 2
+
+    await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "a" * 299)
+    with pytest.raises(MessageTooLongError):
+        await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "a" * 300)
+
+    assert len(sms_service.sent_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_message_that_failed_to_be_accepted_is_sent_when_delivered_again() -> None:
+    sms_service = FakeSMSService(phone_numbers=[str(GROUP_NUMBER)])
+    send_group_message = await create_handler(members=3, sms_service=sms_service)
+    handler = AcceptGroupMessageHandler(send_group_message=send_group_message,
+                                        idempotency_store=SQLiteIdempotencyStore(file_path=":memory:"))
+    load_route = send_group_message.group_repository.get_message_route
+    calls = 0
+
+    async def get_message_route(user_phone_number: PhoneNumber,
+                                group_phone_number: PhoneNumber) -> MessageRoute | None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            message = "database is locked"
+            raise RuntimeError(message)
+        return await load_route(user_phone_number, group_phone_number)
+
+    send_group_message.group_repository.get_message_route = get_message_route  # type: ignore[method-assign]
+    with pytest.raises(RuntimeError, match="locked"):
+        await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello", message_id="SM1")
+
+    assert await handler.handle(PhoneNumber(root="+16660000000"), GROUP_NUMBER, "hello", message_id="SM1")
+    assert len(sms_service.sent_messages) == 2
@@ -0,0 +1,35 @@
+from group_sms_chat.domain.sms_encoding import SMSEncoding, SMSSegments, count_segments, to_gsm7
+
+
+def test_gsm7_text_fits_160_characters_in_a_segment() -> None:
+    assert count_segments("") == SMSSegments(SMSEncoding.GSM_7, 0, 1)
+    assert count_segments("a" * 160) == SMSSegments(SMSEncoding.GSM_7, 160, 1)
+    assert count_segments("a" * 161) == SMSSegments(SMSEncoding.GSM_7, 161, 2)
+    assert count_segments("a" * 306) == SMSSegments(SMSEncoding.GSM_7, 306, 2)
+    assert count_segments("a" * 307) == SMSSegments(SMSEncoding.GSM_7, 307, 3)
+
+
+def test_gsm7_extension_characters_take_two_septets_in_the_same_segment() -> None:
+    assert count_segments("€" * 80) == SMSSegments(SMSEncoding.GSM_7, 160, 1)
+    assert count_segments("a" * 159 + "€") == SMSSegments(SMSEncoding.GSM_7, 161, 2)
+    # The escape and the character are not split, so the second segment starts with the euro sign
+    assert count_segments("a" * 152 + "€" + "a" * 152) == SMSSegments(SMSEncoding.GSM_7, 306, 3)
+
+
+def test_a_single_non_gsm7_character_switches_to_ucs2() -> None:
+    assert count_segments("a" * 69 + "\u2019") == SMSSegments(SMSEncoding.UCS_2, 70, 1)
+    assert count_segments("a" * 70 + "\u2019") == SMSSegments(SMSEncoding.UCS_2, 71, 2)
+    # Emojis take a surrogate pair, which is not split across segments
+    assert count_segments("a" * 66 + "\U0001f389" + "a") == SMSSegments(SMSEncoding.UCS_2, 69, 1)
+    assert count_segments("a" * 66 + "\U0001f389" + "a" * 5) == SMSSegments(SMSEncoding.UCS_2, 73, 2)
+
+
+def test_look_alike_characters_are_replaced_with_gsm7_ones() -> None:
+    assert to_gsm7("it\u2019s \u201cfine\u201d\u2026 \u2013 ok") == 'it\'s "fine"... - ok'
+    assert to_gsm7("café á ça \uff11") == "café a Ça 1"
+    assert to_gsm7("plain text") == "plain text"
+
+
+def test_text_without_gsm7_look_alikes_is_not_normalized() -> None:
+    assert to_gsm7("party \U0001f389") is None
+    assert to_gsm7("你好") is None
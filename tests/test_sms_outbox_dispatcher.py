@@ -0,0 +1,161 @@
+import asyncio
+import urllib.parse
+
+import httpx
+import pytest
+
+from group_sms_chat.domain.sms_service import SMSMessage
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.fake.sms_service import FakeSMSService
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+from group_sms_chat.infrastructure.metrics.sms_service import MeteredSMSService
+from group_sms_chat.infrastructure.outbox.dispatcher import SMSOutboxDispatcher
+from group_sms_chat.infrastructure.outbox.sms_service import OutboxSMSService
+from group_sms_chat.infrastructure.sqlite.sms_outbox import SQLiteSMSOutbox
+from group_sms_chat.infrastructure.twilio.http_sms_service import TwilioHTTPSMSService
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter, RateLimit
+
+FROM_NUMBER = PhoneNumber(root="+15550000001")
+
+
+@pytest.mark.asyncio
+async def test_enqueued_messages_are_delivered_by_the_workers() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    delivery_service = FakeSMSService(phone_numbers=[str(FROM_NUMBER)])
+    sms_service = OutboxSMSService(outbox=outbox, delivery_service=delivery_service)
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=delivery_service, workers=2, poll_interval=5)
+
+    await dispatcher.start()
+    for i in range(5):
+        await sms_service.send_sms(FROM_NUMBER, PhoneNumber(root=f"+1666000000{i}"), "hello")
+
+    for _ in range(100):
+        if len(delivery_service.sent_messages) == 5:
+            break
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert len(delivery_service.sent_messages) == 5
+    assert (await outbox.stats()).pending == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_are_retried_until_the_maximum_attempts() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    delivery_service = FakeSMSService(phone_numbers=[str(FROM_NUMBER)], failing_phone_numbers={"+16660000000"})
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=delivery_service,
+                                     max_attempts=3, initial_backoff=0)
+
+    await outbox.enqueue(FROM_NUMBER, PhoneNumber(root="+16660000000"), "hello")
+    await outbox.enqueue(FROM_NUMBER, PhoneNumber(root="+16660000001"), "hello")
+
+    assert await dispatcher.drain() == 4
+
+    stats = await outbox.stats()
+    assert (stats.pending, stats.in_flight, stats.failed) == (0, 0, 1)
+    assert len(delivery_service.sent_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_delivered_batches_are_measured_by_sender_number() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    other_number = PhoneNumber(root="+15550000002")
+    sms_service = MeteredSMSService(FakeSMSService(phone_numbers=[str(FROM_NUMBER), str(other_number)]),
+                                    MetricsRegistry())
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=sms_service)
+
+    for i in range(3):
+        await outbox.enqueue(FROM_NUMBER, PhoneNumber(root=f"+1666000000{i}"), "hello")
+    await outbox.enqueue(other_number, PhoneNumber(root="+16660000009"), "hello")
+
+    assert await dispatcher.drain() == 4
+    assert sms_service.bulk_duration.count(str(FROM_NUMBER)) == 1
+    assert sms_service.bulk_duration.count(str(other_number)) == 1
+    assert sms_service.messages.value(str(FROM_NUMBER), "sent") == 3
+    assert sms_service.messages.value(str(other_number), "sent") == 1
+
+
+@pytest.mark.asyncio
+async def test_claimed_messages_are_sent_concurrently() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    delivery_service = FakeSMSService(phone_numbers=[str(FROM_NUMBER)], latency=0.05)
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=delivery_service, batch_size=10)
+    await outbox.enqueue_many([SMSMessage(FROM_NUMBER, PhoneNumber(root=f"+1666000000{i}"), "hello")
+                               for i in range(10)])
+
+    assert await dispatcher.drain() == 10
+
+    assert len(delivery_service.sent_messages) == 10
+    assert delivery_service.max_in_flight == 10
+
+
+@pytest.mark.asyncio
+async def test_throttled_number_does_not_delay_the_others() -> None:
+    other_number = PhoneNumber(root="+15550000002")
+    sent_at: dict[str, list[float]] = {}
+    loop = asyncio.get_running_loop()
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        sent_at.setdefault(dict(urllib.parse.parse_qsl(request.content.decode()))["From"], []).append(loop.time())
+        return httpx.Response(201)
+
+    rate_limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=1000, burst=10),
+                                          limits={str(FROM_NUMBER): RateLimit(rate=20, burst=1)})
+    delivery_service = TwilioHTTPSMSService(account_sid="AC123", auth_token="secret",
+                                            phone_numbers=[str(FROM_NUMBER), str(other_number)],
+                                            base_url="http://twilio.local", transport=httpx.MockTransport(handle),
+                                            rate_limiter=rate_limiter)
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=delivery_service, workers=2, batch_size=5)
+    # The messages of the throttled number are the oldest ones
+    await outbox.enqueue_many([SMSMessage(number, PhoneNumber(root=f"+1666000000{i}"), "hello")
+                               for number in (FROM_NUMBER, other_number) for i in range(10)])
+
+    start = loop.time()
+    await asyncio.gather(dispatcher.drain(), dispatcher.drain())
+    await delivery_service.stop()
+
+    # The throttled number sends a message every 50ms, the other one does not wait for it
+    assert len(sent_at[str(FROM_NUMBER)]) == len(sent_at[str(other_number)]) == 10
+    assert max(sent_at[str(FROM_NUMBER)]) - start >= 0.4
+    assert max(sent_at[str(other_number)]) - start < 0.1
+
+
+def test_backoff_grows_exponentially_up_to_the_maximum() -> None:
+    dispatcher = SMSOutboxDispatcher(outbox=SQLiteSMSOutbox(file_path=":memory:"),
+                                     sms_service=FakeSMSService(phone_numbers=[]),
+                                     initial_backoff=1, max_backoff=5)
+
+    assert [dispatcher.backoff(attempts) for attempts in range(1, 6)] == [1, 2, 4, 5, 5]
+
+
+@pytest.mark.asyncio
+async def test_messages_left_in_flight_are_recovered_on_start() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    delivery_service = FakeSMSService(phone_numbers=[str(FROM_NUMBER)])
+    await outbox.enqueue(FROM_NUMBER, PhoneNumber(root="+16660000000"), "hello")
+    await outbox.claim(limit=10)
+
+    dispatcher = SMSOutboxDispatcher(outbox=outbox, sms_service=delivery_service, poll_interval=5)
+    await dispatcher.start()
+    for _ in range(100):
+        if delivery_service.sent_messages:
+            break
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert len(delivery_service.sent_messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_enqueues_every_message_at_once() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    sms_service = OutboxSMSService(outbox=outbox, delivery_service=FakeSMSService(phone_numbers=[str(FROM_NUMBER)]))
+
+    results = await sms_service.send_bulk([
+        SMSMessage(FROM_NUMBER, PhoneNumber(root=f"+1666000000{i}"), f"hello {i}") for i in range(3)
+    ])
+
+    assert all(result.sent for result in results)
+    messages = await outbox.claim(limit=10)
+    assert [message.message for message in messages] == ["hello 0", "hello 1", "hello 2"]
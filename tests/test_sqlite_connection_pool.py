@@ -0,0 +1,175 @@
+import asyncio
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from group_sms_chat.domain.group import Group, GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.metrics.registry import MetricsRegistry
+from group_sms_chat.infrastructure.metrics.tracing import start_trace
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+
+@pytest.mark.asyncio
+async def test_repositories_share_the_same_pool(tmp_path: Path) -> None:
+    pool = SQLiteConnectionPool(file_path=str(tmp_path / "test.db"), readers=2)
+    user_repo = SQLiteUserRepository(pool=pool)
+    group_repo = SQLiteGroupRepository(pool=pool)
+
+    user = User(
+        username=Username("testuser"),
+        phone_number=PhoneNumber("+1234567890"),
+        hashed_password=HashedPassword.from_string(UserPassword("password123"))
+    )
+    await user_repo.add_user(user)
+
+    group = Group(name=GroupName(root="testgroup"))
+    group.add_user(user.username, PhoneNumber(root="+1000000000"))
+    await group_repo.create_or_update_group(group)
+
+    assert await user_repo.get_user(user.username) == user
+    found_group = await group_repo.get_group(group.name)
+    assert found_group is not None
+    assert found_group.users == group.users
+
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_rolled_back(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    pool.initialize(lambda connection: connection.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+
+    def insert_twice(connection: sqlite3.Connection) -> None:
+        connection.execute("INSERT INTO items (name) VALUES ('a')")
+        connection.execute("INSERT INTO items (name) VALUES ('a')")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        await pool.write(insert_twice)
+
+    count = await pool.read(lambda connection: connection.execute("SELECT COUNT(*) FROM items").fetchone()[0])
+    assert count == 0
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_do_not_block_the_event_loop() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+
+    def slow_write(_: sqlite3.Connection) -> None:
+        time.sleep(0.2)
+
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    await pool.write(slow_write)
+    ticker.cancel()
+
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_transaction_commits_every_write_together(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    pool.initialize(lambda connection: connection.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+
+    def insert(name: str) -> Callable[[sqlite3.Connection], object]:
+        return lambda connection: connection.execute("INSERT INTO items (name) VALUES (?)", (name,))
+
+    def count(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    async with pool.transaction():
+        await pool.write(insert("a"))
+        await asyncio.gather(pool.write(insert("b")), pool.write(insert("c")))
+    assert await pool.read(count) == 3
+
+    async def insert_duplicate() -> None:
+        async with pool.transaction():
+            await pool.write(insert("d"))
+            await pool.write(insert("a"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        await insert_duplicate()
+    assert await pool.read(count) == 3
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_readers_of_a_file_database_do_not_see_uncommitted_writes(tmp_path: Path) -> None:
+    pool = SQLiteConnectionPool(file_path=str(tmp_path / "test.db"))
+    pool.initialize(lambda connection: connection.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+
+    def count(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    async with pool.transaction():
+        await pool.write(lambda connection: connection.execute("INSERT INTO items (name) VALUES ('a')"))
+        assert await pool.read(count) == 0
+    assert await pool.read(count) == 1
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_outside_a_transaction_wait_for_it(database_path: str) -> None:
+    pool = SQLiteConnectionPool(file_path=database_path)
+    pool.initialize(lambda connection: connection.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+    order = []
+    transaction_started = asyncio.Event()
+
+    async def write_in_transaction() -> None:
+        async with pool.transaction():
+            transaction_started.set()
+            await asyncio.sleep(0.05)
+            order.append("transaction")
+
+    task = asyncio.create_task(write_in_transaction())
+    await transaction_started.wait()
+    await pool.write(lambda connection: connection.execute("INSERT INTO items (name) VALUES ('outside')"))
+    order.append("outside")
+    await task
+
+    assert order == ["transaction", "outside"]
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_queries_are_measured_by_repository_method() -> None:
+    metrics = MetricsRegistry()
+    pool = SQLiteConnectionPool(file_path=":memory:", metrics=metrics)
+    group_repo = SQLiteGroupRepository(pool=pool)
+
+    await group_repo.add_member(GroupName(root="group1"), Username(root="user1"), PhoneNumber(root="+1000000001"))
+    await group_repo.get_group(GroupName(root="group1"))
+    await group_repo.get_group(GroupName(root="group1"))
+
+    histogram = metrics.histogram("sqlite_query_duration_seconds", "", labels=("method", "connection"))
+    assert histogram.count("SQLiteGroupRepository.add_member", "writer") == 1
+    assert histogram.count("SQLiteGroupRepository.get_group", "reader") == 2
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_queries_are_added_to_the_trace_of_the_request() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    group_repo = SQLiteGroupRepository(pool=pool)
+
+    with start_trace() as trace:
+        await group_repo.add_member(GroupName(root="group1"), Username(root="user1"), PhoneNumber(root="+1000000001"))
+        await asyncio.gather(*(group_repo.get_group(GroupName(root="group1")) for _ in range(3)))
+    await group_repo.get_group(GroupName(root="group1"))
+
+    assert trace.spans.keys() == {"sqlite.SQLiteGroupRepository.add_member", "sqlite.SQLiteGroupRepository.get_group"}
+    assert trace.spans["sqlite.SQLiteGroupRepository.get_group"][1] == 3
+    pool.close()
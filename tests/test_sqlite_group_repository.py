@@ -1,8 +1,15 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+
 import pytest
 
-from group_sms_chat.domain.group import Group, GroupName, GroupUser
-from group_sms_chat.domain.user import PhoneNumber, Username
+from group_sms_chat.domain.exceptions import GroupAlreadyExistsError, UserAlreadyInGroupError, UserNotInGroupError
+from group_sms_chat.domain.group import Group, GroupName, GroupSummary, GroupUser
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
 from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
 
 
 @pytest.mark.asyncio
@@ -195,3 +202,177 @@ async def test_get_single_group() -> None:
     # Test getting a non-existent group
     non_existent_group = await repo.get_group(GroupName(root="nonexistent"))
     assert non_existent_group is None
+
+
+@pytest.mark.asyncio
+async def test_get_message_route() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    user_repo = SQLiteUserRepository(pool=pool)
+    repo = SQLiteGroupRepository(pool=pool)
+
+    for username, phone_number in [("user1", "+1111111111"), ("user2", "+2222222222")]:
+        await user_repo.add_user(User(
+            username=Username(root=username),
+            phone_number=PhoneNumber(root=phone_number),
+            hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+        ))
+
+    group = Group(
+        name=GroupName(root="routegroup"),
+        users={
+            GroupUser(username=Username(root="user1"), user_group_phone_number=PhoneNumber(root="+1000000001")),
+            GroupUser(username=Username(root="user2"), user_group_phone_number=PhoneNumber(root="+1000000002")),
+            GroupUser(username=Username(root="user3"), user_group_phone_number=PhoneNumber(root="+1000000001")),
+        }
+    )
+    await repo.create_or_update_group(group)
+
+    route = await repo.get_message_route(PhoneNumber(root="+1111111111"), PhoneNumber(root="+1000000001"))
+    assert route is not None
+    assert route.sender == Username(root="user1")
+    assert route.group_name == group.name
+    recipients = {(str(r.username), str(r.phone_number), str(r.group_phone_number)) for r in route.recipients}
+    assert recipients == {("user2", "+2222222222", "+1000000002"), ("user3", "None", "+1000000001")}
+
+    # The sender does not use that number for any group
+    assert await repo.get_message_route(PhoneNumber(root="+1111111111"), PhoneNumber(root="+1000000002")) is None
+    # The sender is not registered
+    assert await repo.get_message_route(PhoneNumber(root="+3333333333"), PhoneNumber(root="+1000000001")) is None
+
+
+@pytest.mark.asyncio
+async def test_get_message_route_of_a_group_without_other_members() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    user_repo = SQLiteUserRepository(pool=pool)
+    repo = SQLiteGroupRepository(pool=pool)
+
+    await user_repo.add_user(User(
+        username=Username(root="user1"),
+        phone_number=PhoneNumber(root="+1111111111"),
+        hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+    ))
+    group = Group(name=GroupName(root="alonegroup"))
+    group.add_user(Username(root="user1"), PhoneNumber(root="+1000000001"))
+    await repo.create_or_update_group(group)
+
+    route = await repo.get_message_route(PhoneNumber(root="+1111111111"), PhoneNumber(root="+1000000001"))
+    assert route is not None
+    assert route.recipients == []
+
+
+@pytest.mark.asyncio
+async def test_add_and_remove_members() -> None:
+    repo = SQLiteGroupRepository(file_path=":memory:")
+    group_name = GroupName(root="membersgroup")
+
+    await repo.add_member(group_name, Username(root="user1"), PhoneNumber(root="+1000000001"))
+    await repo.add_member(group_name, Username(root="user2"), PhoneNumber(root="+1000000002"))
+
+    with pytest.raises(UserAlreadyInGroupError):
+        await repo.add_member(group_name, Username(root="user1"), PhoneNumber(root="+1000000002"))
+
+    group = await repo.get_group(group_name)
+    assert group is not None
+    assert group.get_user_phone_number(Username(root="user1")) == PhoneNumber(root="+1000000001")
+    assert group.get_user_phone_number(Username(root="user2")) == PhoneNumber(root="+1000000002")
+
+    await repo.remove_member(group_name, Username(root="user1"))
+    with pytest.raises(UserNotInGroupError):
+        await repo.remove_member(group_name, Username(root="user1"))
+
+    group = await repo.get_group(group_name)
+    assert group is not None
+    assert [str(user.username) for user in group.users] == ["user2"]
+
+    # The group is gone once its last member leaves
+    await repo.remove_member(group_name, Username(root="user2"))
+    assert await repo.get_group(group_name) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_joins_keep_every_member() -> None:
+    repo = SQLiteGroupRepository(file_path=":memory:")
+    group_name = GroupName(root="busygroup")
+
+    await asyncio.gather(*(
+        repo.add_member(group_name, Username(root=f"user{i}"), PhoneNumber(root="+1000000001"))
+        for i in range(50)
+    ))
+
+    group = await repo.get_group(group_name)
+    assert group is not None
+    assert len(group.users) == 50
+
+
+async def add_groups(repo: SQLiteGroupRepository, members_by_group: dict[str, int]) -> None:
+    for group_name, members in members_by_group.items():
+        for i in range(members):
+            await repo.add_member(GroupName(root=group_name), Username(root=f"user{i}"),
+                                  PhoneNumber(root="+1000000001"))
+
+
+@pytest.mark.asyncio
+async def test_find_groups_by_name_in_pages() -> None:
+    repo = SQLiteGroupRepository(file_path=":memory:")
+    await add_groups(repo, {"team-b": 2, "team-a": 1, "other": 1, "team-c": 3})
+
+    first_page = await repo.find_groups_by_name(GroupName(root="team"), limit=2)
+    assert [str(group.name) for group in first_page] == ["team-a", "team-b"]
+    assert len(first_page[1].users) == 2
+
+    second_page = await repo.find_groups_by_name(GroupName(root="team"), limit=2, after=first_page[-1].name)
+    assert [str(group.name) for group in second_page] == ["team-c"]
+    assert len(second_page[0].users) == 3
+
+
+@pytest.mark.parametrize("full_text_search", [True, False])
+@pytest.mark.asyncio
+async def test_find_group_summaries_by_name(full_text_search: bool) -> None:
+    repo = SQLiteGroupRepository(file_path=":memory:")
+    repo.full_text_search = full_text_search
+    await add_groups(repo, {"chess_club": 3, "chessboard": 1, "cheese": 2})
+
+    summaries = await repo.find_group_summaries_by_name(GroupName(root="chess"))
+    assert summaries == [
+        GroupSummary(name=GroupName(root="chess_club"), member_count=3),
+        GroupSummary(name=GroupName(root="chessboard"), member_count=1),
+    ]
+    # The underscore is matched literally
+    assert await repo.find_group_summaries_by_name(GroupName(root="s_c")) == [summaries[0]]
+
+    await repo.remove_member(GroupName(root="chess_club"), Username(root="user0"))
+    await repo.delete_group(GroupName(root="chessboard"))
+    assert await repo.find_group_summaries_by_name(GroupName(root="chess")) == [
+        GroupSummary(name=GroupName(root="chess_club"), member_count=2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_groups_are_backfilled_from_existing_members(tmp_path: Path) -> None:
+    file_path = str(tmp_path / "test.db")
+    with sqlite3.connect(file_path) as connection:
+        connection.execute("CREATE TABLE group_users (group_name TEXT NOT NULL, username TEXT NOT NULL, "
+                           "user_group_phone_number TEXT NOT NULL, PRIMARY KEY (group_name, username))")
+        connection.executemany("INSERT INTO group_users VALUES (?, ?, ?)", [
+            ("oldgroup", "user1", "+1000000001"), ("oldgroup", "user2", "+1000000001"),
+        ])
+    connection.close()
+
+    repo = SQLiteGroupRepository(file_path=file_path)
+    assert await repo.find_group_summaries_by_name(GroupName(root="old")) == [
+        GroupSummary(name=GroupName(root="oldgroup"), member_count=2),
+    ]
+    repo.pool.close()
+
+
+@pytest.mark.asyncio
+async def test_a_group_is_only_created_once() -> None:
+    repo = SQLiteGroupRepository(file_path=":memory:")
+    group_name = GroupName(root="newgroup")
+
+    await repo.create_group(group_name, Username(root="user1"), PhoneNumber(root="+1000000001"))
+    with pytest.raises(GroupAlreadyExistsError):
+        await repo.create_group(group_name, Username(root="user2"), PhoneNumber(root="+1000000001"))
+
+    summaries = await repo.find_group_summaries_by_name(group_name)
+    assert [(str(summary.name), summary.member_count) for summary in summaries] == [("newgroup", 1)]
@@ -0,0 +1,63 @@
+import pytest
+
+from group_sms_chat.infrastructure.sqlite.idempotency_store import SQLiteIdempotencyStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def count_keys(store: SQLiteIdempotencyStore) -> int:
+    return store.pool.initialize(lambda c: c.execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0])
+
+
+@pytest.mark.asyncio
+async def test_key_is_only_new_once() -> None:
+    store = SQLiteIdempotencyStore(file_path=":memory:")
+
+    assert await store.add("SM1") is True
+    assert await store.add("SM1") is False
+    assert await store.add("SM2") is True
+
+
+@pytest.mark.asyncio
+async def test_expired_key_is_new_again() -> None:
+    clock = FakeClock()
+    store = SQLiteIdempotencyStore(file_path=":memory:", ttl=60, prune_interval=3600, clock=clock)
+    await store.add("SM1")
+
+    clock.now += 59
+    assert await store.add("SM1") is False
+    clock.now += 1
+    assert await store.add("SM1") is True
+    assert await store.add("SM1") is False
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_pruned_once_per_interval() -> None:
+    clock = FakeClock()
+    store = SQLiteIdempotencyStore(file_path=":memory:", ttl=60, prune_interval=120, clock=clock)
+    await store.add("SM1")
+    await store.add("SM2")
+
+    clock.now += 90
+    await store.add("SM3")
+    assert count_keys(store) == 3
+
+    clock.now += 30
+    await store.add("SM4")
+    assert count_keys(store) == 2
+
+
+@pytest.mark.asyncio
+async def test_discarded_key_is_new_again() -> None:
+    store = SQLiteIdempotencyStore(file_path=":memory:")
+    await store.add("SM1")
+
+    await store.discard("SM1")
+
+    assert await store.add("SM1") is True
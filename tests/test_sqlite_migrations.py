@@ -0,0 +1,116 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from group_sms_chat.domain.group import GroupName
+from group_sms_chat.domain.user import HashedPassword, PhoneNumber, User, Username, UserPassword
+from group_sms_chat.infrastructure.sqlite.connection_pool import SQLiteConnectionPool
+from group_sms_chat.infrastructure.sqlite.group_repository import SQLiteGroupRepository
+from group_sms_chat.infrastructure.sqlite.migrations import MIGRATIONS, migrate
+from group_sms_chat.infrastructure.sqlite.user_repository import SQLiteUserRepository
+
+
+def routes(connection: sqlite3.Connection) -> list[tuple[str, str, str, str]]:
+    return connection.execute(
+        "SELECT phone_number, group_phone_number, group_name, username FROM group_routes ORDER BY username"
+    ).fetchall()
+
+
+def new_user(username: str, phone_number: str) -> User:
+    return User(
+        username=Username(root=username),
+        phone_number=PhoneNumber(root=phone_number),
+        hashed_password=HashedPassword.from_string(UserPassword(root="password123"))
+    )
+
+
+@pytest.mark.asyncio
+async def test_migrate_a_database_created_without_migrations(tmp_path: Path) -> None:
+    file_path = str(tmp_path / "test.db")
+    with sqlite3.connect(file_path) as connection:
+        connection.execute("CREATE TABLE users (username TEXT PRIMARY KEY, phone_number TEXT NOT NULL UNIQUE, "
+                           "hashed_password TEXT)")
+        connection.execute("CREATE TABLE group_users (group_name TEXT NOT NULL, username TEXT NOT NULL, "
+                           "user_group_phone_number TEXT NOT NULL, PRIMARY KEY (group_name, username))")
+        connection.executemany("INSERT INTO users VALUES (?, ?, NULL)", [
+            ("user1", "+3400000001"), ("user2", "+3400000002"),
+        ])
+        connection.executemany("INSERT INTO group_users VALUES (?, ?, ?)", [
+            ("oldgroup", "user1", "+1000000001"), ("oldgroup", "user2", "+1000000002"),
+        ])
+    connection.close()
+
+    pool = SQLiteConnectionPool(file_path=file_path)
+    group_repo = SQLiteGroupRepository(pool=pool)
+    SQLiteUserRepository(pool=pool)
+
+    assert pool.initialize(lambda c: c.execute("PRAGMA user_version").fetchone()[0]) == len(MIGRATIONS)
+    assert pool.initialize(routes) == [
+        ("+3400000001", "+1000000001", "oldgroup", "user1"),
+        ("+3400000002", "+1000000002", "oldgroup", "user2"),
+    ]
+    route = await group_repo.get_message_route(PhoneNumber(root="+3400000001"), PhoneNumber(root="+1000000001"))
+    assert route is not None
+    assert route.group_name == GroupName(root="oldgroup")
+    assert [recipient.username for recipient in route.recipients] == [Username(root="user2")]
+
+    # Running the migrations again does nothing
+    pool.initialize(migrate)
+    assert len(pool.initialize(routes)) == 2
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_routes_follow_members_and_users() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    group_repo = SQLiteGroupRepository(pool=pool)
+    user_repo = SQLiteUserRepository(pool=pool)
+
+    # A member who registers after joining gets their route when the user is added
+    await group_repo.add_member(GroupName(root="group1"), Username(root="user1"), PhoneNumber(root="+1000000001"))
+    assert pool.initialize(routes) == []
+    await user_repo.add_user(new_user("user1", "+3400000001"))
+    await user_repo.add_user(new_user("user2", "+3400000002"))
+    await group_repo.add_member(GroupName(root="group1"), Username(root="user2"), PhoneNumber(root="+1000000002"))
+    assert pool.initialize(routes) == [
+        ("+3400000001", "+1000000001", "group1", "user1"),
+        ("+3400000002", "+1000000002", "group1", "user2"),
+    ]
+
+    await group_repo.remove_member(GroupName(root="group1"), Username(root="user2"))
+    assert pool.initialize(routes) == [("+3400000001", "+1000000001", "group1", "user1")]
+
+    await pool.write(lambda c: c.execute("UPDATE users SET phone_number = '+3400000009' WHERE username = 'user1'"))
+    assert pool.initialize(routes) == [("+3400000009", "+1000000001", "group1", "user1")]
+
+    await user_repo.delete_user(Username(root="user1"))
+    assert pool.initialize(routes) == []
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_a_shared_number_keeps_a_route() -> None:
+    pool = SQLiteConnectionPool(file_path=":memory:")
+    group_repo = SQLiteGroupRepository(pool=pool)
+    user_repo = SQLiteUserRepository(pool=pool)
+    await user_repo.add_user(new_user("user1", "+3400000001"))
+
+    await group_repo.add_member(GroupName(root="group1"), Username(root="user1"), PhoneNumber(root="+1000000001"))
+    await group_repo.add_member(GroupName(root="group2"), Username(root="user1"), PhoneNumber(root="+1000000001"))
+    assert pool.initialize(routes) == [("+3400000001", "+1000000001", "group1", "user1")]
+
+    await group_repo.remove_member(GroupName(root="group1"), Username(root="user1"))
+    assert pool.initialize(routes) == [("+3400000001", "+1000000001", "group2", "user1")]
+    pool.close()
+
+
+def test_message_route_lookup_seeks_the_routes_primary_key() -> None:
+    connection = sqlite3.connect(":memory:", isolation_level=None)
+    migrate(connection)
+    plan = " ".join(row[3] for row in connection.execute(
+        "EXPLAIN QUERY PLAN SELECT group_name FROM group_routes WHERE phone_number = ? AND group_phone_number = ?",
+        ("+3400000001", "+1000000001")
+    ))
+    assert "USING PRIMARY KEY" in plan
+    connection.close()
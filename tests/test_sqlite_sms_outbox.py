@@ -0,0 +1,89 @@
+import pytest
+
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.sqlite.sms_outbox import SQLiteSMSOutbox
+
+FROM_NUMBER = PhoneNumber(root="+15550000001")
+TO_NUMBER = PhoneNumber(root="+16660000001")
+
+
+@pytest.mark.asyncio
+async def test_claim_enqueued_messages() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "first")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "second")
+
+    messages = await outbox.claim(limit=10)
+    assert [message.message for message in messages] == ["first", "second"]
+    assert all(message.attempts == 1 for message in messages)
+    assert messages[0].from_phone_number == FROM_NUMBER
+    assert messages[0].to_phone_number == TO_NUMBER
+
+    # Claimed messages are not returned again
+    assert await outbox.claim(limit=10) == []
+
+    stats = await outbox.stats()
+    assert (stats.pending, stats.in_flight, stats.failed) == (0, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_claimed_messages_are_sent_from_a_single_number() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    other_number = PhoneNumber(root="+15550000002")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "first")
+    await outbox.enqueue(other_number, TO_NUMBER, "second")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "third")
+    await outbox.enqueue(other_number, TO_NUMBER, "fourth")
+
+    assert [message.message for message in await outbox.claim(limit=10, exclude_senders=[FROM_NUMBER])] == [
+        "second", "fourth"
+    ]
+    assert [message.message for message in await outbox.claim(limit=10)] == ["first", "third"]
+
+
+@pytest.mark.asyncio
+async def test_sent_messages_are_removed() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "hello")
+
+    [message] = await outbox.claim(limit=10)
+    await outbox.mark_sent(message.id)
+
+    stats = await outbox.stats()
+    assert (stats.pending, stats.in_flight, stats.failed) == (0, 0, 0)
+    assert stats.oldest_pending_age_seconds is None
+
+
+@pytest.mark.asyncio
+async def test_failed_messages_are_retried_when_due() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "hello")
+
+    [message] = await outbox.claim(limit=10)
+    await outbox.mark_failed(message.id, error="timeout", retry_in=60)
+    assert await outbox.claim(limit=10) == []
+
+    await outbox.mark_failed(message.id, error="timeout", retry_in=0)
+    [retried] = await outbox.claim(limit=10)
+    assert retried.id == message.id
+    assert retried.attempts == 2
+
+    await outbox.mark_failed(message.id, error="invalid number", retry_in=None)
+    assert await outbox.claim(limit=10) == []
+    stats = await outbox.stats()
+    assert (stats.pending, stats.in_flight, stats.failed) == (0, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_recover_in_flight_messages() -> None:
+    outbox = SQLiteSMSOutbox(file_path=":memory:")
+    await outbox.enqueue(FROM_NUMBER, TO_NUMBER, "hello")
+    await outbox.claim(limit=10)
+
+    assert await outbox.recover_in_flight() == 1
+
+    stats = await outbox.stats()
+    assert (stats.pending, stats.in_flight) == (1, 0)
+    assert stats.oldest_pending_age_seconds is not None
+    assert len(await outbox.claim(limit=10)) == 1
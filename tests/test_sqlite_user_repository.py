@@ -83,3 +83,25 @@ async def test_get_user_by_phone_number() -> None:
     await repo.add_user(user)
     retrieved_user = await repo.get_user_by_phone_number(user.phone_number)
     assert retrieved_user == user
+
+
+@pytest.mark.asyncio
+async def test_get_users() -> None:
+    repo = SQLiteUserRepository(file_path=":memory:")
+
+    users = [
+        User(
+            username=Username(f"user{i}"),
+            phone_number=PhoneNumber(f"+1666{i:07d}"),
+            hashed_password=HashedPassword.from_string(UserPassword("password123"))
+        )
+        for i in range(600)
+    ]
+    for user in users:
+        await repo.add_user(user)
+
+    retrieved_users = await repo.get_users([user.username for user in users] + [Username("nonexistent")])
+    assert sorted(retrieved_users, key=lambda user: str(user.username)) == sorted(
+        users, key=lambda user: str(user.username)
+    )
+    assert await repo.get_users([]) == []
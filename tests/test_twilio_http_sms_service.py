@@ -0,0 +1,115 @@
+import asyncio
+import base64
+import urllib.parse
+
+import httpx
+import pytest
+
+from group_sms_chat.domain.exceptions import SMSDeliveryError
+from group_sms_chat.domain.sms_service import SMSMessage
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.twilio.http_sms_service import TwilioHTTPSMSService
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter, RateLimit
+
+FROM_NUMBER = PhoneNumber(root="+15550000001")
+TO_NUMBER = PhoneNumber(root="+16660000001")
+
+
+def create_service(handler: httpx.MockTransport) -> TwilioHTTPSMSService:
+    return TwilioHTTPSMSService(account_sid="AC123", auth_token="secret", phone_numbers=[str(FROM_NUMBER)],
+                                base_url="http://twilio.local", transport=handler)
+
+
+@pytest.mark.asyncio
+async def test_send_sms_posts_the_message_to_the_messages_endpoint() -> None:
+    requests: list[httpx.Request] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201, json={"sid": "SM123"})
+
+    service = create_service(httpx.MockTransport(handle))
+    await service.send_sms(FROM_NUMBER, TO_NUMBER, "hello")
+    await service.stop()
+
+    [request] = requests
+    assert request.method == "POST"
+    assert str(request.url) == "http://twilio.local/2010-04-01/Accounts/AC123/Messages.json"
+    assert request.headers["Authorization"] == "Basic " + base64.b64encode(b"AC123:secret").decode()
+    assert dict(urllib.parse.parse_qsl(request.content.decode())) == {
+        "From": "+15550000001", "To": "+16660000001", "Body": "hello"
+    }
+
+
+@pytest.mark.asyncio
+async def test_error_responses_raise_a_delivery_error() -> None:
+    service = create_service(httpx.MockTransport(lambda _: httpx.Response(429, text="Too Many Requests")))
+
+    with pytest.raises(SMSDeliveryError, match="429"):
+        await service.send_sms(FROM_NUMBER, TO_NUMBER, "hello")
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_connection_errors_raise_a_delivery_error() -> None:
+    def handle(request: httpx.Request) -> httpx.Response:
+        message = "connection refused"
+        raise httpx.ConnectError(message, request=request)
+
+    service = create_service(httpx.MockTransport(handle))
+
+    with pytest.raises(SMSDeliveryError, match="ConnectError"):
+        await service.send_sms(FROM_NUMBER, TO_NUMBER, "hello")
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_returns_the_outcome_of_each_message() -> None:
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        to = dict(urllib.parse.parse_qsl(request.content.decode()))["To"]
+        return httpx.Response(400, text="Invalid number") if to.endswith("3") else httpx.Response(201)
+
+    service = create_service(httpx.MockTransport(handle))
+    messages = [SMSMessage(FROM_NUMBER, PhoneNumber(root=f"+1666000000{i}"), "hello") for i in range(8)]
+    results = await service.send_bulk(messages, max_concurrency=3)
+    await service.stop()
+
+    assert [result.message for result in results] == messages
+    assert [result.sent for result in results] == [i != 3 for i in range(8)]
+    assert "Invalid number" in str(results[3].error)
+    assert max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_throttled_sender_does_not_hold_back_the_others() -> None:
+    other_number = PhoneNumber(root="+15550000002")
+    sent_at: dict[str, list[float]] = {}
+    loop = asyncio.get_running_loop()
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        sent_at.setdefault(dict(urllib.parse.parse_qsl(request.content.decode()))["From"], []).append(loop.time())
+        return httpx.Response(201)
+
+    rate_limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=1000, burst=10),
+                                          limits={str(FROM_NUMBER): RateLimit(rate=20, burst=1)})
+    service = TwilioHTTPSMSService(account_sid="AC123", auth_token="secret", phone_numbers=[str(FROM_NUMBER)],
+                                   base_url="http://twilio.local", transport=httpx.MockTransport(handle),
+                                   rate_limiter=rate_limiter)
+    start = loop.time()
+    messages = [SMSMessage(number, PhoneNumber(root=f"+1666000000{i}"), "hello")
+                for i in range(4) for number in (FROM_NUMBER, other_number)]
+    results = await service.send_bulk(messages, max_concurrency=1)
+    await service.stop()
+
+    assert all(result.sent for result in results)
+    # The throttled number sends a message every 50ms, the other one does not wait for it
+    assert max(sent_at[str(FROM_NUMBER)]) - start >= 0.14
+    assert max(sent_at[str(other_number)]) < max(sent_at[str(FROM_NUMBER)]) - 0.1
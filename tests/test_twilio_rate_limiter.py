@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from group_sms_chat.domain.user import PhoneNumber
+from group_sms_chat.infrastructure.twilio.rate_limiter import PhoneNumberRateLimiter, RateLimit, parse_rate_limits
+
+FIRST_NUMBER = PhoneNumber(root="+15550000001")
+SECOND_NUMBER = PhoneNumber(root="+15550000002")
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_without_waiting_and_the_rest_is_paced() -> None:
+    clock = FakeClock()
+    limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=100, burst=3), clock=clock)
+
+    waits = await asyncio.gather(*(limiter.acquire(FIRST_NUMBER) for _ in range(5)))
+
+    assert waits == pytest.approx([0, 0, 0, 0.01, 0.02])
+    [stats] = limiter.stats()
+    assert stats.waits == 2
+    assert stats.total_wait_seconds == pytest.approx(0.03)
+    assert stats.max_wait_seconds == pytest.approx(0.02)
+
+
+@pytest.mark.asyncio
+async def test_numbers_are_limited_independently() -> None:
+    clock = FakeClock()
+    limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=1, burst=1),
+                                     limits={str(SECOND_NUMBER): RateLimit(rate=1, burst=2)},
+                                     clock=clock)
+
+    await limiter.acquire(FIRST_NUMBER)
+    assert await limiter.acquire(SECOND_NUMBER) == 0
+    assert await limiter.acquire(SECOND_NUMBER) == 0
+
+    stats = {stats.phone_number: stats for stats in limiter.stats()}
+    assert stats[str(FIRST_NUMBER)].capacity == 1
+    assert stats[str(SECOND_NUMBER)].capacity == 2
+    assert stats[str(SECOND_NUMBER)].available_tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_occupancy_reports_queued_messages_and_refills() -> None:
+    clock = FakeClock()
+    limiter = PhoneNumberRateLimiter(default_limit=RateLimit(rate=100, burst=2), clock=clock)
+
+    tasks = [asyncio.create_task(limiter.acquire(FIRST_NUMBER)) for _ in range(4)]
+    await asyncio.sleep(0)
+
+    [stats] = limiter.stats()
+    assert stats.queued == 2
+    assert stats.available_tokens == 0
+
+    await asyncio.gather(*tasks)
+    clock.now = 10
+    [stats] = limiter.stats()
+    assert stats.queued == 0
+    assert stats.available_tokens == 2
+
+
+def test_parse_rate_limits() -> None:
+    assert parse_rate_limits("+15550000001=10/20, +15550000002=0.5") == {
+        "+15550000001": RateLimit(rate=10, burst=20),
+        "+15550000002": RateLimit(rate=0.5, burst=1),
+    }
+    assert parse_rate_limits("") == {}